@@ -0,0 +1,8 @@
+"""Maps companies from companiesIDsTickers.json to their goldstockdata.com pages.
+
+mapping_script and mapping_script2 are the two pipelines (crawl, match,
+export); the other modules are the pieces they share. Importing the
+package is cheap: requests, bs4 and fuzzywuzzy are only loaded by the
+code paths that use them, and logging/signal handling are configured by
+main().
+"""
@@ -0,0 +1,164 @@
+import http.client
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Recorded latency is slept before each replayed response; zero replays as fast as possible
+RECORDED_LATENCY = 'recorded'
+ZERO_LATENCY = 'zero'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    seq INTEGER PRIMARY KEY,
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    elapsed REAL NOT NULL
+);
+"""
+
+# The body is stored decoded, so these no longer describe it
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+class CassetteMiss(Exception):
+    pass
+
+class Cassette:
+    """Recorded HTTP exchanges in a SQLite file, bodies zlib-compressed.
+
+    In record mode every response that passes through the session is
+    appended in the order it arrived. In replay mode the exchanges for a
+    (method, url) are served back in that same order, so a recorded 429
+    followed by a 200 replays as a retry; once they run out the last one
+    repeats. Bodies are only read when they are served.
+    """
+
+    def __init__(self, path: Path, mode: str, latency: str = RECORDED_LATENCY):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        if mode == REPLAY and not self.path.exists():
+            raise FileNotFoundError(f"No cassette at {self.path}")
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._entries: Dict[Tuple[str, str], List[Tuple[int, float]]] = defaultdict(list)
+        self._cursor: Counter = Counter()
+        if mode == RECORD:
+            # A recording always starts from an empty cassette
+            self._conn.execute('DELETE FROM exchanges')
+            self._conn.commit()
+        else:
+            for seq, method, url, elapsed in self._conn.execute(
+                    'SELECT seq, method, url, elapsed FROM exchanges ORDER BY seq'):
+                self._entries[(method, url)].append((seq, elapsed))
+            logger.info(f"Cassette {self.path}: {sum(len(v) for v in self._entries.values())} exchanges "
+                        f"for {len(self._entries)} URLs")
+
+    def record(self, method: str, url: str, status: int, headers: Dict[str, str], body: bytes, elapsed: float):
+        headers = {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS}
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO exchanges (method, url, status, headers, body, elapsed) VALUES (?, ?, ?, ?, ?, ?)',
+                (method, url, status, json.dumps(headers), zlib.compress(body, 6), elapsed))
+            self.stats['recorded'] += 1
+            if self.stats['recorded'] % 100 == 0:
+                self._conn.commit()
+
+    def next_exchange(self, method: str, url: str) -> Tuple[int, Dict[str, str], bytes, float]:
+        """(status, headers, body, elapsed) of the next recorded response for this request"""
+        key = (method, url)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats['missed'] += 1
+                raise CassetteMiss(f"No recorded response for {method} {url}")
+            seq, elapsed = entries[min(self._cursor[key], len(entries) - 1)]
+            self._cursor[key] += 1
+            self.stats['replayed'] += 1
+            status, headers, body = self._conn.execute(
+                'SELECT status, headers, body FROM exchanges WHERE seq = ?', (seq,)).fetchone()
+        return status, json.loads(headers), zlib.decompress(body), elapsed
+
+    def attach(self, session: 'requests.Session'):
+        """Route every request the session makes through this cassette"""
+        adapter = CassetteAdapter(self)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+        logger.info(f"Cassette {self.path} ({self.mode}): {self.summary()}")
+
+class CassetteAdapter:
+    """requests transport adapter that records through a real HTTPAdapter or replays from the cassette"""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._live = None
+        if cassette.mode == RECORD:
+            from requests.adapters import HTTPAdapter
+            self._live = HTTPAdapter()
+
+    def send(self, request: 'requests.PreparedRequest', **kwargs) -> 'requests.Response':
+        if self._live is not None:
+            started = time.perf_counter()
+            response = self._live.send(request, **kwargs)
+            body = response.content
+            self.cassette.record(request.method, request.url, response.status_code, dict(response.headers),
+                                 body, time.perf_counter() - started)
+            return response
+        return self._replay(request)
+
+    def _replay(self, request: 'requests.PreparedRequest') -> 'requests.Response':
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        from requests.utils import get_encoding_from_headers
+
+        # A miss is not a RequestException on purpose: a replay that diverged from
+        # the recording fails fast instead of retrying and tripping the breaker
+        status, headers, body, elapsed = self.cassette.next_exchange(request.method, request.url)
+        if self.cassette.latency == RECORDED_LATENCY:
+            time.sleep(elapsed)
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = http.client.responses.get(status, '')
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def close(self):
+        if self._live is not None:
+            self._live.close()
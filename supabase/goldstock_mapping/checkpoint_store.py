@@ -0,0 +1,84 @@
+import itertools
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from . import serialization
+from .shared_files import locked, signature
+
+logger = logging.getLogger(__name__)
+
+class CheckpointStore:
+    """The mapping checkpoint, shared by every run in the working directory.
+
+    Rows are mappings keyed by company_id and tagged with the owner that
+    wrote them (the script and the companies it was run over). save()
+    writes this owner's rows together with the rows other runs have
+    checkpointed, read back under the file lock whenever the file changed
+    since this run last wrote it, so concurrent runs with different limits
+    each keep their progress. load() returns only this owner's rows, so
+    --resume never skips companies another run matched nor exports its
+    rows. clear() takes a finished run's rows out and deletes the file
+    once no rows are left.
+    """
+
+    def __init__(self, path: Path, file_format: str = serialization.JSON, owner: str = ''):
+        self.path = Path(path)
+        self.file_format = file_format
+        self.owner = owner
+        self._others: List[Dict] = []
+        self._written = None
+
+    def _read(self) -> List[Dict]:
+        if not self.path.exists():
+            return []
+        try:
+            return serialization.load(self.path).get('mappings', [])
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint: {e}")
+            return []
+
+    def _ours(self, row: Dict) -> bool:
+        # Rows checkpointed before owners were recorded belong to no run
+        return row.get('owner') == self.owner
+
+    def load(self) -> Dict:
+        """This owner's checkpointed rows"""
+        mappings = [{k: v for k, v in m.items() if k != 'owner'} for m in self._read() if self._ours(m)]
+        return {"processed_ids": [m['company_id'] for m in mappings], "mappings": mappings}
+
+    def _write(self, rows: Iterable[Dict], company_ids: List[int]):
+        serialization.save(self.path, serialization.Members([
+            ('processed_ids', company_ids),
+            ('mappings', rows),
+        ]), self.file_format)
+        self._written = signature(self.path)
+
+    def save(self, mappings: List[Dict]):
+        """Checkpoint this run's rows; rows of companies it hasn't reached are kept as other runs left them"""
+        try:
+            with locked(self.path):
+                if signature(self.path) != self._written:
+                    self._others = self._read()
+                ours = {m['company_id'] for m in mappings}
+                others = [m for m in self._others if not (self._ours(m) and m['company_id'] in ours)]
+                self._write(itertools.chain(others, (dict(m, owner=self.owner) for m in mappings)),
+                            [m['company_id'] for m in others] + [m['company_id'] for m in mappings])
+        except Exception as e:
+            logger.error(f"Failed to save checkpoint: {e}")
+
+    def clear(self, company_ids: Iterable[int]):
+        """Drop a finished run's rows (and untagged ones, which no run resumes); the file goes once nothing is left"""
+        try:
+            with locked(self.path):
+                done = set(company_ids)
+                left = [m for m in self._read() if 'owner' in m and not (self._ours(m) and m['company_id'] in done)]
+                if left:
+                    self._write(left, [m['company_id'] for m in left])
+                    logger.info(f"Checkpoint: this run's rows removed, {len(left)} rows of other runs kept")
+                elif self.path.exists():
+                    os.remove(self.path)
+                    logger.info("Checkpoint file removed (job complete)")
+        except Exception as e:
+            logger.error(f"Failed to clear checkpoint: {e}")
@@ -0,0 +1,200 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    goldstock_id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state);
+"""
+
+# An ID held by a run on another host is given up after this long without progress
+STALE_SECONDS = 3600
+
+def owner_alive(owner: Optional[str], updated_at: Optional[float]) -> bool:
+    """Whether the run that claimed a row (host:pid) may still be fetching or holding its page"""
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(':')
+    if host == socket.gethostname() and os.name == 'posix':
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, ValueError):
+            pass
+        return True
+    return updated_at is not None and time.time() - updated_at < STALE_SECONDS
+
+class CrawlFrontier:
+    """Crawl state of every goldstock ID (pending/in_flight/done/failed), kept in SQLite.
+
+    The fetch phase asks the frontier which IDs still need work instead of
+    walking the whole ID range, so an interrupted crawl picks up exactly where
+    it stopped and IDs that failed with a request error are retried (up to
+    max_attempts) rather than lost.
+
+    Runs sharing the file claim each ID before fetching it, so two runs never
+    fetch the same page; rows remember the run (host:pid) that claimed them.
+    """
+
+    def __init__(self, path: Path, max_attempts: int = 3):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        if 'owner' not in {row[1] for row in conn.execute('PRAGMA table_info(frontier)')}:
+            conn.execute('ALTER TABLE frontier ADD COLUMN owner TEXT')
+        # IDs in flight for a run that is gone were interrupted; those of live runs are theirs
+        stopped = [(PENDING, gid) for gid, owner, updated_at in conn.execute(
+            'SELECT goldstock_id, owner, updated_at FROM frontier WHERE state = ?', (IN_FLIGHT,)
+        ).fetchall() if not owner_alive(owner, updated_at)]
+        if stopped:
+            conn.execute('BEGIN')
+            conn.executemany('UPDATE frontier SET state = ? WHERE goldstock_id = ?', stopped)
+            conn.execute('COMMIT')
+            logger.info(f"Frontier: {len(stopped)} IDs were in flight when the last run stopped")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per fetch thread; sqlite3 connections cannot be shared
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def seed(self, start_id: int, max_id: int):
+        """Register every ID in the range; IDs already tracked keep their state"""
+        conn = self._connection()
+        conn.execute('BEGIN')
+        conn.executemany('INSERT OR IGNORE INTO frontier (goldstock_id) VALUES (?)',
+                         ((gid,) for gid in range(start_id, max_id + 1)))
+        conn.execute('COMMIT')
+
+    def next_ids(self, start_id: int, max_id: int) -> List[int]:
+        """Pending IDs plus failed IDs that still have attempts left"""
+        rows = self._connection().execute(
+            'SELECT goldstock_id FROM frontier WHERE goldstock_id BETWEEN ? AND ? '
+            'AND (state = ? OR (state = ? AND attempts < ?)) ORDER BY goldstock_id',
+            (start_id, max_id, PENDING, FAILED, self.max_attempts)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def done_ids(self, start_id: int, max_id: int) -> List[int]:
+        return self._ids_in_state(start_id, max_id, DONE)
+
+    def in_flight_ids(self, start_id: int, max_id: int) -> List[int]:
+        return self._ids_in_state(start_id, max_id, IN_FLIGHT)
+
+    def _ids_in_state(self, start_id: int, max_id: int, state: str) -> List[int]:
+        rows = self._connection().execute(
+            'SELECT goldstock_id FROM frontier WHERE goldstock_id BETWEEN ? AND ? AND state = ? '
+            'ORDER BY goldstock_id',
+            (start_id, max_id, state)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim(self, goldstock_id: int) -> bool:
+        """Mark an ID in flight for this run; False when another live run holds it (in flight or done)"""
+        conn = self._connection()
+        row = conn.execute('SELECT state, owner, updated_at FROM frontier WHERE goldstock_id = ?',
+                           (goldstock_id,)).fetchone()
+        if row is None:
+            return False
+        state, owner, updated_at = row
+        if state in (IN_FLIGHT, DONE) and owner != self.owner and owner_alive(owner, updated_at):
+            return False
+        # Only if nobody changed the row since it was read
+        cursor = conn.execute(
+            'UPDATE frontier SET state = ?, owner = ?, attempts = attempts + 1, updated_at = ? '
+            'WHERE goldstock_id = ? AND state = ? AND owner IS ?',
+            (IN_FLIGHT, self.owner, time.time(), goldstock_id, state, owner)
+        )
+        return cursor.rowcount == 1
+
+    def claimed_elsewhere(self, goldstock_ids: List[int]) -> List[int]:
+        """Those of the IDs another run claimed last"""
+        wanted = set(goldstock_ids)
+        if not wanted:
+            return []
+        rows = self._connection().execute(
+            'SELECT goldstock_id, owner FROM frontier WHERE goldstock_id BETWEEN ? AND ?', (min(wanted), max(wanted))
+        ).fetchall()
+        return sorted(gid for gid, owner in rows if gid in wanted and owner is not None and owner != self.owner)
+
+    def held_elsewhere(self, goldstock_id: int) -> bool:
+        """Whether another live run is fetching the ID, or fetched it and may not have saved the page yet"""
+        row = self._connection().execute(
+            'SELECT state, owner, updated_at FROM frontier WHERE goldstock_id = ?', (goldstock_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        state, owner, updated_at = row
+        return state in (IN_FLIGHT, DONE) and owner != self.owner and owner_alive(owner, updated_at)
+
+    def mark_done(self, goldstock_id: int):
+        self._connection().execute(
+            'UPDATE frontier SET state = ?, last_error = NULL, updated_at = ? WHERE goldstock_id = ?',
+            (DONE, time.time(), goldstock_id)
+        )
+
+    def mark_failed(self, goldstock_id: int, error: str):
+        self._connection().execute(
+            'UPDATE frontier SET state = ?, last_error = ?, updated_at = ? WHERE goldstock_id = ?',
+            (FAILED, error, time.time(), goldstock_id)
+        )
+
+    def mark_done_many(self, goldstock_ids: List[int]):
+        """Mark IDs done without fetching them (pages already known to have nothing to fetch)"""
+        conn = self._connection()
+        conn.execute('BEGIN')
+        conn.executemany('UPDATE frontier SET state = ?, last_error = NULL, updated_at = ? WHERE goldstock_id = ?',
+                         ((DONE, time.time(), gid) for gid in goldstock_ids))
+        conn.execute('COMMIT')
+
+    def reset(self, goldstock_ids: List[int]):
+        """Put IDs back to pending (e.g. done IDs whose cache entry has gone missing)"""
+        conn = self._connection()
+        conn.execute('BEGIN')
+        conn.executemany('UPDATE frontier SET state = ? WHERE goldstock_id = ?',
+                         ((PENDING, gid) for gid in goldstock_ids))
+        conn.execute('COMMIT')
+
+    def retry_failed(self) -> int:
+        """Give IDs that exhausted their attempts a fresh set of attempts"""
+        cursor = self._connection().execute(
+            'UPDATE frontier SET state = ?, attempts = 0 WHERE state = ?', (PENDING, FAILED)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(self._connection().execute(
+            'SELECT state, COUNT(*) FROM frontier GROUP BY state'
+        ).fetchall()))
+        counts['gave_up'] = self._connection().execute(
+            'SELECT COUNT(*) FROM frontier WHERE state = ? AND attempts >= ?', (FAILED, self.max_attempts)
+        ).fetchone()[0]
+        return counts
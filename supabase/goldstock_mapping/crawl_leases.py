@@ -0,0 +1,252 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id INTEGER PRIMARY KEY,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    goldstock_id INTEGER PRIMARY KEY,
+    payload TEXT
+);
+CREATE TABLE IF NOT EXISTS rate_budget (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+@dataclass
+class Lease:
+    chunk_id: int
+    start_id: int
+    end_id: int
+    owner: str
+    expires_at: float
+    attempts: int = 1
+
+class LeaseQueue:
+    """Goldstock ID ranges leased to crawler processes through a shared SQLite file.
+
+    Every worker (on this host or another one mounting the same file) claims a
+    chunk, renews the lease while it crawls and hands the results back. Chunks
+    whose lease runs out are re-leased, so a crashed worker only costs one
+    lease period. The same file also holds a token bucket, which keeps all
+    workers under one global request budget.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float = 120, rate_limit: Optional[float] = None,
+                 max_attempts: int = 3):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.rate_limit = rate_limit
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _execute_immediate(self, fn):
+        """Run fn(conn) inside a write transaction so workers never race on a row"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+            conn.execute('COMMIT')
+            return result
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def seed(self, start_id: int, max_id: int, chunk_size: int = 100) -> int:
+        """Split the ID space into chunks, extending an existing queue if max_id grew"""
+        def _seed(conn):
+            row = conn.execute('SELECT MAX(end_id) FROM chunks').fetchone()
+            next_id = start_id if row[0] is None else max(start_id, row[0] + 1)
+            chunks = []
+            for chunk_start in range(next_id, max_id + 1, chunk_size):
+                chunks.append((chunk_start, min(chunk_start + chunk_size - 1, max_id)))
+            conn.executemany('INSERT INTO chunks (start_id, end_id) VALUES (?, ?)', chunks)
+            return len(chunks)
+
+        added = self._execute_immediate(_seed)
+        if added:
+            logger.info(f"Seeded {added} chunks (IDs up to {max_id}) in {self.path}")
+        return added
+
+    def claim(self, owner: str) -> Optional[Lease]:
+        """Lease the next pending chunk, or one whose previous lease expired"""
+        def _claim(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT chunk_id, start_id, end_id, owner, status, attempts FROM chunks "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY chunk_id LIMIT 1", (now,)
+            ).fetchone()
+            if not row:
+                return None
+            chunk_id, start_id, end_id, previous_owner, status, attempts = row
+            if status == 'leased':
+                logger.warning(f"Re-leasing chunk {chunk_id} (IDs {start_id}-{end_id}) "
+                               f"abandoned by {previous_owner}")
+            expires_at = now + self.lease_seconds
+            conn.execute(
+                "UPDATE chunks SET status = 'leased', owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE chunk_id = ?",
+                (owner, expires_at, chunk_id)
+            )
+            return Lease(chunk_id, start_id, end_id, owner, expires_at, attempts + 1)
+
+        return self._execute_immediate(_claim)
+
+    def renew(self, lease: Lease) -> bool:
+        """Extend a lease; returns False if another worker has taken the chunk over"""
+        expires_at = time.time() + self.lease_seconds
+        cursor = self._connection().execute(
+            "UPDATE chunks SET lease_expires = ? "
+            "WHERE chunk_id = ? AND owner = ? AND status = 'leased'",
+            (expires_at, lease.chunk_id, lease.owner)
+        )
+        if cursor.rowcount == 1:
+            lease.expires_at = expires_at
+            return True
+        return False
+
+    def release(self, lease: Lease):
+        """Give a chunk back without results (e.g. on Ctrl+C) so others pick it up now"""
+        self._connection().execute(
+            "UPDATE chunks SET status = 'pending', owner = NULL, lease_expires = NULL "
+            "WHERE chunk_id = ? AND owner = ? AND status = 'leased'",
+            (lease.chunk_id, lease.owner)
+        )
+
+    def complete(self, lease: Lease, results: Dict[int, Optional[Dict]], failed_ids: List[int]) -> bool:
+        """Store the chunk's results; chunks with failed IDs go back to pending until max_attempts.
+
+        Returns False, storing nothing, if the lease ran out and another
+        worker has taken the chunk over since.
+        """
+        def _complete(conn):
+            retry = bool(failed_ids) and lease.attempts < self.max_attempts
+            cursor = conn.execute(
+                "UPDATE chunks SET status = ?, owner = NULL, lease_expires = NULL "
+                "WHERE chunk_id = ? AND owner = ? AND status = 'leased'",
+                ('pending' if retry else 'done', lease.chunk_id, lease.owner)
+            )
+            if cursor.rowcount != 1:
+                return None
+            conn.executemany(
+                'INSERT OR REPLACE INTO results (goldstock_id, payload) VALUES (?, ?)',
+                [(gid, json.dumps(payload) if payload else None) for gid, payload in results.items()]
+            )
+            return retry
+
+        retry = self._execute_immediate(_complete)
+        if retry is None:
+            logger.warning(f"Chunk {lease.chunk_id}: lease lost before its results were stored; "
+                           f"left to the worker that took it over")
+            return False
+        if failed_ids:
+            if retry:
+                logger.warning(f"Chunk {lease.chunk_id}: {len(failed_ids)} IDs failed, "
+                               f"returned to queue (attempt {lease.attempts}/{self.max_attempts})")
+            else:
+                logger.error(f"Chunk {lease.chunk_id}: giving up on IDs {failed_ids} "
+                             f"after {lease.attempts} attempts")
+        return True
+
+    def results_for(self, start_id: int, end_id: int) -> Dict[int, Optional[Dict]]:
+        """Results already handed back for an ID range (by any worker)"""
+        rows = self._connection().execute(
+            'SELECT goldstock_id, payload FROM results WHERE goldstock_id BETWEEN ? AND ?',
+            (start_id, end_id)
+        ).fetchall()
+        return {gid: json.loads(payload) if payload else None for gid, payload in rows}
+
+    def all_results(self) -> Dict[int, Optional[Dict]]:
+        rows = self._connection().execute('SELECT goldstock_id, payload FROM results').fetchall()
+        return {gid: json.loads(payload) if payload else None for gid, payload in rows}
+
+    def progress(self) -> Dict[str, int]:
+        rows = self._connection().execute(
+            'SELECT status, COUNT(*) FROM chunks GROUP BY status'
+        ).fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def is_drained(self) -> bool:
+        counts = self.progress()
+        return counts['pending'] == 0 and counts['leased'] == 0
+
+    def acquire(self):
+        """Block until the global token bucket allows one more request"""
+        if not self.rate_limit:
+            return
+        capacity = max(1.0, self.rate_limit)
+
+        def _take(conn):
+            now = time.time()
+            row = conn.execute('SELECT tokens, updated_at FROM rate_budget WHERE id = 1').fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * self.rate_limit)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.rate_limit
+            conn.execute('INSERT OR REPLACE INTO rate_budget (id, tokens, updated_at) VALUES (1, ?, ?)',
+                         (tokens, now))
+            return wait
+
+        while True:
+            wait = self._execute_immediate(_take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+class LeaseHeartbeat:
+    """Renews a lease in the background while its chunk is being crawled"""
+
+    def __init__(self, queue: LeaseQueue, lease: Lease):
+        self.queue = queue
+        self.lease = lease
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            if not self.queue.renew(self.lease):
+                logger.warning(f"Lost lease on chunk {self.lease.chunk_id}; another worker took it over")
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
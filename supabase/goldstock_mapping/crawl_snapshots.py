@@ -0,0 +1,220 @@
+import argparse
+import copy
+import importlib
+import logging
+import re
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from . import fuzzy_engine, serialization
+from .match_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+# Fields whose change is a ticker change in the feed's summary
+TICKER_FIELDS = ('ticker', 'exchange', 'listings')
+
+SNAPSHOT_NAME = re.compile(r'^(\d{6})\.\w+$')
+
+def entry_record(gs) -> Dict:
+    # Alias lists come from a set, so their order differs between processes
+    return {k: sorted(v) if k == 'aliases' and isinstance(v, list) else v for k, v in asdict(gs).items()}
+
+def entry_hash(record: Dict) -> str:
+    return content_hash(record)
+
+def diff(old: Dict[str, Dict], new: Dict[str, Dict]) -> List[Dict]:
+    """Added, removed and changed entries between two {goldstock_id: record} maps, in ID order"""
+    changes = []
+    for goldstock_id in sorted(old.keys() | new.keys(), key=int):
+        before, after = old.get(goldstock_id), new.get(goldstock_id)
+        if before == after:
+            continue
+        change = {'goldstock_id': goldstock_id, 'change': ADDED if before is None else REMOVED if after is None else CHANGED}
+        if before and after:
+            change['fields'] = sorted(k for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+        change['old'], change['new'] = before, after
+        changes.append(change)
+    return changes
+
+def summarize(feed: Dict) -> str:
+    changes = feed['changes']
+    counts = {kind: sum(1 for c in changes if c['change'] == kind) for kind in (ADDED, REMOVED, CHANGED)}
+    tickers = sum(1 for c in changes if c['change'] == CHANGED and set(c['fields']) & set(TICKER_FIELDS))
+    return (f"{counts[ADDED]} added, {counts[REMOVED]} removed, {counts[CHANGED]} changed "
+            f"({tickers} with new tickers) since version {feed['from_version']}")
+
+class SnapshotStore:
+    """Every distinct crawl result, kept as a numbered snapshot of per-entry records and hashes.
+
+    record() writes a new version when the crawl differs from the latest
+    one and returns the change feed between the two, which is also saved
+    next to the snapshots as changes-<from>-<to>. A crawl identical to the
+    latest version writes nothing. Only the newest keep snapshots (and the
+    feeds leading to them) stay on disk.
+    """
+
+    def __init__(self, directory: Path, file_format: str = serialization.JSON, keep: int = 5):
+        self.directory = Path(directory)
+        self.file_format = file_format
+        self.keep = keep
+
+    def versions(self) -> List[int]:
+        if not self.directory.exists():
+            return []
+        return sorted(int(m.group(1)) for m in map(SNAPSHOT_NAME.match, (p.name for p in self.directory.iterdir()))
+                      if m)
+
+    def path(self, version: int) -> Path:
+        return self.directory / f"{version:06d}.{self.file_format}"
+
+    def feed_path(self, from_version: int, to_version: int) -> Path:
+        return self.directory / f"changes-{from_version:06d}-{to_version:06d}.{self.file_format}"
+
+    def load(self, version: int) -> Dict:
+        for path in self.directory.glob(f"{version:06d}.*"):
+            return serialization.load(path)
+        raise FileNotFoundError(f"no snapshot version {version} in {self.directory}")
+
+    def load_feed(self, from_version: int, to_version: int) -> Dict:
+        return serialization.load(self.feed_path(from_version, to_version))
+
+    def latest(self) -> Optional[Dict]:
+        for version in reversed(self.versions()):
+            try:
+                return self.load(version)
+            except Exception as e:
+                logger.error(f"Skipping unreadable snapshot {version}: {e}")
+        return None
+
+    def record(self, goldstock_companies: Iterable, fingerprint: str) -> Optional[Dict]:
+        """Snapshot this crawl; the change feed from the previous version, None if nothing changed"""
+        entries = {str(gs.goldstock_id): entry_record(gs) for gs in goldstock_companies}
+        hashes = {goldstock_id: entry_hash(record) for goldstock_id, record in entries.items()}
+        previous = self.latest()
+        if previous and previous['hashes'] == hashes:
+            logger.info(f"Goldstock crawl unchanged since snapshot version {previous['version']}")
+            return None
+
+        version = previous['version'] + 1 if previous else 1
+        self.directory.mkdir(parents=True, exist_ok=True)
+        serialization.save(self.path(version), {
+            'version': version,
+            'created_at': time.time(),
+            'fingerprint': fingerprint,
+            'hashes': hashes,
+            'entries': entries,
+        }, self.file_format, indent=None)
+        feed = {
+            'from_version': previous['version'] if previous else 0,
+            'to_version': version,
+            'from_fingerprint': previous['fingerprint'] if previous else None,
+            'to_fingerprint': fingerprint,
+            'changes': diff(previous['entries'] if previous else {}, entries),
+        }
+        serialization.save(self.feed_path(feed['from_version'], version), feed, self.file_format, indent=None)
+        logger.info(f"Goldstock snapshot version {version}: {summarize(feed)}")
+        self.prune()
+        return feed
+
+    def prune(self):
+        versions = self.versions()
+        for version in versions[:-self.keep]:
+            for path in list(self.directory.glob(f"{version:06d}.*")) + list(
+                    self.directory.glob(f"changes-*-{version:06d}.*")):
+                path.unlink()
+
+class DeltaFilter:
+    """Which mappings computed against a feed's old index it can change.
+
+    Mirrors the match cascade: a row is affected when its goldstock entry
+    or one of its review candidates changed or went away, when a changed
+    entry (old or new version) carries its ticker on any exchange or its
+    exact name/alias, or, for a row that got as far as fuzzy matching,
+    when a new or changed name scores at least what decided the row: the
+    match threshold, its own score, or its weakest kept candidate.
+    """
+
+    def __init__(self, feed: Dict, normalize_ticker: Callable[[Optional[str]], Optional[str]],
+                 normalize_name: Callable[[Optional[str]], str], fuzzy_cutoff: int, top_k: int):
+        self.normalize_name = normalize_name
+        self.normalize_ticker = normalize_ticker
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.top_k = top_k
+        self.touched_ids: Set[str] = set()
+        self.tickers: Set[str] = set()
+        self.names: Set[str] = set()
+        self.fuzzy_names: List[str] = []
+        # Its own copy: the shared engine keeps the index's choices prepared between rows
+        self.engine = copy.copy(fuzzy_engine.current())
+        for change in feed['changes']:
+            if change['change'] != ADDED:
+                self.touched_ids.add(str(change['goldstock_id']))
+            for record in (change['old'], change['new']):
+                if record:
+                    self._add(record)
+            if change['new'] and change['new'].get('company_name'):
+                self.fuzzy_names.append(normalize_name(change['new']['company_name']))
+
+    def _add(self, record: Dict):
+        symbols = [record.get('ticker')] + [symbol for _, symbol in record.get('listings') or []]
+        self.tickers.update(t for t in map(self.normalize_ticker, symbols) if t)
+        names = [record.get('company_name')] + list(record.get('aliases') or [])
+        self.names.update(n for n in map(self.normalize_name, names) if n)
+
+    def affects(self, company, mapping: Dict) -> bool:
+        if str(mapping.get('goldstock_id')) in self.touched_ids:
+            return True
+        candidates = mapping.get('candidates') or []
+        if any(str(c['goldstock_id']) in self.touched_ids for c in candidates):
+            return True
+        if self.normalize_ticker(company.tsx_code) in self.tickers:
+            return True
+        name = self.normalize_name(company.company_name)
+        if name in self.names:
+            return True
+        if mapping.get('match_method') not in ('fuzzy_name', 'none') or not name or not self.fuzzy_names:
+            return False
+        # Ties go to the lower goldstock ID, so an equal score can still take the row
+        floor = mapping['confidence_score'] if mapping['match_method'] == 'fuzzy_name' else self.fuzzy_cutoff
+        if self.top_k and mapping['match_status'] != 'matched':
+            floor = min(floor, candidates[-1]['score'] if len(candidates) >= self.top_k else 0)
+        return any(score >= floor for _, score in self.engine.top(name, self.fuzzy_names, 1, floor))
+
+def main():
+    parser = argparse.ArgumentParser(description="List goldstock crawl snapshots or show the changes between two")
+    parser.add_argument('--script', choices=['mapping_script', 'mapping_script2'], default='mapping_script2',
+                        help='Whose snapshots to read')
+    parser.add_argument('--from', dest='from_version', type=int, help='Older version (default: the one before --to)')
+    parser.add_argument('--to', dest='to_version', type=int, help='Newer version (default: the latest)')
+    parser.add_argument('--list', action='store_true', help='List the versions kept')
+    args = parser.parse_args()
+
+    script = importlib.import_module(f".{args.script}", __package__)
+    store = SnapshotStore(script.SNAPSHOT_DIR)
+    versions = store.versions()
+    if args.list or len(versions) < 2:
+        for version in versions:
+            snapshot = store.load(version)
+            print(f"{version:>6}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot['created_at']))}  "
+                  f"{len(snapshot['entries'])} entries")
+        return
+    to_version = args.to_version or versions[-1]
+    from_version = args.from_version or max(v for v in versions if v < to_version)
+    old, new = store.load(from_version), store.load(to_version)
+    feed = {'from_version': from_version, 'changes': diff(old['entries'], new['entries'])}
+    print(summarize(feed).replace('since', f'in version {to_version} since'))
+    for change in feed['changes']:
+        record = change['new'] or change['old']
+        fields = f" ({', '.join(change['fields'])})" if 'fields' in change else ''
+        print(f"{change['change']:>8} {change['goldstock_id']:>6}  {record.get('company_name')} "
+              f"[{record.get('ticker') or ''}]{fields}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import csv
+import logging
+import signal
+import threading
+import time
+from pathlib import Path
+
+from .retry_policy import RetryPolicy, RetryingFetcher, int_at_least
+from .sources import InvestingSource
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ['goldstock', 'investing']
+INVESTING_CANDIDATES_FILE = Path("investing_candidates.csv")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl several sources concurrently through the shared fetch engine and page cache")
+    parser.add_argument('--sources', default=','.join(SOURCES),
+                        help=f'Comma-separated sources to crawl ({", ".join(SOURCES)})')
+    parser.add_argument('--max-id', type=int, default=1500, help='Maximum goldstock ID to fetch')
+    parser.add_argument('--limit', type=int, help='Only build investing.com candidates for the first N companies')
+    parser.add_argument('--workers', action='append', default=[], metavar='SOURCE=N',
+                        help='Fetch workers for one source (repeatable); defaults come from the source')
+    parser.add_argument('--min-interval', action='append', default=[], metavar='SOURCE=SECONDS',
+                        help='Minimum spacing between requests to one source\'s host (repeatable)')
+    parser.add_argument('--max-retries', type=int_at_least(0), default=3, help='Retries per request on errors, 429 and 5xx')
+    parser.add_argument('--breaker-cooldown', type=float, default=60,
+                        help='Seconds a host\'s workers pause when its error rate trips the circuit breaker')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.sources.split(',') if name.strip()]
+    unknown = set(names) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    # The goldstock parser, page cache and company list are mapping_script2's
+    from . import mapping_script2 as pipeline
+
+    pipeline.setup_logging()
+    stop = threading.Event()
+
+    def request_stop(sig, frame):
+        logger.info("Received Ctrl+C. Finishing the requests in flight and saving the cache...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+
+    matcher = pipeline.CompanyMatcher()
+    scraper = pipeline.GoldstockScraper(matcher)
+    engine = scraper.engine
+    engine.fetcher = RetryingFetcher(RetryPolicy(max_attempts=args.max_retries + 1),
+                                     breaker_cooldown=args.breaker_cooldown)
+    engine.should_stop = stop.is_set
+
+    sources = []
+    if 'goldstock' in names:
+        scraper.source.max_id = args.max_id
+        sources.append(scraper.source)
+    investing = None
+    if 'investing' in names:
+        investing = InvestingSource(pipeline.load_companies(limit=args.limit))
+        sources.append(investing)
+
+    by_name = {source.name: source for source in sources}
+    for option, attribute, kind in [(args.workers, 'workers', int), (args.min_interval, 'min_interval', float)]:
+        for value in option:
+            name, _, setting = value.partition('=')
+            if name not in by_name or not setting:
+                parser.error(f"expected SOURCE=VALUE with one of {', '.join(by_name)}, got {value!r}")
+            setattr(by_name[name], attribute, kind(setting))
+
+    logger.info("Crawling " + ", ".join(f"{s.name} ({s.workers} workers, {s.min_interval}s spacing)" for s in sources))
+    started = time.perf_counter()
+    results = engine.crawl_all(sources)
+    matcher.save_cache()
+    logger.info(f"All sources finished in {time.perf_counter() - started:.1f}s; "
+                f"request stats: {engine.fetcher.summary()}")
+    if engine.errors:
+        logger.info(f"{len(engine.errors)} pages failed with request errors and were not cached")
+
+    if investing is not None:
+        rows = investing.candidates(results.get(investing.name, []))
+        with open(INVESTING_CANDIDATES_FILE, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['company_id', 'company_name', 'url', 'page_name', 'similarity'])
+            writer.writeheader()
+            writer.writerows(rows)
+        logger.info(f"Wrote {len(rows)} investing.com candidates to {INVESTING_CANDIDATES_FILE}")
+
+if __name__ == "__main__":
+    main()
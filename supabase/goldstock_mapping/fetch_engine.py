@@ -0,0 +1,180 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import stage_profiler
+from .fetch_window import bounded_map
+from .retry_policy import RetryingFetcher
+
+if TYPE_CHECKING:
+    from .sources import SourceAdapter
+
+logger = logging.getLogger(__name__)
+
+class HostLimiter:
+    """Spaces requests to one host at least min_interval seconds apart across all threads"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        # Sleep outside the lock; each caller already holds its own slot
+        if slot > now:
+            time.sleep(slot - now)
+
+class FetchEngine:
+    """Fetches, parses and caches pages for any SourceAdapter.
+
+    Every source shares one HTTP session (with its connection pool and any
+    mounted cassette), one RetryingFetcher (retries, backoff and a circuit
+    breaker per host) and one page cache, whose keys are namespaced by the
+    source. Politeness is per host: each host gets a HostLimiter built from
+    the first source that uses it. `store` is anything with session, cache
+    negatives and save_cache() (CompanyMatcher); pages with nothing to
+    fetch are remembered in `negatives` rather than in the cache.
+    """
+
+    def __init__(self, store, fetcher: Optional[RetryingFetcher] = None,
+                 should_stop: Callable[[], bool] = lambda: False):
+        self.store = store
+        self.fetcher = fetcher or RetryingFetcher()
+        self.should_stop = should_stop
+        # Last error per cache key whose fetch failed
+        self.errors: Dict[str, str] = {}
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+        self._remembered = 0
+
+    def limiter(self, source: 'SourceAdapter') -> HostLimiter:
+        with self._lock:
+            if source.host not in self._limiters:
+                self._limiters[source.host] = HostLimiter(source.min_interval)
+            return self._limiters[source.host]
+
+    def known(self, cache_key: str) -> bool:
+        """Whether the page was fetched before, with a record or with nothing to fetch"""
+        return cache_key in self.store.cache or cache_key in self.store.negatives
+
+    def store_record(self, cache_key: str, record: Optional[Dict]):
+        if record is None:
+            self.store.negatives.add(cache_key)
+        else:
+            self.store.cache[cache_key] = record
+
+    def _remember(self, cache_key: str, record: Optional[Dict]):
+        self.store_record(cache_key, record)
+        with self._lock:
+            self._remembered += 1
+            save = self._remembered % 50 == 0
+        if save:
+            self.store.save_cache()
+
+    def fetch(self, source: 'SourceAdapter', key) -> Optional[Dict]:
+        """The parsed record for one page, or None if it is missing, has nothing usable or failed.
+
+        404s and unusable pages go into the negative IDs; request errors are
+        not remembered and leave their message in self.errors instead.
+        """
+        cache_key = source.cache_key(key)
+        if cache_key in self.store.cache:
+            return self.store.cache[cache_key]
+        if cache_key in self.store.negatives:
+            return None
+
+        import requests
+
+        label = f"{source.name} {key}"
+        try:
+            if source.request_delay[1] > 0:
+                time.sleep(random.uniform(*source.request_delay))
+            if self.should_stop():
+                return None
+            self.limiter(source).acquire()
+            response = self.fetcher.get(self.store.session, source.url(key), should_stop=self.should_stop, timeout=15)
+            if response is None:
+                # Stopped while waiting out a backoff or an open breaker; nothing to remember
+                return None
+
+            if response.status_code == 404:
+                logger.debug(f"{label}: 404 Not Found")
+                self._remember(cache_key, None)
+                return None
+
+            response.raise_for_status()
+            with stage_profiler.section('parse'):
+                record = source.parse(key, response.text)
+
+            self._remember(cache_key, record)
+            if record is None:
+                logger.debug(f"{label}: nothing usable on the page")
+            else:
+                logger.info(f"{label}: Found {source.describe(record)}")
+            return record
+
+        except requests.RequestException as e:
+            logger.error(f"{label}: Request failed - {e}")
+            self.errors[cache_key] = str(e)
+            return None
+        except Exception as e:
+            logger.error(f"{label}: Unexpected error - {e}")
+            self.errors[cache_key] = str(e)
+            return None
+
+    def crawl(self, source: 'SourceAdapter', keys: Optional[Iterable] = None, workers: Optional[int] = None,
+              window_factor: int = 4) -> List[Tuple[object, Dict]]:
+        """Fetch every key of one source (default: its whole key space); returns (key, record) pairs found"""
+        workers = workers or source.workers
+        negatives = self.store.negatives
+        # Keys known to have nothing to fetch are never scheduled
+        keys = (key for key in (source.keys() if keys is None else keys)
+                if source.cache_key(key) not in negatives)
+        found = []
+        executor = ThreadPoolExecutor(max_workers=workers, initializer=stage_profiler.thread_initializer,
+                                      thread_name_prefix=source.name)
+        try:
+            for key, future in bounded_map(executor, lambda k: self.fetch(source, k), keys,
+                                           workers * window_factor, should_stop=self.should_stop):
+                record = future.result()
+                if record:
+                    found.append((key, record))
+                    if len(found) % 50 == 0:
+                        logger.info(f"{source.name}: {len(found)} pages found so far...")
+        finally:
+            # After a stop only the requests already running are left; don't block on them
+            executor.shutdown(wait=not self.should_stop(), cancel_futures=True)
+        return found
+
+    def crawl_all(self, sources: List['SourceAdapter'], window_factor: int = 4) -> Dict[str, List[Tuple[object, Dict]]]:
+        """Crawl several sources at once, each with its own workers so a slow host cannot starve the others"""
+        results: Dict[str, List[Tuple[object, Dict]]] = {}
+
+        def run(source):
+            started = time.perf_counter()
+            try:
+                results[source.name] = self.crawl(source, window_factor=window_factor)
+            except Exception as e:
+                logger.error(f"{source.name}: crawl aborted - {e}")
+                results[source.name] = []
+            logger.info(f"{source.name}: {len(results[source.name])} pages found in "
+                        f"{time.perf_counter() - started:.1f}s")
+
+        threads = [threading.Thread(target=run, args=(source,), name=f"crawl-{source.name}", daemon=True)
+                   for source in sources]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            # Joined with a timeout so Ctrl+C still reaches the main thread
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        return results
@@ -0,0 +1,53 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+_EXHAUSTED = object()
+
+def bounded_map(executor: Executor, fn: Callable[[Any], Any], items: Iterable, window: int,
+                ordered: bool = False, should_stop: Optional[Callable[[], bool]] = None,
+                poll_interval: float = 0.5) -> Iterator[Tuple[Any, Future]]:
+    """Run fn over items with at most `window` futures in flight, refilling as they finish.
+
+    Yields (item, future) pairs as the futures complete, or in input order
+    with ordered=True (a slow head then holds back the ones behind it).
+    Items are drawn lazily, so memory and the cost of cancelling stay
+    proportional to the window rather than the ID range. should_stop is
+    polled at least every poll_interval seconds; once it returns True the
+    queued futures are cancelled and only the tasks already running finish.
+    """
+    items = iter(items)
+    in_order = deque()
+    unordered = {}
+
+    def fill():
+        while len(in_order) + len(unordered) < window:
+            item = next(items, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                return
+            future = executor.submit(fn, item)
+            if ordered:
+                in_order.append((item, future))
+            else:
+                unordered[future] = item
+
+    try:
+        fill()
+        while in_order or unordered:
+            if should_stop and should_stop():
+                return
+            if ordered:
+                item, future = in_order[0]
+                if not wait([future], timeout=poll_interval).done:
+                    continue
+                in_order.popleft()
+                fill()
+                yield item, future
+            else:
+                done = wait(unordered, timeout=poll_interval, return_when=FIRST_COMPLETED).done
+                finished = [(unordered.pop(future), future) for future in done]
+                fill()
+                yield from finished
+    finally:
+        for future in [future for _, future in in_order] + list(unordered):
+            future.cancel()
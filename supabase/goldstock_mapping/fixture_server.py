@@ -0,0 +1,245 @@
+import argparse
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# What a generated company page holds
+COMPANY = 'company'
+NOT_FOUND = 'not_found'
+NAMELESS = 'nameless'
+
+COMPANY_PATH = re.compile(r'^/company/(\d+)-?$')
+
+@dataclass
+class FixtureProfile:
+    """How the stand-in site behaves.
+
+    Page outcomes are fixed per ID by the seed, so the harness knows which
+    IDs should come back as companies. Bursts are periods on the server's
+    clock (burst_length seconds out of every burst_every) during which every
+    request gets burst_status; error_ratio adds random 5xx outside bursts.
+    """
+    latency: str = 'lognormal'      # fixed, uniform or lognormal
+    latency_ms: float = 80          # fixed value, uniform mean or lognormal median
+    latency_spread: float = 0.6     # +/- fraction for uniform, sigma for lognormal
+    not_found_ratio: float = 0.15
+    nameless_ratio: float = 0.02
+    error_ratio: float = 0.0
+    burst_status: int = 429
+    burst_every: float = 0          # 0 disables bursts
+    burst_length: float = 2
+    retry_after: int = 1
+    page_kb: float = 40
+    seed: int = 0
+
+    def outcome(self, goldstock_id: int) -> str:
+        roll = random.Random(f"{self.seed}:{goldstock_id}").random()
+        if roll < self.not_found_ratio:
+            return NOT_FOUND
+        if roll < self.not_found_ratio + self.nameless_ratio:
+            return NAMELESS
+        return COMPANY
+
+    def company_name(self, goldstock_id: int) -> str:
+        return f"Fixture Gold Mines {goldstock_id} Inc"
+
+    def ticker(self, goldstock_id: int) -> str:
+        return f"FX{goldstock_id}"
+
+    def delay(self, rng: random.Random) -> float:
+        if self.latency == 'fixed':
+            ms = self.latency_ms
+        elif self.latency == 'uniform':
+            ms = rng.uniform(self.latency_ms * (1 - self.latency_spread), self.latency_ms * (1 + self.latency_spread))
+        elif self.latency == 'lognormal':
+            ms = self.latency_ms * rng.lognormvariate(0, self.latency_spread)
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.latency}")
+        return max(ms, 0) / 1000
+
+def render_page(profile: FixtureProfile, goldstock_id: int, nameless: bool = False) -> bytes:
+    """A company page shaped like the real ones, padded out to page_kb.
+
+    Elements go on lines of their own as in the real markup: the scrapers
+    read the ticker from the page's text, where adjacent tags would run
+    the symbol into the following paragraph.
+    """
+    if nameless:
+        head = "<html><head></head><body>\n<div class=\"content\">\n"
+    else:
+        name = profile.company_name(goldstock_id)
+        head = (f"<html><head><title>{name} | Goldstock Data</title></head><body>\n"
+                f"<h1 class=\"company-name\">{name}</h1>\n"
+                f"<div class=\"content\">\n<p>Symbol: TSXV:{profile.ticker(goldstock_id)}</p>\n")
+    filler = "<p>Exploration update: drilling continued across the property during the quarter.</p>\n"
+    tail = "</div></body></html>"
+    repeats = max(0, int(profile.page_kb * 1024 - len(head) - len(tail)) // len(filler))
+    return (head + filler * repeats + tail).encode('utf-8')
+
+class FixtureServer:
+    """Local stand-in for goldstockdata.com serving generated company pages.
+
+    Runs a ThreadingHTTPServer on a background thread; use it as a context
+    manager or call start()/stop(). `url` is the base URL to give the
+    scraper, and status_counts() tallies the responses served so far.
+    """
+
+    def __init__(self, profile: Optional[FixtureProfile] = None, host: str = '127.0.0.1', port: int = 0):
+        self.profile = profile or FixtureProfile()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.profile.seed)
+        self._pages: Dict[int, bytes] = {}
+        self._started = time.monotonic()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as requests.Session expects from the real site
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body, headers = server.respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def in_burst(self) -> bool:
+        if not self.profile.burst_every:
+            return False
+        return (time.monotonic() - self._started) % self.profile.burst_every < self.profile.burst_length
+
+    def respond(self, path: str):
+        """(status, body, extra headers) for one request, after the simulated latency"""
+        profile = self.profile
+        with self._lock:
+            delay = profile.delay(self._rng)
+            error_roll = self._rng.random()
+        time.sleep(delay)
+
+        headers = {}
+        match = COMPANY_PATH.match(path)
+        if self.in_burst():
+            status, body = profile.burst_status, b"Slow down"
+            if status == 429:
+                headers['Retry-After'] = str(profile.retry_after)
+        elif error_roll < profile.error_ratio:
+            status, body = 503, b"Service unavailable"
+        elif not match or profile.outcome(int(match.group(1))) == NOT_FOUND:
+            status, body = 404, b"Not found"
+        else:
+            gid = int(match.group(1))
+            with self._lock:
+                body = self._pages.get(gid)
+            if body is None:
+                body = render_page(profile, gid, nameless=profile.outcome(gid) == NAMELESS)
+                with self._lock:
+                    # Keep memory flat on long soaks; pages are cheap to regenerate
+                    if len(self._pages) < 10000:
+                        self._pages[gid] = body
+            status = 200
+
+        with self._lock:
+            self._counts[status] += 1
+        return status, body, headers
+
+    def status_counts(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def start(self) -> 'FixtureServer':
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'FixtureServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    defaults = FixtureProfile()
+    group = parser.add_argument_group('fixture site')
+    group.add_argument('--latency', choices=['fixed', 'uniform', 'lognormal'], default=defaults.latency,
+                       help='Latency distribution of the fixture server')
+    group.add_argument('--latency-ms', type=float, default=defaults.latency_ms,
+                       help='Fixed latency, uniform mean or lognormal median in milliseconds')
+    group.add_argument('--latency-spread', type=float, default=defaults.latency_spread,
+                       help='Uniform +/- fraction or lognormal sigma')
+    group.add_argument('--not-found-ratio', type=float, default=defaults.not_found_ratio,
+                       help='Share of IDs that are 404')
+    group.add_argument('--nameless-ratio', type=float, default=defaults.nameless_ratio,
+                       help='Share of IDs whose page has no company name')
+    group.add_argument('--error-ratio', type=float, default=defaults.error_ratio,
+                       help='Share of requests answered with a random 503')
+    group.add_argument('--burst-status', type=int, default=defaults.burst_status,
+                       help='Status served during bursts (429 sends Retry-After)')
+    group.add_argument('--burst-every', type=float, default=defaults.burst_every,
+                       help='Seconds between the starts of error bursts (0 = no bursts)')
+    group.add_argument('--burst-length', type=float, default=defaults.burst_length,
+                       help='Seconds each burst lasts')
+    group.add_argument('--retry-after', type=int, default=defaults.retry_after,
+                       help='Retry-After seconds sent with burst 429s')
+    group.add_argument('--page-kb', type=float, default=defaults.page_kb,
+                       help='Size of each company page in KB')
+    group.add_argument('--seed', type=int, default=defaults.seed,
+                       help='Seed for page outcomes and latency draws')
+
+def profile_from_args(args: argparse.Namespace) -> FixtureProfile:
+    return FixtureProfile(
+        latency=args.latency, latency_ms=args.latency_ms, latency_spread=args.latency_spread,
+        not_found_ratio=args.not_found_ratio, nameless_ratio=args.nameless_ratio,
+        error_ratio=args.error_ratio, burst_status=args.burst_status, burst_every=args.burst_every,
+        burst_length=args.burst_length, retry_after=args.retry_after, page_kb=args.page_kb, seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve generated goldstock company pages locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    server = FixtureServer(profile_from_args(args), args.host, args.port)
+    print(f"Serving fixture pages at {server.url}/company/<id>- (Ctrl+C to stop)")
+    with server:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"Responses served: {server.status_counts()}")
+
+if __name__ == "__main__":
+    main()
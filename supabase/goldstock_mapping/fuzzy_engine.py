@@ -0,0 +1,371 @@
+import argparse
+import csv
+import heapq
+import importlib
+import math
+import re
+import time
+from operator import itemgetter
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import serialization
+from .match_candidates import top_fuzzy
+
+FUZZYWUZZY = 'fuzzywuzzy'
+RAPIDFUZZ = 'rapidfuzz'
+ENGINES = [FUZZYWUZZY, RAPIDFUZZ]
+
+# Scores of the rapidfuzz engine: fuzzywuzzy's exactly, or its own Indel ratio
+COMPAT = 'compat'
+NATIVE = 'native'
+SCORES = [COMPAT, NATIVE]
+
+# fuzzywuzzy's full_process: letters and digits kept, the rest to spaces, lower case, trimmed;
+# force_ascii drops chr(128)-chr(255) first
+_NON_WORD = re.compile(r'(?ui)\W')
+_LATIN1 = {i: None for i in range(128, 256)}
+
+def _full_process(s: str, force_ascii: bool = False) -> str:
+    if force_ascii:
+        s = s.translate(_LATIN1)
+    return _NON_WORD.sub(' ', s).lower().strip()
+
+def _sorted_tokens(s: str) -> str:
+    return ' '.join(sorted(s.split())).strip()
+
+def token_sort_query(query: str) -> str:
+    """The string token_sort_ratio compares for a query, processed as process.extract* does it"""
+    return _sorted_tokens(_full_process(_full_process(query), force_ascii=True))
+
+def token_sort_choice(choice: str) -> str:
+    return _sorted_tokens(_full_process(choice, force_ascii=True))
+
+class LengthBuckets:
+    """Token-sorted choices grouped by (characters other than spaces, spaces), with a score bound per group.
+
+    A common subsequence of two token-sorted strings pairs at most
+    min(c1, c2) of their other characters and min(s1, s2) of their
+    spaces, so no choice in a group can score above
+    200 * (min(c1, c2) + min(s1, s2)) / (c1 + s1 + c2 + s2) against a
+    query, whatever its characters. That holds for difflib's matching
+    blocks and for Indel alike, so a whole group can be skipped unscored
+    once its bound is below the cutoff or the k-th best score so far.
+    """
+
+    def __init__(self, processed: List[str]):
+        groups = {}
+        for idx, choice in enumerate(processed):
+            spaces = choice.count(' ')
+            groups.setdefault((len(choice) - spaces, spaces), []).append(idx)
+        self.groups = list(groups.items())
+
+    def ordered(self, query: str) -> List[Tuple[int, List[int]]]:
+        """(score bound, choice indices) of every group, highest bound first"""
+        spaces = query.count(' ')
+        chars = len(query) - spaces
+        bounded = []
+        for (group_chars, group_spaces), members in self.groups:
+            total = chars + spaces + group_chars + group_spaces
+            common = min(chars, group_chars) + min(spaces, group_spaces)
+            # The ceiling, in integers: a rounded score never lands above it
+            bounded.append((-(-200 * common // total) if total else 100, members))
+        bounded.sort(key=itemgetter(0), reverse=True)
+        return bounded
+
+class PreparedChoices:
+    """A choice list processed for token_sort_ratio once, reused for as long as the same list is matched against"""
+
+    def __init__(self, choices: List[str]):
+        self.choices = choices
+        self.processed = [token_sort_choice(choice) for choice in choices]
+        self.buckets = LengthBuckets(self.processed)
+        self.lengths = None
+
+    def current_for(self, choices: List[str]) -> bool:
+        return self.choices is choices and len(self.processed) == len(choices)
+
+def _push(best: list, item: Tuple[int, int], k: int):
+    """Keep the k best (score, -index) items in a min-heap whose head is the k-th best"""
+    if len(best) < k:
+        heapq.heappush(best, item)
+    elif item > best[0]:
+        heapq.heapreplace(best, item)
+
+def _ranked(best: list) -> List[Tuple[int, int]]:
+    return [(-neg_idx, score) for score, neg_idx in sorted(best, reverse=True)]
+
+def available(engine: str) -> bool:
+    if engine == FUZZYWUZZY:
+        return True
+    try:
+        __import__(engine)
+        return True
+    except ImportError:
+        return False
+
+def default_engine() -> str:
+    """rapidfuzz when it is installed (its compat scores are fuzzywuzzy's), else fuzzywuzzy"""
+    return RAPIDFUZZ if available(RAPIDFUZZ) else FUZZYWUZZY
+
+class _Engine:
+    def __init__(self):
+        self._prepared: Optional[PreparedChoices] = None
+
+    def _prepare(self, choices: List[str]) -> PreparedChoices:
+        prepared = self._prepared
+        if prepared is None or not prepared.current_for(choices):
+            # One assignment, so a thread scoring against the old list is never handed a mix
+            prepared = self._prepared = PreparedChoices(choices)
+        return prepared
+
+class FuzzywuzzyEngine(_Engine):
+    """token_sort_ratio computed by fuzzywuzzy, as the scripts always scored.
+
+    With prune, choices are processed the way process.extract processes
+    them and scored a length group at a time (LengthBuckets), best bound
+    first, so groups that can't reach the cutoff or the k-th best score
+    are never compared. Without it every choice goes through
+    process.extract.
+    """
+
+    name = FUZZYWUZZY
+    scores = COMPAT
+    fingerprint_tag = ''
+
+    def __init__(self, prune: bool = True):
+        super().__init__()
+        self.prune = prune
+        self.label = f"{FUZZYWUZZY}/pruned" if prune else FUZZYWUZZY
+        self.scored = 0
+        self.skipped = 0
+
+    def top(self, query: str, choices: List[str], k: int, score_cutoff: int = 0) -> List[Tuple[int, int]]:
+        """(choice index, score) of the k best choices, best first, equal scores in choice order.
+
+        Choices scoring below score_cutoff may be left out.
+        """
+        from fuzzywuzzy import fuzz
+
+        if not self.prune:
+            return top_fuzzy(query, choices, k, fuzz.token_sort_ratio)
+        if not choices:
+            return []
+        k = max(k, 1)
+        prepared = self._prepare(choices)
+        query = token_sort_query(query)
+        best = []
+        scored = 0
+        for bound, members in prepared.buckets.ordered(query):
+            # An equal bound could still tie the k-th best with an earlier index, so only < stops
+            if bound < score_cutoff or (len(best) == k and bound < best[0][0]):
+                break
+            for idx in members:
+                _push(best, (fuzz.ratio(query, prepared.processed[idx]), -idx), k)
+            scored += len(members)
+        self.scored += scored
+        self.skipped += len(choices) - scored
+        return _ranked(best)
+
+class RapidfuzzEngine(_Engine):
+    """token_sort_ratio with the bulk of the scoring in rapidfuzz's C++ code.
+
+    The Indel distance of every choice comes from one rapidfuzz call;
+    with numpy installed that is process.cdist, which releases the GIL
+    (threads of the matching service keep running) and can spread one
+    query over several cores. An Indel ratio is never below the ratio
+    fuzzywuzzy reports (difflib's matching blocks are one common
+    subsequence, Indel counts the longest), so in compat mode it is an
+    upper bound: choices are rescored with fuzzywuzzy in bound order
+    until no remaining bound can reach the k-th best score, which gives
+    fuzzywuzzy's scores and picks exactly. Native mode returns the
+    rounded Indel ratios as they are, which is what fuzzywuzzy reports
+    with python-Levenshtein installed and can be a few points above the
+    pure-Python difflib scores.
+    """
+
+    name = RAPIDFUZZ
+
+    def __init__(self, scores: str = COMPAT, workers: int = 1):
+        if scores not in SCORES:
+            raise ValueError(f"Unknown scores: {scores}")
+        super().__init__()
+        self.scores = scores
+        self.workers = workers
+        self.label = f"{RAPIDFUZZ}/{scores}"
+        self.fingerprint_tag = '' if scores == COMPAT else f"+{RAPIDFUZZ}-{NATIVE}"
+        self.rescored = 0
+        self._numpy = available('numpy')
+
+    def _prepare(self, choices: List[str]) -> PreparedChoices:
+        prepared = super()._prepare(choices)
+        if prepared.lengths is None:
+            lengths = [len(choice) for choice in prepared.processed]
+            if self._numpy:
+                import numpy
+                lengths = numpy.array(lengths, dtype=numpy.float64)
+            prepared.lengths = lengths
+        return prepared
+
+    def _ratios(self, query: str, processed: List[str], lengths):
+        """100 * Indel ratio of every choice, as floats (a numpy array when numpy is installed)"""
+        from rapidfuzz.distance import Indel
+        if self._numpy:
+            from rapidfuzz.process import cdist
+            distances = cdist([query], processed, scorer=Indel.distance, workers=self.workers)[0]
+            total = lengths + len(query)
+            # Same operations, in the same order, as 100 * Levenshtein.ratio()
+            return 100 * ((total - distances) / total)
+        from rapidfuzz.process import extract
+        distances = [0] * len(processed)
+        for _, distance, idx in extract(query, processed, scorer=Indel.distance, limit=None):
+            distances[idx] = distance
+        return [100 * ((length + len(query) - distance) / (length + len(query)))
+                for length, distance in zip(lengths, distances)]
+
+    def top(self, query: str, choices: List[str], k: int, score_cutoff: int = 0) -> List[Tuple[int, int]]:
+        """(choice index, score) of the k best choices, best first, equal scores in choice order.
+
+        Choices scoring below score_cutoff may be left out.
+        """
+        if not choices:
+            return []
+        k = max(k, 1)
+        prepared = self._prepare(choices)
+        processed, lengths = prepared.processed, prepared.lengths
+        query = token_sort_query(query)
+        if not query:
+            # fuzzywuzzy scores equal strings 100 before it checks for empty ones
+            scores = [100 if not choice else 0 for choice in processed]
+            return heapq.nlargest(k, enumerate(scores), key=itemgetter(1))
+        ratios = self._ratios(query, processed, lengths)
+        if self.scores == NATIVE:
+            if self._numpy:
+                import numpy
+                scores = numpy.rint(ratios).astype(int)
+                order = numpy.argsort(-scores, kind='stable')[:k]
+                return [(int(idx), int(scores[idx])) for idx in order]
+            return heapq.nlargest(k, enumerate(int(round(ratio)) for ratio in ratios), key=itemgetter(1))
+        return self._rescored_top(query, processed, ratios, k, score_cutoff)
+
+    def _rescored_top(self, query: str, processed: List[str], ratios, k: int,
+                      score_cutoff: int) -> List[Tuple[int, int]]:
+        from fuzzywuzzy import fuzz
+
+        if self._numpy:
+            import numpy
+            bounds = numpy.ceil(ratios)
+            order = numpy.argsort(-bounds, kind='stable').tolist()
+            bounds = bounds.tolist()
+        else:
+            bounds = [math.ceil(ratio) for ratio in ratios]
+            order = sorted(range(len(bounds)), key=lambda idx: -bounds[idx])
+        best = []
+        for idx in order:
+            # An equal bound could still tie the k-th best with an earlier index, so only < stops
+            if bounds[idx] < score_cutoff or (len(best) == k and bounds[idx] < best[0][0]):
+                break
+            _push(best, (fuzz.ratio(query, processed[idx]), -idx), k)
+            self.rescored += 1
+        return _ranked(best)
+
+def create(engine: Optional[str] = None, scores: str = COMPAT, workers: int = 1):
+    engine = engine or default_engine()
+    if engine == FUZZYWUZZY:
+        return FuzzywuzzyEngine()
+    if engine == RAPIDFUZZ:
+        return RapidfuzzEngine(scores, workers)
+    raise ValueError(f"Unknown fuzzy engine: {engine}")
+
+# The engine match_company scores with; set once by main() before any matching (forked workers inherit it)
+_engine = None
+
+def configure(engine: Optional[str] = None, scores: str = COMPAT, workers: int = 1):
+    global _engine
+    _engine = create(engine, scores, workers)
+    return _engine
+
+def current():
+    if _engine is None:
+        configure()
+    return _engine
+
+def differential(names: List[str], choices: List[str], engines: List, reference, k: int,
+                 score_cutoff: int = 0) -> List[dict]:
+    """Per engine: queries whose top-k, best pick or score differs from the reference engine's, and timing.
+
+    With a score_cutoff only the candidates at or above it are compared,
+    as the engines may leave the rest out.
+    """
+    def kept(top):
+        return [item for item in top if item[1] >= score_cutoff]
+
+    started = time.perf_counter()
+    expected = [kept(reference.top(name, choices, k)) for name in names]
+    reference_s = time.perf_counter() - started
+    queries = max(len(names), 1)
+    results = []
+    for engine in engines:
+        work = getattr(engine, 'scored', 0) + getattr(engine, 'rescored', 0)
+        skipped = getattr(engine, 'skipped', 0)
+        started = time.perf_counter()
+        got = [kept(engine.top(name, choices, k, score_cutoff)) for name in names]
+        elapsed = time.perf_counter() - started
+        results.append({
+            'engine': engine.label,
+            'queries': len(names),
+            'top_k_differs': sum(a != b for a, b in zip(got, expected)),
+            'pick_differs': sum(a[:1] != b[:1] for a, b in zip(got, expected)),
+            'max_score_delta': max((abs(a[0][1] - b[0][1]) for a, b in zip(got, expected) if a and b), default=0),
+            'compared_per_query': round((getattr(engine, 'scored', 0) + getattr(engine, 'rescored', 0) - work)
+                                        / queries, 1),
+            'pruned': round((getattr(engine, 'skipped', 0) - skipped) / (queries * max(len(choices), 1)), 3),
+            'ms_per_query': round(elapsed * 1000 / queries, 3),
+            'speedup': round(reference_s / elapsed, 1) if elapsed else None,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the fuzzy scorer engines against fuzzywuzzy on a mappings CSV and time them")
+    parser.add_argument('--script', choices=['mapping_script', 'mapping_script2'], default='mapping_script2',
+                        help='Whose name normalization to apply')
+    parser.add_argument('--mappings', type=Path, default=Path('company_mappings.csv'),
+                        help='company_name column: the queries; goldstock_name column: the choices when '
+                             'there is no page cache')
+    parser.add_argument('--cache', type=Path, help="Page cache to take the choices from (default: the script's)")
+    parser.add_argument('--top-k', type=int, default=5, help='Candidates compared per query')
+    parser.add_argument('--score-cutoff', type=int, default=0,
+                        help="Score below which candidates don't matter (the scripts' match threshold "
+                             "when they keep no review candidates)")
+    parser.add_argument('--workers', type=int, default=1, help='rapidfuzz cdist workers')
+    args = parser.parse_args()
+
+    script = importlib.import_module(f".{args.script}", __package__)
+    with open(args.mappings, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    cache = serialization.load(args.cache or script.CACHE_FILE, {})
+    names = [record['company_name'] for key, record in sorted(cache.items())
+             if key.startswith('goldstock_') and record]
+    source = 'page cache'
+    if not names:
+        names = sorted({row['goldstock_name'] for row in rows if row['goldstock_name']})
+        source = args.mappings
+    choices = [script.normalize_name(name) for name in names]
+    queries = [script.normalize_name(row['company_name']) for row in rows]
+    print(f"{len(queries)} queries against {len(choices)} choices from {source}, top {args.top_k}, "
+          f"cutoff {args.score_cutoff}; reference: every choice through fuzzywuzzy's process.extract")
+
+    engines = [FuzzywuzzyEngine(prune=True)]
+    if available(RAPIDFUZZ):
+        engines += [RapidfuzzEngine(scores, args.workers) for scores in SCORES]
+    else:
+        print("rapidfuzz is not installed; skipped")
+    print(f"{'engine':>18} {'top-k differs':>14} {'pick differs':>13} {'max delta':>10} "
+          f"{'compared/q':>11} {'pruned':>7} {'ms/query':>9} {'speedup':>8}")
+    for row in differential(queries, choices, engines, FuzzywuzzyEngine(prune=False), args.top_k, args.score_cutoff):
+        print(f"{row['engine']:>18} {row['top_k_differs']:>14} {row['pick_differs']:>13} {row['max_score_delta']:>10} "
+              f"{row['compared_per_query']:>11} {row['pruned']:>7.1%} {row['ms_per_query']:>9} {row['speedup']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import re
+from typing import Callable, List, Optional
+
+# Every name a page or a company list uses for an exchange -> the one it is indexed under
+EXCHANGES = {
+    'TSX': 'TSX', 'TSE': 'TSX',
+    'TSXV': 'TSXV', 'TSX-V': 'TSXV', 'CVE': 'TSXV', 'NEX': 'TSXV',
+    'CSE': 'CSE', 'CNSX': 'CSE',
+    'NEO': 'NEO',
+    'NYSE': 'NYSE', 'NYSE AMERICAN': 'NYSEAMERICAN', 'NYSEAMERICAN': 'NYSEAMERICAN', 'AMEX': 'NYSEAMERICAN',
+    'NASDAQ': 'NASDAQ',
+    'OTC': 'OTC', 'OTCQX': 'OTC', 'OTCQB': 'OTC', 'PINK': 'OTC',
+    'ASX': 'ASX', 'LSE': 'LSE', 'AIM': 'LSE', 'FSE': 'FSE', 'FRA': 'FSE',
+}
+
+# Where the companies being matched are listed: a bare symbol only falls back to listings here,
+# so an OTC, NYSE or Frankfurt symbol that happens to equal a Canadian one matches nothing
+HOME_EXCHANGES = frozenset({'TSX', 'TSXV', 'CSE', 'NEO'})
+
+# Yahoo-style suffixes on tsx_code (ABC.V, ABC.TO, ...)
+SUFFIX_EXCHANGES = {'TO': 'TSX', 'T': 'TSX', 'V': 'TSXV', 'VN': 'TSXV', 'H': 'TSXV', 'CN': 'CSE', 'NE': 'NEO'}
+
+_EXCHANGE_NAMES = '|'.join(sorted((re.escape(name).replace(r'\ ', r'\s+') for name in EXCHANGES),
+                                  key=len, reverse=True))
+# "TSXV:ABC", "OTCQX: ABCDF", "NYSE American:XYZ"
+# (symbols are upper case, which keeps prose like "Our aim: To ..." out)
+PREFIXED = re.compile(rf'(?<![A-Za-z])((?i:{_EXCHANGE_NAMES}))\s*:\s*([A-Z0-9][A-Z0-9.\-]{{0,9}})(?![a-z])')
+# "ABC.V", "XYZ.TO" written out in the page text
+SUFFIXED = re.compile(r'\b([A-Z0-9]{1,6})\.(TO|V|CN|NE)\b')
+
+def canonical_exchange(name: Optional[str]) -> str:
+    """The indexed name of an exchange, '' when unknown"""
+    if not name:
+        return ''
+    return EXCHANGES.get(re.sub(r'\s+', ' ', name.strip().upper()), '')
+
+def exchange_of(code: Optional[str]) -> str:
+    """The exchange a ticker code names by prefix (CVE:ABC) or suffix (ABC.V), '' when it names none"""
+    if not code:
+        return ''
+    code = code.strip().upper()
+    if ':' in code:
+        return canonical_exchange(code.split(':', 1)[0])
+    _, dot, suffix = code.rpartition('.')
+    return SUFFIX_EXCHANGES.get(suffix, '') if dot else ''
+
+def extract_listings(soup: 'BeautifulSoup') -> List[List[str]]:
+    """Every [exchange, symbol] listed on a company page, in page order, each once.
+
+    Cross-listed companies show their TSX/TSXV/CSE symbol next to OTC,
+    NYSE or Frankfurt ones; the scripts' single-ticker extraction keeps
+    whichever it finds first. Lists rather than tuples so records
+    round-trip through the JSON page cache unchanged.
+    """
+    # Separators between elements, so a table cell "Symbol" doesn't run into "TSXV:ABC"
+    text = soup.get_text(' ')
+    listings = []
+    seen = set()
+    found = [(m.start(), canonical_exchange(m.group(1)), m.group(2)) for m in PREFIXED.finditer(text)]
+    found += [(m.start(), SUFFIX_EXCHANGES[m.group(2)], m.group(1)) for m in SUFFIXED.finditer(text)]
+    for _, exchange, symbol in sorted(found):
+        symbol = symbol.upper().strip('.-')
+        if exchange and symbol and (exchange, symbol) not in seen:
+            seen.add((exchange, symbol))
+            listings.append([exchange, symbol])
+    return listings
+
+def listed_exchange(symbol: str, listings: List[List[str]], normalize_ticker: Callable[[str], str]) -> str:
+    """The exchange of the page listing a bare symbol was taken from, '' when no listing has it"""
+    normalized = normalize_ticker(symbol)
+    return next((exchange for exchange, listed in listings if normalize_ticker(listed) == normalized), '')
+
+def closest_named(companies: List, normalized_name: str, normalize_name: Callable[[str], str],
+                  scorer: Callable[[str, str], int]):
+    """The company of several sharing one listing whose name reads closest; the lowest ID on a tie"""
+    if len(companies) == 1:
+        return companies[0]
+    return max(companies, key=lambda gs: scorer(normalized_name, normalize_name(gs.company_name)))
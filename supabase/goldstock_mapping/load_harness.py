@@ -0,0 +1,214 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .crawl_frontier import CrawlFrontier
+from .fixture_server import COMPANY, FixtureProfile, FixtureServer, add_profile_arguments, profile_from_args
+from .memory_guard import current_rss_mb
+from .negative_ids import NegativeIds
+from .retry_policy import RetryPolicy, RetryingFetcher, int_at_least
+
+logger = logging.getLogger(__name__)
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for no samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def latency_summary(samples: List[float]) -> Dict:
+    ms = lambda v: None if v is None else round(v * 1000, 1)
+    return {
+        'count': len(samples),
+        'p50_ms': ms(percentile(samples, 50)),
+        'p95_ms': ms(percentile(samples, 95)),
+        'p99_ms': ms(percentile(samples, 99)),
+        'max_ms': ms(max(samples) if samples else None),
+    }
+
+class PoolDiscardCounter(logging.Filter):
+    """Counts (and swallows) urllib3's warnings about connections dropped from a full pool"""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if 'Connection pool is full' in record.getMessage():
+            self.count += 1
+            return False
+        return True
+
+def run_pass(script, base_url: str, profile: FixtureProfile, server: Optional[FixtureServer],
+             args: argparse.Namespace, workers: int, pass_no: int, pool_discards: PoolDiscardCounter) -> Dict:
+    """One crawl of IDs 1..args.ids against the fixture site with a fresh cache and frontier, run in an empty cwd.
+
+    server is the in-process FixtureServer whose response counts are
+    reported, or None when driving one started elsewhere.
+    """
+    script.interrupted = False
+    matcher = script.CompanyMatcher()
+    matcher.cache = {}
+    matcher.negatives = NegativeIds()
+    scraper = script.GoldstockScraper(matcher)
+    scraper.source.base_url = base_url
+    scraper.source.request_delay = (args.delay_min, args.delay_max)
+    scraper.window_factor = args.window_factor
+    scraper.engine.fetcher = RetryingFetcher(
+        RetryPolicy(max_attempts=args.max_attempts, base_delay=args.retry_base_delay, max_delay=args.retry_max_delay),
+        breaker_cooldown=args.breaker_cooldown
+    )
+
+    # Per-request latency as the client saw it (one sample per attempt, retries included)
+    request_latency: List[float] = []
+    matcher.session.hooks['response'].append(lambda r, *a, **kw: request_latency.append(r.elapsed.total_seconds()))
+
+    # Per-ID latency: politeness delay, retries and backoff, parsing
+    id_latency: List[float] = []
+    fetch = scraper.fetch_company_by_id
+
+    def timed_fetch(goldstock_id):
+        started = time.perf_counter()
+        try:
+            return fetch(goldstock_id)
+        finally:
+            id_latency.append(time.perf_counter() - started)
+
+    scraper.fetch_company_by_id = timed_fetch
+
+    served_before = server.status_counts() if server else {}
+    discards_before = pool_discards.count
+    frontier = CrawlFrontier(Path("crawl_frontier.db"))
+    started = time.perf_counter()
+    companies = scraper.fetch_companies_parallel(1, args.ids, workers, frontier)
+    elapsed = time.perf_counter() - started
+    served = server.status_counts() if server else {}
+
+    expected = {gid for gid in range(1, args.ids + 1) if profile.outcome(gid) == COMPANY}
+    fetched = {int(c.goldstock_id) for c in companies}
+    # A company remembered as dead would be skipped by every later run: the one error that must never happen
+    wrongly_cached = sorted(gid for gid in expected - fetched if f"goldstock_{gid}" in matcher.negatives)
+
+    return {
+        'pass': pass_no,
+        'workers': workers,
+        'ids': args.ids,
+        'elapsed_s': round(elapsed, 2),
+        'ids_per_s': round(args.ids / elapsed, 1),
+        'requests_per_s': round(len(request_latency) / elapsed, 1),
+        'request_latency': latency_summary(request_latency),
+        'id_latency': latency_summary(id_latency),
+        'served': {status: n - served_before.get(status, 0) for status, n in sorted(served.items())},
+        'fetcher': scraper.engine.fetcher.summary(),
+        # Connections closed because more workers than pooled connections were in flight
+        'pool_discards': pool_discards.count - discards_before,
+        'frontier': frontier.counts(),
+        'expected_companies': len(expected),
+        'fetched_companies': len(fetched),
+        'missing_companies': len(expected - fetched),
+        'wrongly_cached': wrongly_cached[:20],
+        'rss_mb': round(current_rss_mb() or 0, 1),
+    }
+
+def format_result(result: Dict) -> str:
+    req, per_id, fetcher = result['request_latency'], result['id_latency'], result['fetcher']
+    lines = [
+        f"pass {result['pass']}  workers={result['workers']}  {result['ids']} IDs in {result['elapsed_s']}s  "
+        f"({result['ids_per_s']} IDs/s, {result['requests_per_s']} req/s)  RSS {result['rss_mb']} MB",
+        f"  request latency  p50 {req['p50_ms']}  p95 {req['p95_ms']}  p99 {req['p99_ms']}  max {req['max_ms']} ms",
+        f"  per-ID latency   p50 {per_id['p50_ms']}  p95 {per_id['p95_ms']}  p99 {per_id['p99_ms']}  "
+        f"max {per_id['max_ms']} ms",
+        f"  served {result['served']}  retries {fetcher['retries']}  gave up {fetcher['gave_up']}  "
+        f"breaker trips {fetcher['breaker_trips']} ({fetcher['breaker_wait_seconds']} worker-s waiting)  "
+        f"pool discards {result['pool_discards']}",
+        f"  companies {result['fetched_companies']}/{result['expected_companies']}  "
+        f"missing {result['missing_companies']}  frontier {result['frontier']}",
+    ]
+    if result['wrongly_cached']:
+        lines.append(f"  WRONGLY CACHED AS MISSING: {result['wrongly_cached']}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the goldstock crawler against a local fixture server and report throughput, "
+                    "tail latency and error handling")
+    parser.add_argument('--script', choices=['mapping_script', 'mapping_script2'], default='mapping_script2',
+                        help='Which pipeline\'s scraper to drive')
+    parser.add_argument('--ids', type=int, default=2000, help='Crawl goldstock IDs 1..N per pass')
+    parser.add_argument('--workers', default='10',
+                        help='Fetch workers; a comma-separated list sweeps several settings')
+    parser.add_argument('--window-factor', type=int, default=4, help='IDs queued per fetch worker')
+    parser.add_argument('--delay-min', type=float, default=0.0, help='Politeness pause lower bound (s)')
+    parser.add_argument('--delay-max', type=float, default=0.0, help='Politeness pause upper bound (s)')
+    parser.add_argument('--max-attempts', type=int_at_least(1), default=RetryPolicy.max_attempts,
+                        help='Attempts per request')
+    parser.add_argument('--retry-base-delay', type=float, default=0.2, help='Backoff base delay (s)')
+    parser.add_argument('--retry-max-delay', type=float, default=5.0, help='Backoff ceiling (s)')
+    parser.add_argument('--breaker-cooldown', type=float, default=5.0, help='Circuit breaker cool-down (s)')
+    parser.add_argument('--duration', type=float, default=0,
+                        help='Soak: repeat passes for this many seconds, watching throughput and RSS drift')
+    parser.add_argument('--base-url', help='Drive an already running fixture server instead of starting one')
+    parser.add_argument('--json', metavar='FILE', help='Also write the per-pass results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show the crawler\'s own log output')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    script = importlib.import_module(f".{args.script}", __package__)
+    if not args.verbose:
+        # Every page, 404 and give-up is logged per ID (by the script and fetch_engine); the report summarises them
+        logging.getLogger(__package__).setLevel(logging.CRITICAL)
+        logger.setLevel(logging.INFO)
+    pool_discards = PoolDiscardCounter()
+    logging.getLogger('urllib3.connectionpool').addFilter(pool_discards)
+    workers_list = [int(w) for w in args.workers.split(',')]
+
+    # With --base-url the expected outcomes still come from the local profile, so pass the same options
+    profile = profile_from_args(args)
+    server = None if args.base_url else FixtureServer(profile).start()
+    base_url = args.base_url.rstrip('/') if args.base_url else server.url
+    json_path = Path(args.json).resolve() if args.json else None
+
+    results = []
+    # The scripts read and write their cache files relative to cwd; keep fixture pages out of the real ones.
+    # Each pass gets a directory of its own: the scripts merge in what other runs saved next to them
+    home = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='goldstock-load-') as workdir:
+        try:
+            deadline = time.monotonic() + args.duration
+            pass_no = 0
+            while True:
+                for workers in workers_list:
+                    pass_no += 1
+                    pass_dir = Path(workdir) / f"pass-{pass_no}"
+                    pass_dir.mkdir()
+                    os.chdir(pass_dir)
+                    result = run_pass(script, base_url, profile, server, args, workers, pass_no, pool_discards)
+                    results.append(result)
+                    print(format_result(result), flush=True)
+                if time.monotonic() >= deadline:
+                    break
+        except KeyboardInterrupt:
+            logger.info("Interrupted; reporting the passes completed so far")
+        finally:
+            os.chdir(home)
+            if server:
+                server.stop()
+
+    if len(results) > 1 and args.duration:
+        first, last = results[0], results[-1]
+        print(f"soak: {len(results)} passes, throughput {first['ids_per_s']} -> {last['ids_per_s']} IDs/s, "
+              f"RSS {first['rss_mb']} -> {last['rss_mb']} MB")
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import csv
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .match_cache import content_hash
+
+logger = logging.getLogger(__name__)
+
+# The CSV's columns, as upload-to-supabase.js reads them
+FIELDS = ['company_id', 'company_name', 'tsx_code', 'goldstock_id', 'goldstock_name',
+          'match_status', 'confidence_score', 'match_method']
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+def csv_row(mapping) -> Dict:
+    return {field: getattr(mapping, field) for field in FIELDS}
+
+def row_hashes(mappings: Iterable, previous: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """{company_id: hash of its CSV row}: what an export wrote, for the next one to diff against.
+
+    With previous (the last export's hashes) the rows are laid over it, for
+    a partial export that only rewrote some companies.
+    """
+    hashes = dict(previous or {})
+    hashes.update((str(m.company_id), content_hash(csv_row(m))) for m in mappings)
+    return hashes
+
+def save_delta(path: Path, mappings: Iterable, previous: Optional[Dict[str, str]], partial: bool = False) -> Counter:
+    """Add the rows that differ from the previous export to the pending delta file at path.
+
+    Rows new or changed since the export previous describes are written as
+    upserts and companies it had but this export lacks as deletes. A
+    partial export (a --limit run) only covers some companies, so it never
+    writes deletes. A delta the upload has not consumed yet is merged
+    into, the newer change of a company winning, so skipping an upload
+    loses nothing. Without a previous export every row is an upsert.
+    """
+    path = Path(path)
+    mappings = list(mappings)
+    hashes = row_hashes(mappings)
+    pending = {}
+    if path.exists():
+        with open(path, newline='', encoding='utf-8') as f:
+            pending = {row['company_id']: row for row in csv.DictReader(f)}
+    stats = Counter()
+    for mapping in mappings:
+        company_id = str(mapping.company_id)
+        if previous is None or previous.get(company_id) != hashes[company_id]:
+            pending[company_id] = dict(csv_row(mapping), change=UPSERT)
+            stats[UPSERT] += 1
+    gone = set() if partial else (previous or {}).keys() - hashes.keys()
+    for company_id in gone:
+        pending[company_id] = {'company_id': company_id, 'change': DELETE}
+        stats[DELETE] += 1
+
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS + ['change'])
+            writer.writeheader()
+            writer.writerows(pending.values())
+        logger.info(f"Export delta: {stats[UPSERT]} upserts, {stats[DELETE]} deletes; "
+                    f"{len(pending)} changes pending upload in {path}")
+    except Exception as e:
+        logger.error(f"Error saving export delta: {e}")
+    return stats
@@ -0,0 +1,1301 @@
+import json
+import csv
+import re
+import os
+from pathlib import Path
+import time
+import argparse
+import signal
+import socket
+import sys
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+import logging
+from dataclasses import dataclass, asdict, replace
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import atexit
+import gc
+import math
+import multiprocessing
+
+from . import fuzzy_engine, match_stream, serialization, stage_profiler
+from .cassette import RECORD, RECORDED_LATENCY, REPLAY, ZERO_LATENCY, Cassette
+from .checkpoint_store import CheckpointStore
+from .crawl_frontier import CrawlFrontier
+from .crawl_leases import LeaseQueue, LeaseHeartbeat
+from .crawl_snapshots import DeltaFilter, SnapshotStore
+from .fetch_engine import FetchEngine
+from .fetch_window import bounded_map
+from .listings import HOME_EXCHANGES, canonical_exchange, closest_named, exchange_of, extract_listings, listed_exchange
+from .mapping_delta import row_hashes, save_delta
+from .match_cache import MatchCache, content_hash, index_fingerprint
+from .match_candidates import candidate_rows, save_candidates
+from .memory_guard import MemoryCap, MemoryMonitor, SpillingCache
+from .negative_ids import NegativeIds
+from .pinned_mappings import PINNED, PinnedMappings
+from .pipeline import Pipeline, Stage
+from .retry_policy import RetryPolicy, RetryingFetcher, int_at_least
+from .shared_files import locked, signature
+from .sources import GoldstockSource
+
+if TYPE_CHECKING:
+    import requests
+    from bs4 import BeautifulSoup
+
+# Names this script's own state files, which the other script would invalidate
+SCRIPT_NAME = "mapping_script2"
+
+# Paths
+JSON_FILE = Path("companiesIDsTickers.json")
+OUTPUT_FILE = Path("company_mappings.csv")
+LOG_FILE = Path("mapping_log.txt")
+CACHE_FILE = Path("goldstock_cache.json")
+NEGATIVE_IDS_FILE = Path("goldstock_negative_ids.bin")
+CHECKPOINT_FILE = Path("mapping_checkpoint.json")
+FRONTIER_FILE = Path("crawl_frontier.db")
+MATCH_CACHE_FILE = Path(f"match_cache_{SCRIPT_NAME}.json")
+PINNED_FILE = Path("pinned_mappings.json")
+CANDIDATES_FILE = Path("match_candidates.json")
+PIPELINE_FILE = Path(f"pipeline_state_{SCRIPT_NAME}.json")
+SNAPSHOT_DIR = Path(f"goldstock_snapshots/{SCRIPT_NAME}")
+DELTA_FILE = Path("company_mappings_delta.csv")
+
+BASE_URL = "https://www.goldstockdata.com"
+
+# Bump when the matching logic changes so cached match results are recomputed
+MATCHER_VERSION = "mapping_script2/3"
+
+logger = logging.getLogger(__name__)
+
+# Global flag for graceful exit
+interrupted = False
+
+@dataclass
+class Company:
+    company_id: int
+    company_name: str
+    tsx_code: Optional[str]
+
+@dataclass
+class GoldstockCompany:
+    goldstock_id: str
+    company_name: str
+    ticker: Optional[str]
+    aliases: List[str] = None
+    exchange: Optional[str] = None
+    # [exchange, symbol] for every listing on the page; ticker/exchange are the first one found
+    listings: List[List[str]] = None
+
+    def __post_init__(self):
+        if self.aliases is None:
+            self.aliases = []
+        if self.listings is None:
+            self.listings = []
+
+@dataclass
+class Mapping:
+    company_id: int
+    company_name: str
+    tsx_code: Optional[str]
+    goldstock_id: Optional[str]
+    goldstock_name: Optional[str]
+    match_status: str
+    confidence_score: float
+    match_method: str = ""
+    # Best fuzzy candidates for manual/unmatched rows (side file only, not a CSV column)
+    candidates: Optional[List[Dict]] = None
+
+class CompanyMatcher:
+    def __init__(self, memory_cap: Optional[float] = None, cache_file: Optional[Path] = CACHE_FILE,
+                 file_format: Optional[str] = None, checkpoint_owner: str = SCRIPT_NAME):
+        # None keeps the page cache in memory only (cassette runs)
+        self.cache_file = cache_file
+        # Format the cache and checkpoint are written in; any format is read back
+        self.file_format = file_format or serialization.default_format()
+        self._session = None
+        self._session_lock = threading.Lock()
+        # What the cache file was when this run last read or wrote it; other runs' saves change it
+        self._cache_signature = None
+        self.cache = self.load_cache()
+        # Pages with nothing to fetch live in a bitmap; older caches stored them as null entries
+        self.negatives_file = NEGATIVE_IDS_FILE if cache_file else None
+        self.negatives = NegativeIds.load(self.negatives_file) if self.negatives_file else NegativeIds()
+        migrated = self.negatives.absorb(self.cache)
+        if migrated:
+            logger.info(f"Moved {migrated} null page cache entries to {self.negatives_file}")
+        if memory_cap:
+            # Past the cap, cached pages move to disk instead of growing the process
+            self.cache = SpillingCache(MemoryCap(memory_cap), self.cache)
+        self.checkpoints = CheckpointStore(CHECKPOINT_FILE, self.file_format, checkpoint_owner)
+        self.checkpoint = self.load_checkpoint()
+
+    @property
+    def session(self) -> 'requests.Session':
+        """HTTP session, created on first use so cache-only runs never import requests"""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                self._session = requests.Session()
+                self._session.headers.update({
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                    'Accept-Encoding': 'gzip, deflate, br',
+                    'DNT': '1',
+                    'Connection': 'keep-alive',
+                    'Upgrade-Insecure-Requests': '1'
+                })
+        return self._session
+
+    def load_cache(self) -> Dict:
+        if self.cache_file and self.cache_file.exists():
+            try:
+                self._cache_signature = signature(self.cache_file)
+                return serialization.load(self.cache_file, {})
+            except Exception as e:
+                logger.error(f"Failed to load cache: {e}")
+                return {}
+        return {}
+
+    def merge_saved_cache(self) -> int:
+        """Take in the pages and dead IDs other runs sharing the cache files have saved; returns the pages added"""
+        if not self.cache_file:
+            return 0
+        if self.negatives_file.exists():
+            self.negatives.merge(NegativeIds.load(self.negatives_file))
+        current = signature(self.cache_file)
+        if current is None or current == self._cache_signature:
+            return 0
+        try:
+            saved = serialization.load(self.cache_file, {})
+        except Exception as e:
+            logger.error(f"Failed to read the cache saved by other runs: {e}")
+            return 0
+        merged = 0
+        for key, value in saved.items():
+            if value is None:
+                self.negatives.add(key)
+            elif key not in self.cache:
+                self.cache[key] = value
+                merged += 1
+        self._cache_signature = current
+        return merged
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            # Other runs may share the file: take their pages in and write under the lock
+            with locked(self.cache_file):
+                merged = self.merge_saved_cache()
+                if merged:
+                    logger.info(f"Merged {merged} cache entries saved by other runs")
+                # Snapshot plain dicts (fetch threads keep writing); a spilling cache streams its own
+                items = self.cache.items() if isinstance(self.cache, SpillingCache) else list(self.cache.items())
+                serialization.save(self.cache_file, serialization.Members(items), self.file_format)
+                self._cache_signature = signature(self.cache_file)
+        except Exception as e:
+            logger.error(f"Failed to save cache: {e}")
+        self.negatives.save(self.negatives_file)
+
+    def load_checkpoint(self) -> Dict:
+        return self.checkpoints.load()
+
+    def save_checkpoint(self, mappings: List[Mapping]):
+        """Checkpoint the mappings (with other runs' rows); self.checkpoint keeps what the run was resumed from"""
+        self.checkpoints.save([asdict(m) for m in mappings])
+
+def setup_logging(mode: str = 'w'):
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_FILE, mode=mode),
+            logging.StreamHandler()
+        ]
+    )
+
+def signal_handler(sig, frame):
+    global interrupted
+    logger.info("Received Ctrl+C. Saving progress and exiting...")
+    interrupted = True
+    sys.exit(0)
+
+
+def normalize_ticker(ticker: Optional[str]) -> Optional[str]:
+    """Normalize ticker symbols for comparison"""
+    if not ticker:
+        return None
+    original = ticker
+    
+    # Remove exchange prefixes and suffixes
+    ticker = re.sub(r'^(CVE|TSE|TSX|TSXV|CSE|CNSX|NYSE|NASDAQ|OTC|NEO):', '', ticker, flags=re.IGNORECASE)
+    ticker = re.sub(r'\.(V|TO|CN|T|VN|WT|CSE|NEO|NE|H)$', '', ticker, flags=re.IGNORECASE)
+    
+    # Remove special characters
+    ticker = re.sub(r'[.\-_]', '', ticker)
+    
+    result = ticker.strip().upper()
+    if result != original.upper():
+        logger.debug(f"Normalized ticker: {original} -> {result}")
+    return result
+
+def normalize_name(name: Optional[str]) -> str:
+    """Normalize company names for fuzzy matching"""
+    if not name:
+        return ""
+    name = name.lower()
+    
+    # Remove common suffixes
+    suffixes = [
+        r'\s+inc\.?$', r'\s+ltd\.?$', r'\s+limited$', r'\s+corp\.?$',
+        r'\s+corporation$', r'\s+plc$', r'\s+llc$', r'\s+sa$', r'\s+ag$',
+        r'\s+mining$', r'\s+mines$', r'\s+resources$', r'\s+minerals$',
+        r'\s+gold$', r'\s+silver$', r'\s+metals$', r'\s+exploration$',
+        r'\s+ventures?$', r'\s+holdings?$', r'\s+group$', r'\s+international$'
+    ]
+    for suffix in suffixes:
+        name = re.sub(suffix, '', name, flags=re.IGNORECASE)
+    
+    # Remove special characters but keep spaces
+    name = re.sub(r'[^\w\s]', ' ', name)
+    name = re.sub(r'\s+', ' ', name)
+    return name.strip()
+
+def extract_company_aliases(name: str) -> List[str]:
+    """Extract possible aliases from company name"""
+    aliases = [name]
+    
+    # Extract content in parentheses as potential alias
+    if '(' in name and ')' in name:
+        clean_name = re.sub(r'\([^)]+\)', '', name).strip()
+        if clean_name:
+            aliases.append(clean_name)
+        # Also extract what's inside parentheses
+        matches = re.findall(r'\(([^)]+)\)', name)
+        aliases.extend(matches)
+    
+    # Create abbreviation from capital letters
+    words = name.split()
+    if len(words) > 1:
+        abbrev = ''.join(w[0].upper() for w in words if w and w[0].isalpha())
+        if len(abbrev) > 1:
+            aliases.append(abbrev)
+    
+    # Handle & and 'and'
+    if '&' in name:
+        aliases.append(name.replace('&', 'and'))
+    if ' and ' in name.lower():
+        aliases.append(name.replace(' and ', ' & '))
+    
+    return list(set(aliases))
+
+class GoldstockScraper:
+    def __init__(self, matcher: CompanyMatcher):
+        self.matcher = matcher
+        # The goldstockdata.com source of the shared fetch engine, which owns retries, the
+        # circuit breaker, politeness and the page cache (the load harness repoints base_url)
+        self.source = GoldstockSource(self.parse_company_page, BASE_URL)
+        self.engine = FetchEngine(matcher, should_stop=lambda: interrupted)
+        # IDs queued per fetch worker; the rest are submitted as earlier ones finish
+        self.window_factor = 4
+        # Collect results in ID order instead of completion order
+        self.ordered_results = False
+        # Goldstock IDs not to fetch (claimed by pinned mappings in targeted mode)
+        self.skip_ids: Set[int] = set()
+
+    def extract_ticker_from_page(self, soup: 'BeautifulSoup', page_text: str) -> Tuple[Optional[str], Optional[str]]:
+        """Extract ticker and exchange from page with enhanced detection"""
+        ticker = None
+        exchange = None
+        
+        # Method 1: Look for Symbol row in table (handles CNSX:GSRI format)
+        symbol_patterns = [
+            r'Symbol[:\s]+(?:Currency\s+)?(?:\*\*)?([A-Z]+)[:.]([A-Z0-9]+)(?:\*\*)?',
+            r'Symbol[:\s]+(?:\*\*)?([A-Z]+)[:.]([A-Z0-9]+)(?:\*\*)?',
+            r'(?:TSE|TSX|CVE|TSXV|CSE|CNSX|NEO|NYSE|NASDAQ|OTC)[:\s]*([A-Z0-9\.\-]+)',
+        ]
+        
+        for pattern in symbol_patterns:
+            match = re.search(pattern, page_text, re.IGNORECASE | re.MULTILINE)
+            if match:
+                if match.lastindex == 2:
+                    exchange = match.group(1)
+                    ticker = match.group(2)
+                else:
+                    ticker = match.group(1)
+                logger.debug(f"Found ticker via pattern: {ticker} (Exchange: {exchange})")
+                break
+        
+        # Method 2: Look in specific HTML elements
+        if not ticker:
+            # Look for bold text containing exchange:ticker
+            for b_tag in soup.find_all(['b', 'strong']):
+                text = b_tag.get_text(strip=True)
+                match = re.search(r'([A-Z]+)[:\s]([A-Z0-9\.\-]+)', text)
+                if match and match.group(1) in ['TSE', 'TSX', 'TSXV', 'CVE', 'CSE', 'CNSX', 'NEO']:
+                    exchange = match.group(1)
+                    ticker = match.group(2)
+                    logger.debug(f"Found ticker in bold: {ticker} (Exchange: {exchange})")
+                    break
+        
+        # Method 3: Table-based extraction
+        if not ticker:
+            for table in soup.find_all('table'):
+                for row in table.find_all('tr'):
+                    cells = row.find_all(['td', 'th'])
+                    if len(cells) >= 2:
+                        label = cells[0].get_text(strip=True).lower()
+                        if 'symbol' in label or 'ticker' in label:
+                            value = cells[1].get_text(strip=True)
+                            # Clean up the value
+                            value = re.sub(r'\*\*', '', value)
+                            value = re.sub(r'Currency.*', '', value).strip()
+                            
+                            match = re.search(r'([A-Z]+)[:\s]([A-Z0-9\.\-]+)', value)
+                            if match:
+                                exchange = match.group(1)
+                                ticker = match.group(2)
+                            else:
+                                ticker = value
+                            logger.debug(f"Found ticker in table: {ticker} (Exchange: {exchange})")
+                            break
+        
+        # Method 4: Look for ticker patterns in page text
+        if not ticker:
+            ticker_patterns = [
+                r'\b([A-Z]{2,5})\.(?:V|TO|CN)\b',
+                r'\b(?:ticker|symbol)[:\s]*([A-Z0-9\.\-]+)\b',
+            ]
+            for pattern in ticker_patterns:
+                match = re.search(pattern, page_text, re.IGNORECASE)
+                if match:
+                    ticker = match.group(1)
+                    logger.debug(f"Found ticker via fallback pattern: {ticker}")
+                    break
+        
+        return ticker, exchange
+
+    def parse_company_page(self, goldstock_id: int, html: str) -> Optional[GoldstockCompany]:
+        """Parse a company page; None if it has no usable company name"""
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        page_text = soup.get_text()
+
+        # Extract company name
+        name_selectors = [
+            'h1.company-name', 'h1', '.company-header h1',
+            'meta[property="og:title"]', 'title', '.company-title',
+            'div.name', 'span.company-name'
+        ]
+        company_name = None
+        for selector in name_selectors:
+            elem = soup.select_one(selector)
+            if elem:
+                if elem.name == 'meta':
+                    company_name = elem.get('content', '').strip()
+                else:
+                    company_name = elem.get_text(strip=True)
+                
+                # Clean the name
+                company_name = re.sub(r'\s*\|.*$', '', company_name)
+                company_name = re.sub(r'\s*-\s*Goldstock.*$', '', company_name, flags=re.IGNORECASE)
+                company_name = re.sub(r'\s*-\s*Company.*$', '', company_name, flags=re.IGNORECASE)
+                
+                if company_name and len(company_name) > 2:
+                    break
+        
+        if not company_name:
+            return None
+
+        # Extract ticker with enhanced detection
+        ticker, exchange = self.extract_ticker_from_page(soup, page_text)
+
+        return GoldstockCompany(
+            goldstock_id=str(goldstock_id),
+            company_name=company_name,
+            ticker=ticker,
+            exchange=exchange,
+            aliases=extract_company_aliases(company_name),
+            listings=extract_listings(soup)
+        )
+
+    def fetch_company_by_id(self, goldstock_id: int) -> Optional[GoldstockCompany]:
+        """Fetch company details from goldstockdata.com"""
+        record = self.engine.fetch(self.source, goldstock_id)
+        return GoldstockCompany(**record) if record else None
+
+    def fetch_tracked(self, goldstock_id: int, frontier: CrawlFrontier) -> Optional[GoldstockCompany]:
+        """Fetch one ID and record the outcome in the crawl frontier; an ID another run has claimed is left to it"""
+        if interrupted:
+            # Queued before Ctrl+C but never started: it stays pending
+            return None
+        if not frontier.claim(goldstock_id):
+            return None
+        result = self.fetch_company_by_id(goldstock_id)
+        # 404s and pages without a name go into the negative IDs; only request errors are not remembered
+        if self.engine.known(f"goldstock_{goldstock_id}"):
+            frontier.mark_done(goldstock_id)
+        elif interrupted:
+            frontier.reset([goldstock_id])
+        else:
+            error = self.engine.errors.pop(self.source.cache_key(goldstock_id), 'unknown error')
+            frontier.mark_failed(goldstock_id, error)
+        return result
+
+    def collect_from_other_runs(self, goldstock_ids: List[int], frontier: CrawlFrontier,
+                                poll_interval: float = 5) -> List[GoldstockCompany]:
+        """Pages of IDs other runs claimed first, taken from the shared cache once they have saved them"""
+        companies = []
+        waiting = set(goldstock_ids)
+        announced = False
+        while waiting and not interrupted:
+            self.matcher.merge_saved_cache()
+            for gid in sorted(waiting):
+                cache_key = f"goldstock_{gid}"
+                if self.engine.known(cache_key):
+                    waiting.discard(gid)
+                    if self.matcher.cache.get(cache_key):
+                        companies.append(GoldstockCompany(**self.matcher.cache[cache_key]))
+                elif not frontier.held_elsewhere(gid):
+                    # Its run stopped without saving the page: fetch it here
+                    result = self.fetch_tracked(gid, frontier)
+                    if result:
+                        companies.append(result)
+                    if not frontier.held_elsewhere(gid):
+                        waiting.discard(gid)
+            if waiting:
+                if not announced:
+                    logger.info(f"Frontier: waiting for {len(waiting)} IDs other runs are fetching")
+                    # This run's pages go out first, so a run waiting on it isn't held up in turn
+                    self.matcher.save_cache()
+                    announced = True
+                time.sleep(poll_interval)
+        return companies
+
+    def fetch_companies_parallel(self, start_id: int = 1, max_id: int = 1000, max_workers: int = 10,
+                                 frontier: Optional[CrawlFrontier] = None) -> List[GoldstockCompany]:
+        """Fetch companies in parallel, resuming from the crawl frontier when one is given"""
+        companies = []
+        if frontier:
+            frontier.seed(start_id, max_id)
+            # IDs finished by earlier runs come straight from the cache, with what other runs saved to it
+            merged = self.matcher.merge_saved_cache()
+            if merged:
+                logger.info(f"Picked up {merged} pages other runs saved to the cache")
+            missing = []
+            elsewhere = []
+            for gid in frontier.done_ids(start_id, max_id):
+                cache_key = f"goldstock_{gid}"
+                if not self.engine.known(cache_key):
+                    (elsewhere if frontier.held_elsewhere(gid) else missing).append(gid)
+                elif self.matcher.cache.get(cache_key):
+                    companies.append(GoldstockCompany(**self.matcher.cache[cache_key]))
+            if missing:
+                logger.info(f"Frontier: {len(missing)} done IDs have no cache entry, fetching them again")
+                frontier.reset(missing)
+            # Other runs are fetching these right now
+            elsewhere += frontier.in_flight_ids(start_id, max_id)
+            ids = frontier.next_ids(start_id, max_id)
+            dead = [gid for gid in ids if self.matcher.negatives.has_id(self.source.name, gid)]
+            if dead:
+                # A new frontier learns the known-dead IDs without fetching them
+                frontier.mark_done_many(dead)
+            logger.info(f"Frontier: {len(companies)} companies already crawled, "
+                        f"{len(ids) - len(dead)} IDs left to fetch")
+        else:
+            ids = range(start_id, max_id + 1)
+
+        # Known-dead and pinned IDs are never scheduled
+        ids = [gid for gid in self.matcher.negatives.filter_ids(self.source.name, ids) if gid not in self.skip_ids]
+        fetch = (lambda gid: self.fetch_tracked(gid, frontier)) if frontier else self.fetch_company_by_id
+        executor = ThreadPoolExecutor(max_workers=max_workers, initializer=stage_profiler.thread_initializer)
+        try:
+            for gid, future in bounded_map(executor, fetch, ids, max_workers * self.window_factor,
+                                           ordered=self.ordered_results, should_stop=lambda: interrupted):
+                try:
+                    result = future.result()
+                    if result:
+                        companies.append(result)
+                    if len(companies) % 50 == 0:
+                        logger.info(f"Fetched {len(companies)} companies so far...")
+                except Exception as e:
+                    logger.error(f"Error processing ID {gid}: {e}")
+        finally:
+            # After Ctrl+C only the requests already running are left; don't block on them
+            executor.shutdown(wait=not interrupted, cancel_futures=True)
+        if frontier and not interrupted:
+            # IDs another run claimed first: its pages reach this run through the shared cache
+            elsewhere += frontier.claimed_elsewhere(ids)
+            if elsewhere:
+                companies.extend(self.collect_from_other_runs(elsewhere, frontier))
+        if interrupted:
+            logger.info("Fetch stopped due to interrupt")
+
+        if frontier:
+            logger.info(f"Frontier status: {frontier.counts()}")
+        return companies
+
+    def fetch_companies_leased(self, queue: LeaseQueue, max_workers: int = 10,
+                               poll_interval: float = 5) -> List[GoldstockCompany]:
+        """Crawl chunks leased from a shared queue until every chunk is done"""
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        chunks_done = 0
+        while not interrupted:
+            lease = queue.claim(owner)
+            if lease is None:
+                if queue.is_drained():
+                    break
+                # Remaining chunks are leased by other workers; wait in case one of them dies
+                time.sleep(poll_interval)
+                continue
+
+            # Seed the local cache with anything already handed back for this range
+            for gid, payload in queue.results_for(lease.start_id, lease.end_id).items():
+                self.engine.store_record(f"goldstock_{gid}", payload)
+
+            logger.info(f"Leased chunk {lease.chunk_id} (IDs {lease.start_id}-{lease.end_id}, "
+                        f"attempt {lease.attempts})")
+            with LeaseHeartbeat(queue, lease) as heartbeat:
+                self.fetch_companies_parallel(lease.start_id, lease.end_id, max_workers)
+
+            if interrupted:
+                queue.release(lease)
+                break
+            if heartbeat.lost:
+                continue
+
+            # IDs that were never remembered failed with a request error
+            results, failed_ids = {}, []
+            for gid in range(lease.start_id, lease.end_id + 1):
+                cache_key = f"goldstock_{gid}"
+                if self.engine.known(cache_key):
+                    results[gid] = self.matcher.cache.get(cache_key)
+                elif gid not in self.skip_ids:
+                    failed_ids.append(gid)
+            if not queue.complete(lease, results, failed_ids):
+                # The lease ran out after the heartbeat's last check
+                continue
+            chunks_done += 1
+            logger.info(f"Chunk {lease.chunk_id} done; queue status: {queue.progress()}")
+
+        logger.info(f"This worker completed {chunks_done} chunks")
+        companies = []
+        for gid, payload in sorted(queue.all_results().items()):
+            self.engine.store_record(f"goldstock_{gid}", payload)
+            if payload:
+                companies.append(GoldstockCompany(**payload))
+        return companies
+
+@dataclass
+class MatchIndex:
+    # Several companies can share a symbol (on different exchanges, or a stale page); all are kept
+    by_listing: Dict[Tuple[str, str], List[GoldstockCompany]]
+    by_ticker: Dict[str, List[GoldstockCompany]]
+    by_normalized_name: Dict[str, GoldstockCompany]
+    fuzzy_choices: List[str]
+    fuzzy_companies: List[GoldstockCompany]
+    fingerprint: str
+
+def build_match_index(goldstock_companies: List[GoldstockCompany]) -> MatchIndex:
+    """Build the ticker, exact-name and fuzzy lookup structures once per run"""
+    # Fetch threads finish in any order; sort so collisions resolve the same way every run
+    goldstock_companies = sorted(goldstock_companies, key=lambda gs: int(gs.goldstock_id))
+
+    gs_by_listing = {}
+    gs_by_ticker = {}
+
+    def add(index, key, gs):
+        companies = index.setdefault(key, [])
+        # Companies arrive in ID order, so a symbol a page lists twice is only ever a repeat of the last one
+        if not companies or companies[-1] is not gs:
+            companies.append(gs)
+
+    for gs in goldstock_companies:
+        # The first ticker found is indexed too: it is all an entry cached before listings were recorded has
+        # (a bare symbol on a page that listed it is on that listing's exchange)
+        listings = [(canonical_exchange(gs.exchange) or exchange_of(gs.ticker)
+                     or listed_exchange(gs.ticker, gs.listings, normalize_ticker), gs.ticker)] if gs.ticker else []
+        for exchange, symbol in listings + gs.listings:
+            normalized = normalize_ticker(symbol)
+            if not normalized:
+                continue
+            if exchange:
+                add(gs_by_listing, (exchange, normalized), gs)
+            if not exchange or exchange in HOME_EXCHANGES:
+                add(gs_by_ticker, normalized, gs)
+    
+    gs_by_normalized_name = {}
+    for gs in goldstock_companies:
+        normalized = normalize_name(gs.company_name)
+        if normalized:
+            gs_by_normalized_name[normalized] = gs
+        for alias in gs.aliases:
+            normalized_alias = normalize_name(alias)
+            if normalized_alias:
+                gs_by_normalized_name[normalized_alias] = gs
+
+    return MatchIndex(
+        by_listing=gs_by_listing,
+        by_ticker=gs_by_ticker,
+        by_normalized_name=gs_by_normalized_name,
+        fuzzy_choices=[normalize_name(gs.company_name) for gs in goldstock_companies],
+        fuzzy_companies=goldstock_companies,
+        fingerprint=index_fingerprint(goldstock_companies, MATCHER_VERSION + fuzzy_engine.current().fingerprint_tag)
+    )
+
+def pinned_mapping(company: Company, entry: Dict) -> Mapping:
+    """Mapping for a company resolved by the pinned mappings store"""
+    return Mapping(
+        company_id=company.company_id,
+        company_name=company.company_name,
+        tsx_code=company.tsx_code,
+        goldstock_id=entry['goldstock_id'],
+        goldstock_name=entry['goldstock_name'],
+        match_status='matched',
+        confidence_score=entry['confidence_score'],
+        match_method='known_mapping' if entry.get('source', PINNED) == PINNED else 'confirmed_mapping'
+    )
+
+def match_key(company: Company) -> Tuple:
+    """Everything match_company reads from a company other than its ID: equal keys, equal matches"""
+    return exchange_of(company.tsx_code), normalize_ticker(company.tsx_code), normalize_name(company.company_name)
+
+def shared_match(mapping: Mapping, company: Company) -> Mapping:
+    """The match of an earlier row with the same key, as this company's mapping"""
+    return replace(mapping, company_id=company.company_id, company_name=company.company_name,
+                   tsx_code=company.tsx_code)
+
+def match_company(company: Company, index: MatchIndex, known_mappings: Dict[int, Dict],
+                  top_k: int = 0) -> Mapping:
+    """Run the known -> ticker -> exact name -> fuzzy cascade for one company"""
+    from fuzzywuzzy import fuzz
+
+    normalized_tsx_code = normalize_ticker(company.tsx_code)
+    normalized_company_name = normalize_name(company.company_name)
+    
+    match = None
+    confidence = 0
+    status = 'unmatched'
+    goldstock_id = None
+    goldstock_name = None
+    match_method = 'none'
+
+    # Check known mappings first; the same row batch mode writes for a pinned company
+    if company.company_id in known_mappings:
+        known = known_mappings[company.company_id]
+        logger.info(f"Known match: {company.company_name} -> {known['goldstock_name']} "
+                   f"(Goldstock ID: {known['goldstock_id']}, Confidence: {known['confidence_score']})")
+        return pinned_mapping(company, known)
+
+    # Try exact ticker match: the listing on the company's own exchange, else the symbol on a Canadian one
+    ticker_matches = None
+    if not match and normalized_tsx_code:
+        exchange = exchange_of(company.tsx_code)
+        ticker_matches = ((exchange and index.by_listing.get((exchange, normalized_tsx_code)))
+                          or index.by_ticker.get(normalized_tsx_code))
+    if ticker_matches:
+        match = closest_named(ticker_matches, normalized_company_name, normalize_name, fuzz.token_sort_ratio)
+        confidence = 100
+        status = 'matched'
+        goldstock_id = match.goldstock_id
+        goldstock_name = match.company_name
+        match_method = 'exact_ticker'
+        logger.info(f"Ticker match: {company.company_name} -> {goldstock_name} "
+                   f"(Goldstock ID: {goldstock_id}, Ticker: {match.ticker})")
+
+    # Try exact name match
+    if not match and normalized_company_name in index.by_normalized_name:
+        match = index.by_normalized_name[normalized_company_name]
+        confidence = 95
+        status = 'matched'
+        goldstock_id = match.goldstock_id
+        goldstock_name = match.company_name
+        match_method = 'exact_name'
+        logger.info(f"Exact name match: {company.company_name} -> {goldstock_name} "
+                   f"(Goldstock ID: {goldstock_id})")
+
+    # Try fuzzy name matching
+    candidates = []
+    if not match and normalized_company_name:
+        # One scoring pass gives extractOne's pick and the runners-up for review; with no runners-up
+        # wanted, names that can't reach the threshold are skipped unscored
+        top = fuzzy_engine.current().top(normalized_company_name, index.fuzzy_choices, top_k, 0 if top_k else 70)
+        candidates = candidate_rows(top[:top_k], index.fuzzy_companies)
+        
+        if top and top[0][1] >= 70:
+            idx, score = top[0]
+            match = index.fuzzy_companies[idx]
+            confidence = score
+            status = 'matched' if score >= 85 else 'manual'
+            goldstock_id = match.goldstock_id
+            goldstock_name = match.company_name
+            match_method = 'fuzzy_name'
+            logger.info(f"Fuzzy match ({score}%): {company.company_name} -> {goldstock_name} "
+                       f"(Goldstock ID: {goldstock_id})")
+
+    if status == 'unmatched':
+        logger.warning(f"No match for: {company.company_name} (ID: {company.company_id})")
+
+    return Mapping(
+        company_id=company.company_id,
+        company_name=company.company_name,
+        tsx_code=company.tsx_code,
+        goldstock_id=goldstock_id,
+        goldstock_name=goldstock_name,
+        match_status=status,
+        confidence_score=confidence,
+        match_method=match_method,
+        candidates=candidates if status != 'matched' and candidates else None
+    )
+
+# The index is handed to pool workers through fork(): set right before the pool
+# starts, so children read the parent's copy instead of unpickling their own
+_shared_index: Optional[MatchIndex] = None
+_shared_known_mappings: Dict[int, Dict] = {}
+_shared_top_k = 0
+
+def _init_match_worker():
+    # Ctrl+C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _match_shard(shard: List[Company]) -> List[Mapping]:
+    return [match_company(company, _shared_index, _shared_known_mappings, _shared_top_k) for company in shard]
+
+def perform_matching_sharded(companies: List[Company], index: MatchIndex, known_mappings: Dict[int, Dict],
+                             matcher: CompanyMatcher, match_cache: Optional[MatchCache],
+                             workers: int, top_k: int = 0) -> List[Mapping]:
+    """Match across forked worker processes; results keep the input order"""
+    global _shared_index, _shared_known_mappings, _shared_top_k
+    
+    mappings: List[Optional[Mapping]] = [None] * len(companies)
+    todo = []
+    for i, company in enumerate(companies):
+        cached = None
+        if match_cache is not None and company.company_id not in known_mappings:
+            cached = match_cache.get(company)
+        if cached:
+            mappings[i] = Mapping(**cached)
+        else:
+            todo.append(i)
+    
+    # Rows sharing a match key are matched once, by the first of them; known mappings stay per row
+    groups: Dict[object, List[int]] = {}
+    for i in todo:
+        groups.setdefault(i if companies[i].company_id in known_mappings else match_key(companies[i]), []).append(i)
+    followers = {members[0]: members[1:] for members in groups.values() if len(members) > 1}
+    todo = [members[0] for members in groups.values()]
+    shared = sum(len(members) for members in followers.values())
+    
+    # Contiguous shards, several per worker so a run of fuzzy-heavy rows doesn't idle the others
+    shard_size = max(1, math.ceil(len(todo) / (workers * 4)))
+    shards = [todo[i:i + shard_size] for i in range(0, len(todo), shard_size)]
+    logger.info(f"Matching {len(todo)} companies in {len(shards)} shards on {workers} processes "
+               f"({len(companies) - len(todo) - shared} unchanged since last run, "
+               f"{shared} reusing the match of a row with the same name and ticker)")
+    
+    _shared_index, _shared_known_mappings, _shared_top_k = index, known_mappings, top_k
+    # Keep the cyclic GC from touching (and so copying) the inherited index pages
+    gc.freeze()
+    try:
+        with multiprocessing.get_context('fork').Pool(workers, initializer=_init_match_worker) as pool:
+            results = pool.imap(_match_shard, [[companies[i] for i in shard] for shard in shards])
+            for shard, shard_mappings in zip(shards, results):
+                for i, mapping in zip(shard, shard_mappings):
+                    for j in [i] + followers.get(i, []):
+                        mappings[j] = mapping if j == i else shared_match(mapping, companies[j])
+                        if match_cache is not None and companies[j].company_id not in known_mappings:
+                            match_cache.put(companies[j], asdict(mappings[j]))
+                
+                done = [m for m in mappings if m is not None]
+                save_mappings(done)
+                matcher.save_checkpoint(done)
+                if match_cache is not None:
+                    match_cache.save()
+                logger.info(f"Processed {len(done)}/{len(companies)} companies")
+                
+                if interrupted:
+                    logger.info("Matching interrupted")
+                    pool.terminate()
+                    break
+    finally:
+        gc.unfreeze()
+        _shared_index, _shared_known_mappings, _shared_top_k = None, {}, 0
+    
+    return [m for m in mappings if m is not None]
+
+def perform_matching(companies: List[Company], goldstock_companies: List[GoldstockCompany], 
+                    known_mappings: Dict[int, Dict], matcher: CompanyMatcher,
+                    index: Optional[MatchIndex] = None,
+                    match_cache: Optional[MatchCache] = None,
+                    match_workers: int = 1,
+                    top_k: int = 0) -> List[Mapping]:
+    """Perform matching between companies and goldstock companies"""
+    if not goldstock_companies:
+        logger.error("No goldstock companies available for matching")
+        return []
+
+    if index is None:
+        index = build_match_index(goldstock_companies)
+
+    if match_workers > 1:
+        if 'fork' in multiprocessing.get_all_start_methods():
+            return perform_matching_sharded(companies, index, known_mappings, matcher, match_cache, match_workers,
+                                                top_k)
+        logger.warning("--match-workers needs fork(), which this platform lacks; matching in one process")
+
+    mappings = []
+    resolved: Dict[Tuple, Mapping] = {}
+    shared = 0
+    
+    for i, company in enumerate(companies):
+        if interrupted:
+            logger.info("Matching interrupted")
+            break
+            
+        logger.info(f"Processing company {i+1}/{len(companies)}: {company.company_name} "
+                   f"(ID: {company.company_id}, TSX: {company.tsx_code or 'None'})")
+
+        # Known mappings are cheap and may change between runs, so they bypass the cache
+        cacheable = match_cache is not None and company.company_id not in known_mappings
+        cached = match_cache.get(company) if cacheable else None
+        # Rows with the same name and ticker get the same match, so only the first is matched
+        key = match_key(company) if company.company_id not in known_mappings else None
+        if cached:
+            mapping = Mapping(**cached)
+            logger.info(f"Unchanged since last run: {company.company_name} -> "
+                       f"{mapping.goldstock_name or 'no match'} ({mapping.match_method})")
+        elif key in resolved:
+            mapping = shared_match(resolved[key], company)
+            shared += 1
+            logger.info(f"Same name and ticker as an earlier row: {company.company_name} -> "
+                       f"{mapping.goldstock_name or 'no match'} ({mapping.match_method})")
+        else:
+            mapping = match_company(company, index, known_mappings, top_k)
+        if key is not None:
+            resolved.setdefault(key, mapping)
+        if cacheable and not cached:
+            match_cache.put(company, asdict(mapping))
+        mappings.append(mapping)
+
+        # Save progress periodically
+        if (i + 1) % 10 == 0 or i == len(companies) - 1:
+            save_mappings(mappings)
+            matcher.save_checkpoint(mappings)
+            if match_cache is not None:
+                match_cache.save()
+            matched = sum(1 for m in mappings if m.match_status == 'matched')
+            manual = sum(1 for m in mappings if m.match_status == 'manual')
+            unmatched = sum(1 for m in mappings if m.match_status == 'unmatched')
+            logger.info(f"Processed {i + 1}/{len(companies)} companies: "
+                       f"{matched} matched, {manual} manual, {unmatched} unmatched")
+
+        if interrupted:
+            save_mappings(mappings)
+            matcher.save_checkpoint(mappings)
+            if match_cache is not None:
+                match_cache.save()
+            break
+
+    if shared:
+        logger.info(f"{shared} of {len(mappings)} companies ({shared / len(mappings):.1%}) had the name and ticker "
+                   f"of an earlier row and reused its match; {len(resolved)} distinct keys")
+
+    return mappings
+
+def run_owner(limit: Optional[int]) -> str:
+    """Whose checkpoint rows a run writes and resumes: this script's, over the same companies"""
+    return SCRIPT_NAME if limit is None else f"{SCRIPT_NAME} --limit {limit}"
+
+def load_companies(limit: Optional[int] = None) -> List[Company]:
+    """Load companies from JSON file"""
+    try:
+        with open(JSON_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        items = data[:limit] if limit is not None else data
+        companies = [
+            Company(
+                company_id=item['company_id'],
+                company_name=item['company_name'],
+                tsx_code=item.get('tsx_code')
+            )
+            for item in items
+        ]
+        logger.info(f"Loaded {len(companies)} companies from {JSON_FILE}")
+        return companies
+    except FileNotFoundError:
+        logger.error(f"Error: {JSON_FILE} not found in {os.getcwd()}")
+        return []
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding JSON: {e}")
+        return []
+        
+def save_mappings(mappings: List[Mapping]):
+    """Save mappings to CSV file"""
+    try:
+        with open(OUTPUT_FILE, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=[
+                'company_id', 'company_name', 'tsx_code',
+                'goldstock_id', 'goldstock_name',
+                'match_status', 'confidence_score', 'match_method'
+            ], extrasaction='ignore')
+            writer.writeheader()
+            for mapping in mappings:
+                writer.writerow(asdict(mapping))
+        logger.info(f"Saved {len(mappings)} mappings to {OUTPUT_FILE}")
+    except Exception as e:
+        logger.error(f"Error saving CSV: {e}")
+
+def verify_logo(goldstock_id: str, session: Optional['requests.Session'] = None) -> bool:
+    """Verify if a logo exists for the given goldstock ID"""
+    import requests
+
+    http = session or requests
+
+    for ext in ['png', 'jpg', 'webp']:
+        url = f"{BASE_URL}/images/logos/{goldstock_id}.{ext}"
+        try:
+            response = http.head(url, timeout=5)
+            if response.status_code == 200:
+                logger.debug(f"Logo found for goldstock_id {goldstock_id} ({ext})")
+                return True
+        except:
+            continue
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Enhanced company mapping to goldstockdata.com")
+    parser.add_argument('--limit', type=int, help='Limit number of companies to process')
+    parser.add_argument('--max-id', type=int, default=1500, help='Maximum goldstock ID to fetch')
+    parser.add_argument('--workers', type=int, default=10, help='Number of parallel workers')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint of an interrupted run with the same --limit')
+    parser.add_argument('--clear-cache', action='store_true', help='Clear cache before starting')
+    parser.add_argument('--lease-db', type=Path,
+                        help='Shared SQLite work queue; run several processes/hosts against the same file')
+    parser.add_argument('--chunk-size', type=int, default=100, help='Goldstock IDs per leased chunk')
+    parser.add_argument('--lease-seconds', type=float, default=120, help='Lease duration before a chunk is re-leased')
+    parser.add_argument('--rate-limit', type=float,
+                        help='Global requests per second shared by all workers on the lease queue')
+    parser.add_argument('--crawl-only', action='store_true', help='Stop after fetching goldstock companies')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='Retry goldstock IDs that used up their attempts in earlier runs')
+    parser.add_argument('--max-retries', type=int_at_least(0), default=3, help='Retries per request on errors, 429 and 5xx')
+    parser.add_argument('--breaker-cooldown', type=float, default=60,
+                        help='Seconds all workers pause when the error rate trips the circuit breaker')
+    parser.add_argument('--no-match-cache', action='store_true',
+                        help='Re-match every company even if its inputs and the index are unchanged')
+    parser.add_argument('--rerun-stages', action='store_true',
+                        help=f'Run match, export and logo verification even if their inputs are unchanged '
+                             f'since the run recorded in {PIPELINE_FILE}')
+    parser.add_argument('--match-workers', type=int, default=1,
+                        help='Processes for the matching stage (shares the index via fork)')
+    parser.add_argument('--targeted', action='store_true',
+                        help='Do not fetch or match goldstock IDs already claimed by pinned mappings')
+    parser.add_argument('--record-confirmed', action='store_true',
+                        help=f'Add this run\'s matched companies to {PINNED_FILE} so later runs skip them')
+    parser.add_argument('--fetch-window', type=int, default=4, metavar='N',
+                        help='Goldstock IDs queued per fetch worker (bounds memory and Ctrl+C latency)')
+    parser.add_argument('--ordered-fetch', action='store_true',
+                        help='Collect fetched companies in ID order rather than completion order')
+    parser.add_argument('--profile', type=Path, metavar='DIR',
+                        help='Profile each stage separately; writes .pstats and flame graph .collapsed files to DIR')
+    parser.add_argument('--profile-sample', type=float, metavar='MS',
+                        help='With --profile, sample stacks every MS milliseconds instead of tracing every call')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='Log tracemalloc snapshots and top allocation sites after each stage (slower)')
+    parser.add_argument('--memory-cap', type=float, metavar='MB',
+                        help='Spill cached goldstock pages to disk once RSS passes MB')
+    parser.add_argument('--top-k', type=int, default=5, metavar='K',
+                        help=f'Keep the K best fuzzy candidates of manual/unmatched rows in {CANDIDATES_FILE} (0 = off)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Match JSONL company records from stdin against the cached goldstock index and '
+                             'write Mapping JSONL to stdout (no crawl; uses --top-k and --match-workers)')
+    parser.add_argument('--cache-format', choices=serialization.FORMATS, default=serialization.default_format(),
+                        help='Format the page cache, checkpoint and match cache are saved in; '
+                             'files in any format (or the old indented JSON) are read back')
+    parser.add_argument('--fuzzy-engine', choices=fuzzy_engine.ENGINES, default=fuzzy_engine.default_engine(),
+                        help='What computes fuzzy name scores; rapidfuzz does the bulk of it in C')
+    parser.add_argument('--fuzzy-scores', choices=fuzzy_engine.SCORES, default=fuzzy_engine.COMPAT,
+                        help="rapidfuzz only: fuzzywuzzy's exact scores (compat) or rapidfuzz's own, "
+                             "which can be a few points higher (native)")
+    parser.add_argument('--record-cassette', type=Path, metavar='FILE',
+                        help='Record every HTTP exchange of a cold crawl to FILE for later replay')
+    parser.add_argument('--replay-cassette', type=Path, metavar='FILE',
+                        help='Serve HTTP responses from a recorded cassette instead of the network')
+    parser.add_argument('--replay-latency', choices=[RECORDED_LATENCY, ZERO_LATENCY], default=RECORDED_LATENCY,
+                        help='Replay each response after its recorded latency, or immediately')
+    args = parser.parse_args()
+    if args.record_cassette and args.replay_cassette:
+        parser.error('--record-cassette and --replay-cassette are mutually exclusive')
+    if (args.record_cassette or args.replay_cassette) and args.lease_db:
+        parser.error('cassettes record a local crawl; they cannot be combined with --lease-db')
+    if not serialization.available(args.cache_format):
+        parser.error(f'--cache-format {args.cache_format} needs the {args.cache_format} package installed')
+    if not fuzzy_engine.available(args.fuzzy_engine):
+        parser.error(f'--fuzzy-engine {args.fuzzy_engine} needs the {args.fuzzy_engine} package installed')
+    fuzzy_engine.configure(args.fuzzy_engine, args.fuzzy_scores)
+
+    # A stream session appends, so it never wipes the log of a batch run in the same directory
+    setup_logging('a' if args.stream else 'w')
+    signal.signal(signal.SIGINT, signal_handler)
+
+    if args.stream:
+        match_stream.run(sys.modules[__name__], sys.stdin, sys.stdout, args.top_k, args.match_workers)
+        return
+
+    memory = MemoryMonitor(trace=args.memory_report)
+    stage_profiler.add_stage_hook(memory.snapshot)
+    atexit.register(memory.report)
+
+    if args.profile:
+        sample_interval = args.profile_sample / 1000 if args.profile_sample else None
+        stage_profiler.activate(stage_profiler.StageProfiler(args.profile, sample_interval))
+        if args.match_workers > 1:
+            logger.warning("--profile only sees the parent process; matching workers are not profiled")
+
+    logger.info(f"Script started with args: {args}")
+
+    if args.clear_cache:
+        if CACHE_FILE.exists():
+            os.remove(CACHE_FILE)
+            logger.info("Cache cleared")
+        if NEGATIVE_IDS_FILE.exists():
+            os.remove(NEGATIVE_IDS_FILE)
+            logger.info("Negative IDs cleared")
+        if CHECKPOINT_FILE.exists():
+            os.remove(CHECKPOINT_FILE)
+            logger.info("Checkpoint cleared")
+        if FRONTIER_FILE.exists():
+            os.remove(FRONTIER_FILE)
+            logger.info("Crawl frontier cleared")
+        if MATCH_CACHE_FILE.exists():
+            os.remove(MATCH_CACHE_FILE)
+            logger.info("Match cache cleared")
+        if PIPELINE_FILE.exists():
+            os.remove(PIPELINE_FILE)
+            logger.info("Stage state cleared")
+
+    # A cassette run starts cold and leaves the page cache, frontier and match cache alone,
+    # so every page goes through the cassette and reruns do the same work
+    cassette_run = bool(args.record_cassette or args.replay_cassette)
+    with stage_profiler.stage('load'):
+        matcher = CompanyMatcher(memory_cap=args.memory_cap, cache_file=None if cassette_run else CACHE_FILE,
+                                 file_format=args.cache_format, checkpoint_owner=run_owner(args.limit))
+        scraper = GoldstockScraper(matcher)
+        scraper.engine.fetcher = RetryingFetcher(RetryPolicy(max_attempts=args.max_retries + 1),
+                                                 breaker_cooldown=args.breaker_cooldown)
+        scraper.window_factor = args.fetch_window
+        scraper.ordered_results = args.ordered_fetch
+        if cassette_run:
+            cassette = Cassette(args.record_cassette or args.replay_cassette,
+                                RECORD if args.record_cassette else REPLAY, args.replay_latency)
+            cassette.attach(matcher.session)
+            atexit.register(cassette.close)
+            if args.replay_cassette:
+                # The politeness pause is not part of the recording
+                scraper.source.request_delay = (0, 0)
+
+        pinned = PinnedMappings(PINNED_FILE)
+
+        companies = load_companies(limit=args.limit)
+    if not companies:
+        logger.error("No companies loaded. Exiting.")
+        sys.exit(1)
+
+    # Handle resume
+    if args.resume and matcher.checkpoint['processed_ids']:
+        processed_ids = set(matcher.checkpoint['processed_ids'])
+        companies = [c for c in companies if c.company_id not in processed_ids]
+        logger.info(f"Resuming with {len(companies)} remaining companies")
+
+    if interrupted:
+        logger.info("Exiting due to previous interrupt")
+        sys.exit(0)
+
+    # Pinned and previously confirmed mappings cost neither a fetch nor a match
+    pinned_rows = [pinned_mapping(c, pinned.get(c.company_id)) for c in companies if c.company_id in pinned]
+    to_match = [c for c in companies if c.company_id not in pinned]
+    logger.info(f"{len(pinned_rows)} companies resolved by {PINNED_FILE}, {len(to_match)} left to match")
+    if args.targeted:
+        scraper.skip_ids = pinned.claimed_ids
+
+    if to_match or args.crawl_only:
+        # Fetch goldstock companies
+        logger.info(f"Fetching goldstock companies (IDs 1 to {args.max_id})...")
+        with stage_profiler.stage('fetch'):
+            if args.lease_db:
+                queue = LeaseQueue(args.lease_db, lease_seconds=args.lease_seconds, rate_limit=args.rate_limit)
+                queue.seed(1, args.max_id, args.chunk_size)
+                scraper.engine.fetcher.rate_limiter = queue
+                goldstock_companies = scraper.fetch_companies_leased(queue, max_workers=args.workers)
+            else:
+                frontier = None if cassette_run else CrawlFrontier(FRONTIER_FILE)
+                if frontier and args.retry_failed:
+                    logger.info(f"Frontier: {frontier.retry_failed()} failed IDs queued for retry")
+                goldstock_companies = scraper.fetch_companies_parallel(
+                    start_id=1,
+                    max_id=args.max_id,
+                    max_workers=args.workers,
+                    frontier=frontier
+                )
+        logger.info(f"Request stats: {scraper.engine.fetcher.summary()}")
+    else:
+        logger.info("Every company is pinned; skipping the goldstock crawl")
+        goldstock_companies = []
+
+    if interrupted:
+        matcher.save_cache()
+        logger.info("Exiting after fetch due to interrupt")
+        sys.exit(0)
+
+    if args.crawl_only:
+        with stage_profiler.stage('save'):
+            matcher.save_cache()
+        logger.info(f"Crawl finished with {len(goldstock_companies)} goldstock companies (--crawl-only)")
+        sys.exit(0)
+
+    if args.targeted:
+        goldstock_companies = [g for g in goldstock_companies if int(g.goldstock_id) not in pinned.claimed_ids]
+
+    if to_match and not goldstock_companies:
+        logger.error("No goldstock companies fetched. Check connection or selectors.")
+        sys.exit(1)
+
+    logger.info(f"Fetched {len(goldstock_companies)} goldstock companies")
+
+    with stage_profiler.stage('save'):
+        matcher.save_cache()
+
+    # snapshot -> match -> (export, logos); a stage whose inputs are unchanged since the last run is skipped
+    match_cache = None
+    goldstock_fp = index_fingerprint(sorted(goldstock_companies, key=lambda gs: int(gs.goldstock_id)),
+                                     MATCHER_VERSION + fuzzy_engine.current().fingerprint_tag)
+    snapshots = SnapshotStore(SNAPSHOT_DIR, args.cache_format)
+
+    def snapshot_stage(goldstock):
+        # Versioned crawl results, and the change feed from the last version matching can limit itself to
+        feed = None if cassette_run else snapshots.record(goldstock, goldstock_fp)
+        return feed and {k: feed[k] for k in ('from_version', 'to_version', 'from_fingerprint', 'to_fingerprint')}
+
+    def match_stage(companies, goldstock, pinned_mappings, snapshot):
+        nonlocal match_cache
+        with stage_profiler.stage('index'):
+            index = build_match_index(goldstock)
+            # Cached rows carry their candidates, so a different --top-k recomputes them
+            match_cache = (None if args.no_match_cache or cassette_run
+                           else MatchCache(MATCH_CACHE_FILE, f"{index.fingerprint}/top{args.top_k}", args.cache_format))
+            # Rows matched against the previous crawl stand unless its change feed reaches them
+            if (match_cache is not None and snapshot and snapshot['from_fingerprint']
+                    and snapshot['to_fingerprint'] == index.fingerprint):
+                try:
+                    delta = DeltaFilter(snapshots.load_feed(snapshot['from_version'], snapshot['to_version']),
+                                        normalize_ticker, normalize_name, 70, args.top_k)
+                    match_cache.carry_over(f"{snapshot['from_fingerprint']}/top{args.top_k}",
+                                           lambda company, mapping: not delta.affects(company, mapping))
+                except FileNotFoundError:
+                    logger.warning("Change feed missing; re-matching every row the crawl may affect")
+        match_started = time.perf_counter()
+        with stage_profiler.stage('match'):
+            mappings = perform_matching(to_match, goldstock, pinned_mappings, matcher,
+                                        index=index, match_cache=match_cache, match_workers=args.match_workers,
+                                        top_k=args.top_k)
+        logger.info(f"Matching took {time.perf_counter() - match_started:.1f}s "
+                    f"({args.match_workers} process{'es' if args.match_workers > 1 else ''})")
+        if interrupted:
+            return mappings
+
+        # Back into input order, pinned rows included
+        order = {c.company_id: i for i, c in enumerate(companies)}
+        mappings = sorted(pinned_rows + mappings, key=lambda m: order[m.company_id])
+
+        # Merge with existing mappings if resuming
+        if args.resume and matcher.checkpoint['mappings']:
+            existing_mappings = [Mapping(**m) for m in matcher.checkpoint['mappings']]
+            mappings = existing_mappings + mappings
+        return mappings
+
+    def export_stage(match):
+        # The CSV is what upload-to-supabase.js loads into company_goldstock_mapping; --delta loads DELTA_FILE
+        with stage_profiler.stage('save'):
+            save_mappings(match)
+            # A --limit run covers only some companies: the others are neither deleted nor forgotten
+            partial = args.limit is not None
+            previous_export = stages.previous('export')
+            save_delta(DELTA_FILE, match, previous_export, partial)
+            matcher.save_checkpoint(match)
+            if args.top_k:
+                save_candidates(CANDIDATES_FILE, match)
+            if args.record_confirmed:
+                recorded = sum(pinned.confirm(m.company_id, m.company_name, m.goldstock_id, m.goldstock_name,
+                                              m.confidence_score, m.match_method)
+                               for m in match if m.match_status == 'matched')
+                pinned.save()
+                logger.info(f"Recorded {recorded} confirmed mappings in {PINNED_FILE}")
+        return row_hashes(match, previous_export if partial else None)
+
+    def logos_stage(match):
+        # Verify logos for matched companies
+        verified = []
+        with stage_profiler.stage('logos'):
+            for mapping in match:
+                if interrupted:
+                    break
+                if mapping.goldstock_id and mapping.match_status == 'matched':
+                    if verify_logo(mapping.goldstock_id, matcher.session):
+                        verified.append(mapping.goldstock_id)
+                        logger.info(f"Logo verified for {mapping.company_name} (Goldstock ID: {mapping.goldstock_id})")
+        return verified
+
+    # A cassette run leaves the stage state alone like the other caches
+    stages = Pipeline(None if cassette_run else PIPELINE_FILE, args.cache_format, reuse=not args.rerun_stages,
+                      should_stop=lambda: interrupted)
+    stages.source('companies', companies, content_hash([asdict(c) for c in companies]))
+    stages.source('goldstock', goldstock_companies, goldstock_fp)
+    stages.source('pinned_mappings', pinned.known_mappings())
+    resumed = args.resume and matcher.checkpoint['mappings']
+    stages.add(Stage('snapshot', snapshot_stage, ('goldstock',), encode=lambda feed: feed))
+    stages.add(Stage('match', match_stage, ('companies', 'goldstock', 'pinned_mappings', 'snapshot'),
+                     key=(args.top_k, resumed or None),
+                     encode=lambda mappings: [asdict(m) for m in mappings],
+                     decode=lambda rows: [Mapping(**row) for row in rows]))
+    stages.add(Stage('export', export_stage, ('match',),
+                     outputs=(OUTPUT_FILE,) + ((CANDIDATES_FILE,) if args.top_k else ()),
+                     key=(args.top_k, args.record_confirmed), encode=dict))
+    stages.add(Stage('logos', logos_stage, ('match',), key=BASE_URL, encode=list))
+    results = stages.run()
+
+    if 'export' not in results:
+        logger.info("Exiting after matching due to interrupt")
+        sys.exit(0)
+    mappings = results['match']
+    logo_verified = len(results.get('logos', []))
+    if stages.skipped:
+        logger.info(f"Stages skipped with unchanged inputs: {', '.join(stages.skipped)}")
+
+    # Print summary
+    matched = sum(1 for m in mappings if m.match_status == 'matched')
+    manual = sum(1 for m in mappings if m.match_status == 'manual')
+    unmatched = sum(1 for m in mappings if m.match_status == 'unmatched')
+    
+    logger.info(f"\nFinal Summary:")
+    logger.info(f"Total processed: {len(mappings)}")
+    logger.info(f"Matched: {matched} ({matched/len(mappings)*100:.1f}%)")
+    logger.info(f"Manual review needed: {manual} ({manual/len(mappings)*100:.1f}%)")
+    logger.info(f"Unmatched: {unmatched} ({unmatched/len(mappings)*100:.1f}%)")
+    logger.info(f"Logos verified: {logo_verified}")
+    if match_cache is not None:
+        logger.info(f"Match cache: {match_cache.reused} reused, {match_cache.carried} carried over the crawl's "
+                    f"changes, {match_cache.recomputed} recomputed")
+
+    # Clean up checkpoint if job complete (rows other runs checkpointed stay)
+    if not interrupted:
+        matcher.checkpoints.clear(m.company_id for m in mappings)
+
+    logger.info("Script completed successfully")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from . import serialization
+from .shared_files import locked
+
+logger = logging.getLogger(__name__)
+
+def content_hash(*parts) -> str:
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def index_fingerprint(goldstock_companies: Iterable, matcher_version: str) -> str:
+    """Version of the goldstock index: changes when any entry or the matching logic changes"""
+    # Alias lists come from a set, so their order differs between processes
+    entries = [{k: sorted(v) if isinstance(v, list) else v for k, v in asdict(gs).items()}
+               for gs in goldstock_companies]
+    return content_hash(matcher_version, entries)
+
+class MatchCache:
+    """Mappings from earlier runs, reused while neither the company row nor the index changed.
+
+    Entries are keyed by company_id and remember the hash of
+    (company_id, company_name, tsx_code) plus the goldstock index fingerprint
+    they were computed against; a mismatch on either means recompute.
+    After carry_over(), entries computed against the previous crawl's index
+    are also reused when the change feed between the two can't affect them.
+    """
+
+    def __init__(self, path: Path, index_fp: str, file_format: str = serialization.JSON):
+        self.path = Path(path)
+        self.index_fp = index_fp
+        self.file_format = file_format
+        self.entries: Dict[str, Dict] = {}
+        self.reused = 0
+        self.recomputed = 0
+        self.carried = 0
+        self.carried_fp: Optional[str] = None
+        self.unaffected: Callable[[object, Dict], bool] = lambda company, mapping: False
+        self.entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            return serialization.load(self.path).get('entries', {})
+        except Exception as e:
+            logger.error(f"Failed to load match cache: {e}")
+            return {}
+
+    @staticmethod
+    def input_key(company) -> str:
+        return content_hash(company.company_id, company.company_name, company.tsx_code)
+
+    def carry_over(self, previous_fp: str, unaffected: Callable[[object, Dict], bool]):
+        """Also reuse entries computed against previous_fp for which unaffected(company, mapping) holds"""
+        self.carried_fp = previous_fp
+        self.unaffected = unaffected
+
+    def get(self, company) -> Optional[Dict]:
+        entry = self.entries.get(str(company.company_id))
+        if not entry or entry['input'] != self.input_key(company):
+            return None
+        if entry['index'] == self.index_fp:
+            self.reused += 1
+            return entry['mapping']
+        if entry['index'] == self.carried_fp and self.unaffected(company, entry['mapping']):
+            # Valid against this index too; saved under it so the next run reuses it directly
+            entry['index'] = self.index_fp
+            self.carried += 1
+            return entry['mapping']
+        return None
+
+    def put(self, company, mapping: Dict):
+        self.recomputed += 1
+        self.entries[str(company.company_id)] = {
+            'input': self.input_key(company),
+            'index': self.index_fp,
+            'mapping': mapping,
+        }
+
+    def save(self):
+        try:
+            # Keep the companies other runs sharing the file matched and this one didn't
+            with locked(self.path):
+                for company_id, entry in self._load().items():
+                    self.entries.setdefault(company_id, entry)
+                serialization.save(self.path, {'entries': self.entries}, self.file_format, indent=None)
+        except Exception as e:
+            logger.error(f"Failed to save match cache: {e}")
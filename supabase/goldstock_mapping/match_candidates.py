@@ -0,0 +1,50 @@
+import heapq
+import json
+import logging
+from operator import itemgetter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+def top_fuzzy(query: str, choices: List[str], k: int, scorer: Callable) -> List[Tuple[int, int]]:
+    """(choice index, score) of the k best-scoring choices, best first, from one scoring pass.
+
+    Choices are processed and scored exactly as process.extractOne does it,
+    and equal scores keep the earlier choice, so the first entry is always
+    extractOne's pick. The heap holds k entries, not one per choice.
+    """
+    from fuzzywuzzy import process
+
+    if not choices:
+        return []
+    # No score_cutoff: every choice is yielded, so the position is the choice index
+    scores = enumerate(score for _, score in process.extractWithoutOrder(query, choices, scorer=scorer))
+    return heapq.nlargest(max(k, 1), scores, key=itemgetter(1))
+
+def candidate_rows(top: Iterable[Tuple[int, int]], companies: List) -> List[Dict]:
+    """What a reviewer needs to pick one of the candidates"""
+    return [{
+        'goldstock_id': companies[idx].goldstock_id,
+        'goldstock_name': companies[idx].company_name,
+        'ticker': companies[idx].ticker,
+        'score': score,
+    } for idx, score in top]
+
+def save_candidates(path: Path, mappings: Iterable):
+    """Write {company_id: [candidates, best first]} for every mapping that carries candidates"""
+    entries = {str(m.company_id): m.candidates for m in mappings if m.candidates}
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        logger.info(f"Saved top candidates for {len(entries)} review rows to {path}")
+    except Exception as e:
+        logger.error(f"Failed to save match candidates: {e}")
+
+def load_candidates(path: Path) -> Dict[int, List[Dict]]:
+    """The side file keyed by int company_id (empty if it does not exist)"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {int(company_id): rows for company_id, rows in json.load(f).items()}
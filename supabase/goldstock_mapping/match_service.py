@@ -0,0 +1,243 @@
+import argparse
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from . import serialization
+from .pinned_mappings import PinnedMappings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class IndexState:
+    """One loaded generation of the index; requests keep the one they started with"""
+    index: object
+    known_mappings: Dict[int, Dict]
+    companies: int
+    signature: Tuple
+    loaded_at: float
+
+class WarmIndex:
+    """The goldstock match index of one mapping script, built from its page cache and kept in memory.
+
+    refresh() rebuilds it when the page cache or the pinned mappings file
+    has changed on disk and swaps the new generation in with one
+    assignment, so matching never waits on a reload. A cache caught
+    half-written keeps the old generation until the next check.
+    """
+
+    def __init__(self, script, cache_file: Path, pinned_file: Path):
+        self.script = script
+        self.cache_file = Path(cache_file)
+        self.pinned_file = Path(pinned_file)
+        self.state: Optional[IndexState] = None
+        self.reloads = 0
+        self._failed_signature = None
+        self._fields = {f.name for f in fields(script.GoldstockCompany)}
+        self._lock = threading.Lock()
+
+    def signature(self) -> Tuple:
+        def stat(path: Path):
+            try:
+                st = path.stat()
+                return st.st_mtime_ns, st.st_size
+            except FileNotFoundError:
+                return None
+        return stat(self.cache_file), stat(self.pinned_file)
+
+    def load(self) -> IndexState:
+        signature = self.signature()
+        cache = serialization.load(self.cache_file, {})
+        # Either script's cache works: fields the other script records are dropped
+        companies = [self.script.GoldstockCompany(**{k: v for k, v in record.items() if k in self._fields})
+                     for key, record in cache.items() if key.startswith('goldstock_') and record]
+        if self.signature() != signature:
+            raise RuntimeError(f"{self.cache_file} changed while it was being read")
+        pinned = PinnedMappings(self.pinned_file)
+        return IndexState(self.script.build_match_index(companies), pinned.known_mappings(),
+                          len(companies), signature, time.time())
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild if the files changed (or force); True when a new generation was swapped in"""
+        with self._lock:
+            signature = self.signature()
+            if not force and self.state is not None and signature in (self.state.signature, self._failed_signature):
+                return False
+            started = time.perf_counter()
+            try:
+                state = self.load()
+            except Exception as e:
+                if self.state is None:
+                    raise
+                # Tried again once the file changes (a write in progress finishes and changes it)
+                self._failed_signature = signature
+                logger.warning(f"Keeping the current index; reload failed: {e}")
+                return False
+            self.state = state
+            self.reloads += 1
+        logger.info(f"Index loaded: {state.companies} goldstock companies, {len(state.known_mappings)} pinned "
+                    f"mappings in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def watch(self, interval: float, stop: threading.Event):
+        while not stop.wait(interval):
+            self.refresh()
+
+    def match(self, company_name: str, tsx_code: Optional[str] = None, company_id: Optional[int] = None,
+              top_k: int = 0) -> Dict:
+        state = self.state
+        company = self.script.Company(company_id=company_id, company_name=company_name, tsx_code=tsx_code)
+        return asdict(self.script.match_company(company, state.index, state.known_mappings, top_k))
+
+    def health(self) -> Dict:
+        state = self.state
+        return {
+            'script': self.script.__name__.rsplit('.', 1)[-1],
+            'goldstock_companies': state.companies,
+            'pinned_mappings': len(state.known_mappings),
+            'fingerprint': state.index.fingerprint,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(state.loaded_at)),
+            'reloads': self.reloads,
+        }
+
+class MatchService:
+    """Local HTTP API over a WarmIndex.
+
+    GET  /match?company_name=...&tsx_code=...&company_id=...&top_k=...
+    POST /match    a JSON object with the same fields, or a list of them
+    GET  /health   what is loaded
+    POST /reload   rebuild now instead of waiting for the file check
+
+    Responses are JSON; a match is the Mapping row the script would write.
+    """
+
+    def __init__(self, warm: WarmIndex, host: str = '127.0.0.1', port: int = 8765, default_top_k: int = 0):
+        self.warm = warm
+        self.default_top_k = default_top_k
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def match_request(self, params: Dict) -> Dict:
+        name = params.get('company_name')
+        if not name:
+            raise ValueError("company_name is required")
+        company_id = params.get('company_id')
+        return self.warm.match(name, params.get('tsx_code') or None,
+                               int(company_id) if company_id not in (None, '') else None,
+                               int(params.get('top_k', self.default_top_k)))
+
+    def respond(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        url = urlparse(path)
+        if method == 'GET' and url.path == '/health':
+            return 200, self.warm.health()
+        if method == 'POST' and url.path == '/reload':
+            self.warm.refresh(force=True)
+            return 200, self.warm.health()
+        if url.path != '/match':
+            return 404, {'error': f"no such endpoint: {method} {url.path}"}
+        try:
+            if method == 'GET':
+                return 200, self.match_request({k: v[-1] for k, v in parse_qs(url.query).items()})
+            payload = json.loads(body or b'null')
+            if isinstance(payload, list):
+                return 200, [self.match_request(item) for item in payload]
+            if isinstance(payload, dict):
+                return 200, self.match_request(payload)
+            raise ValueError("expected a JSON object or a list of objects")
+        except (ValueError, TypeError) as e:
+            return 400, {'error': str(e)}
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_request(self, method: str):
+                started = time.perf_counter()
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                try:
+                    status, result = service.respond(method, self.path, body)
+                except Exception as e:
+                    logger.error(f"{method} {self.path} failed: {e}")
+                    status, result = 500, {'error': str(e)}
+                payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('X-Match-Time-Ms', f"{elapsed_ms:.2f}")
+                self.end_headers()
+                self.wfile.write(payload)
+                logger.debug(f"{method} {self.path} -> {status} in {elapsed_ms:.1f} ms")
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve goldstock matches over a local HTTP API from an index kept warm in memory")
+    parser.add_argument('--script', choices=['mapping_script', 'mapping_script2'], default='mapping_script2',
+                        help='Whose page cache, index and matching rules to serve')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (local only by default)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--reload-interval', type=float, default=2,
+                        help='Seconds between checks of the page cache and pinned mappings for changes')
+    parser.add_argument('--top-k', type=int, default=0, metavar='K',
+                        help='Fuzzy candidates returned with manual/unmatched results unless a request asks')
+    args = parser.parse_args()
+
+    script = importlib.import_module(f".{args.script}", __package__)
+    # Appends to the script's log: setup_logging() truncates it, which would wipe a batch run sharing the directory
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        handlers=[logging.FileHandler(script.LOG_FILE, mode='a'), logging.StreamHandler()])
+    warm = WarmIndex(script, script.CACHE_FILE, script.PINNED_FILE)
+    if not warm.refresh() or not warm.state.companies:
+        logger.warning(f"No goldstock companies in {os.path.abspath(script.CACHE_FILE)}; "
+                       f"run the crawl first (matches will come back unmatched)")
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=warm.watch, args=(args.reload_interval, stop), name='index-watcher',
+                               daemon=True)
+    watcher.start()
+    service = MatchService(warm, args.host, args.port, args.top_k)
+    logger.info(f"Matching service listening on {service.url}")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        stop.set()
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
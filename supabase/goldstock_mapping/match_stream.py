@@ -0,0 +1,93 @@
+import json
+import logging
+import multiprocessing
+import signal
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Dict, Optional
+
+from .fetch_window import bounded_map
+from .match_service import WarmIndex
+
+logger = logging.getLogger(__name__)
+
+# Handed to worker processes through fork(), like the scripts' sharded matching
+_shared_warm: Optional[WarmIndex] = None
+_shared_top_k = 0
+
+def _init_stream_worker():
+    # Ctrl+C and a closed pipe are the parent's to handle
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def match_line(warm: WarmIndex, line: str, top_k: int) -> Dict:
+    """The Mapping row for one JSONL company record, or {"error": ...} for a record that can't be matched"""
+    try:
+        record = json.loads(line)
+        if not isinstance(record, dict) or not record.get('company_name'):
+            raise ValueError("expected an object with company_name")
+        company_id = record.get('company_id')
+        return warm.match(record['company_name'], record.get('tsx_code') or None,
+                          int(company_id) if company_id not in (None, '') else None,
+                          int(record.get('top_k', top_k)))
+    except (ValueError, TypeError) as e:
+        return {'error': str(e), 'input': line.rstrip('\n')[:200]}
+
+def _match_shared(line: str) -> Dict:
+    return match_line(_shared_warm, line, _shared_top_k)
+
+def stream_matches(warm: WarmIndex, infile: IO[str], outfile: IO[str], top_k: int = 0, workers: int = 1,
+                   window_factor: int = 4) -> Counter:
+    """Match JSONL company records from infile to Mapping JSONL on outfile, one output line per input line.
+
+    Each result is written and flushed as soon as it (and every line
+    before it) is done. With workers > 1 records are matched in forked
+    processes, at most workers * window_factor at a time, so memory stays
+    flat however long the input is; output then trails input by up to
+    that window. Blank lines are skipped.
+    """
+    global _shared_warm, _shared_top_k
+
+    stats = Counter()
+
+    def emit(result: Dict):
+        outfile.write(json.dumps(result, ensure_ascii=False) + '\n')
+        outfile.flush()
+        stats['error' if 'error' in result else result['match_status']] += 1
+
+    lines = (line for line in infile if line.strip())
+    if workers <= 1:
+        for line in lines:
+            emit(match_line(warm, line, top_k))
+        return stats
+
+    _shared_warm, _shared_top_k = warm, top_k
+    try:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'),
+                                 initializer=_init_stream_worker) as executor:
+            for _, future in bounded_map(executor, _match_shared, lines, workers * window_factor, ordered=True):
+                emit(future.result())
+    finally:
+        _shared_warm, _shared_top_k = None, 0
+    return stats
+
+def run(script, infile: IO[str], outfile: IO[str], top_k: int = 0, workers: int = 1) -> Counter:
+    """--stream mode of a mapping script: match stdin against the index built from its page cache"""
+    # Every result goes to stdout; keep per-record log lines off stderr so a consumer
+    # that never reads stderr can't stall the stream on a full pipe
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setLevel(logging.ERROR)
+
+    warm = WarmIndex(script, script.CACHE_FILE, script.PINNED_FILE)
+    warm.refresh()
+    if not warm.state.companies:
+        logger.error(f"No goldstock companies in {script.CACHE_FILE}; run the crawl first")
+    logger.info(f"Streaming matches against {warm.state.companies} goldstock companies")
+    try:
+        stats = stream_matches(warm, infile, outfile, top_k, workers)
+    except BrokenPipeError:
+        # The reader went away; nothing left to write to
+        logger.info("Output closed by the reader")
+        return Counter()
+    logger.info(f"Streamed {sum(stats.values())} records: {dict(stats)}")
+    return stats
@@ -0,0 +1,209 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import tracemalloc
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def current_rss_mb() -> Optional[float]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        # No /proc (macOS): the peak is the best cheap upper bound available
+        return peak_rss_mb()
+
+class MemoryMonitor:
+    """Records RSS at stage boundaries and, with tracemalloc, where memory was allocated.
+
+    Each snapshot logs the current and peak RSS, the traced peak since the
+    previous snapshot and the allocation sites that grew the most during
+    the stage.
+    """
+
+    def __init__(self, trace: bool = False, top: int = 10):
+        self.trace = trace
+        self.top = top
+        self.rows: List[Tuple[str, Optional[float], Optional[float], Optional[float]]] = []
+        self._previous = None
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+    def snapshot(self, label: str):
+        traced_peak = None
+        if self.trace:
+            _, peak = tracemalloc.get_traced_memory()
+            traced_peak = peak / (1024 * 1024)
+            tracemalloc.reset_peak()
+            snapshot = self._take_snapshot()
+            if self._previous is not None:
+                stats = snapshot.compare_to(self._previous, 'lineno')
+            else:
+                stats = snapshot.statistics('lineno')
+            self._previous = snapshot
+            top = '\n'.join(f"  {stat}" for stat in stats[:self.top])
+            logger.info(f"Memory after {label}: top allocations\n{top}")
+        row = (label, current_rss_mb(), peak_rss_mb(), traced_peak)
+        self.rows.append(row)
+        logger.info(f"Memory after {label}: rss {_mb(row[1])}, peak rss {_mb(row[2])}"
+                    + (f", traced peak during stage {_mb(traced_peak)}" if self.trace else ""))
+
+    def report(self):
+        lines = [f"{'stage':<12} {'rss':>10} {'peak rss':>10} {'traced peak':>12}"]
+        for label, rss, peak, traced in self.rows:
+            lines.append(f"{label:<12} {_mb(rss):>10} {_mb(peak):>10} {_mb(traced):>12}")
+        lines.append(f"{'overall':<12} {'':>10} {_mb(peak_rss_mb()):>10}")
+        logger.info("Memory by stage:\n" + '\n'.join(lines))
+
+def _mb(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.1f} MB"
+
+class MemoryCap:
+    """RSS limit checked by the spilling structures"""
+
+    def __init__(self, limit_mb: float):
+        self.limit_mb = limit_mb
+        if current_rss_mb() is None:
+            logger.warning("Cannot read RSS on this platform; --memory-cap will not be enforced")
+
+    def exceeded(self) -> bool:
+        rss = current_rss_mb()
+        return rss is not None and rss > self.limit_mb
+
+class SpillingCache(MutableMapping):
+    """Dict-like cache that moves its entries into an SQLite file whenever RSS passes the cap.
+
+    Recent entries live in an in-memory dict; once the cap is exceeded they
+    are written to disk as JSON and dropped from memory, so a long crawl
+    keeps its memory flat instead of holding every page it has seen. Only
+    the keys of spilled entries stay in memory. Safe to share between
+    fetch threads.
+    """
+
+    def __init__(self, cap: MemoryCap, initial: Optional[Dict[str, Any]] = None,
+                 check_every: int = 50, path: Optional[Path] = None):
+        self.cap = cap
+        self.check_every = check_every
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix='goldstock_cache_', suffix='.db')
+            os.close(fd)
+        self.path = Path(path)
+        self.spilled = 0
+        self._hot: Dict[str, Any] = {}
+        self._cold_keys = set()
+        self._writes = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=OFF')
+        self._conn.execute('PRAGMA synchronous=OFF')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT)')
+        atexit.register(self.close)
+        if initial:
+            self._hot.update(initial)
+            if self.cap.exceeded():
+                self.spill()
+
+    def spill(self):
+        with self._lock:
+            if not self._hot:
+                return
+            self._conn.executemany('INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)',
+                                   ((k, json.dumps(v, ensure_ascii=False)) for k, v in self._hot.items()))
+            self._conn.commit()
+            self._cold_keys.update(self._hot)
+            self.spilled += len(self._hot)
+            logger.info(f"Memory cap of {self.cap.limit_mb:.0f} MB reached: spilled {len(self._hot)} "
+                        f"cache entries to {self.path} ({len(self._cold_keys)} on disk)")
+            self._hot.clear()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._hot:
+                return self._hot[key]
+            if key in self._cold_keys:
+                row = self._conn.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+                return json.loads(row[0])
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._hot[key] = value
+            if key in self._cold_keys:
+                self._cold_keys.discard(key)
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._writes += 1
+            if self._writes % self.check_every == 0 and self.cap.exceeded():
+                self.spill()
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key in self._hot:
+                del self._hot[key]
+            elif key in self._cold_keys:
+                self._cold_keys.discard(key)
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            else:
+                raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._hot or key in self._cold_keys
+
+    def __len__(self) -> int:
+        return len(self._hot) + len(self._cold_keys)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            keys = list(self._hot) + list(self._cold_keys)
+        return iter(keys)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Stream entries: the in-memory ones first, then the spilled ones in batches"""
+        with self._lock:
+            hot = list(self._hot.items())
+            cursor = self._conn.cursor()
+            cursor.execute('SELECT key, value FROM entries')
+        yield from hot
+        # A spill during the save re-inserts keys that were already written from memory
+        seen = {key for key, _ in hot}
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for key, value in rows:
+                if key not in seen:
+                    yield key, json.loads(value)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,167 @@
+import hashlib
+import logging
+import math
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, MutableMapping, Optional, Tuple
+
+from .shared_files import atomic_write, locked
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'GSNEG1'
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` keys at a false positive rate of `fp_rate`"""
+
+    def __init__(self, capacity: int = 20000, fp_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class NegativeIds:
+    """Cache keys known to have nothing to fetch (404 or no usable record).
+
+    Numeric keys ("goldstock_123") are bits in one bitmap per source, so
+    100k goldstock IDs take 12.5 KB instead of a null entry each in the
+    JSON page cache, and a dead ID is dropped before it is scheduled.
+    Keys that are not numbers (investing.com slugs) go into a Bloom
+    filter: a false positive skips a live slug with probability fp_rate,
+    a dead key is never fetched again. The lot is saved zlib-compressed
+    in one small binary file.
+    """
+
+    def __init__(self, bloom: Optional[BloomFilter] = None):
+        self.bitmaps: Dict[str, bytearray] = {}
+        self.bloom = bloom or BloomFilter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _split(cache_key: str) -> Tuple[str, int]:
+        source, _, tail = cache_key.rpartition('_')
+        return (source, int(tail)) if source and tail.isdigit() else (cache_key, -1)
+
+    def add(self, cache_key: str):
+        source, number = self._split(cache_key)
+        with self._lock:
+            if number < 0:
+                self.bloom.add(cache_key)
+                return
+            bitmap = self.bitmaps.setdefault(source, bytearray())
+            if number >> 3 >= len(bitmap):
+                bitmap.extend(bytes((number >> 3) + 1 - len(bitmap)))
+            bitmap[number >> 3] |= 1 << (number & 7)
+
+    def has_id(self, source: str, number: int) -> bool:
+        bitmap = self.bitmaps.get(source)
+        return bitmap is not None and number >> 3 < len(bitmap) and bool(bitmap[number >> 3] & (1 << (number & 7)))
+
+    def filter_ids(self, source: str, ids: Iterable[int]) -> Iterator[int]:
+        """The IDs not known to be dead"""
+        return (number for number in ids if not self.has_id(source, number))
+
+    def __contains__(self, cache_key: str) -> bool:
+        source, number = self._split(cache_key)
+        return cache_key in self.bloom if number < 0 else self.has_id(source, number)
+
+    def count_ids(self, source: str) -> int:
+        return sum(bin(byte).count('1') for byte in self.bitmaps.get(source, b''))
+
+    def absorb(self, cache: MutableMapping) -> int:
+        """Move the null entries of a JSON page cache in here; returns how many there were"""
+        dead = [key for key, value in cache.items() if value is None]
+        for key in dead:
+            self.add(key)
+            del cache[key]
+        return len(dead)
+
+    def dumps(self) -> bytes:
+        with self._lock:
+            parts = [struct.pack('<I', len(self.bitmaps))]
+            for source, bitmap in sorted(self.bitmaps.items()):
+                name = source.encode('utf-8')
+                parts.append(struct.pack('<HI', len(name), len(bitmap)) + name + bytes(bitmap))
+            bloom = self.bloom
+            parts.append(struct.pack('<QIII', bloom.size, bloom.hashes, bloom.capacity, bloom.count) + bytes(bloom.bits))
+        return MAGIC + zlib.compress(b''.join(parts), 9)
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'NegativeIds':
+        if not data.startswith(MAGIC):
+            raise ValueError("not a negative IDs file")
+        payload = memoryview(zlib.decompress(data[len(MAGIC):]))
+        negatives = cls()
+        (count,), offset = struct.unpack_from('<I', payload), 4
+        for _ in range(count):
+            name_len, bitmap_len = struct.unpack_from('<HI', payload, offset)
+            offset += 6
+            source = bytes(payload[offset:offset + name_len]).decode('utf-8')
+            offset += name_len
+            negatives.bitmaps[source] = bytearray(payload[offset:offset + bitmap_len])
+            offset += bitmap_len
+        size, hashes, capacity, bloom_count = struct.unpack_from('<QIII', payload, offset)
+        offset += 20
+        bloom = negatives.bloom
+        bloom.size, bloom.hashes, bloom.capacity, bloom.count = size, hashes, capacity, bloom_count
+        bloom.bits = bytearray(payload[offset:offset + (size + 7) // 8])
+        return negatives
+
+    @classmethod
+    def load(cls, path: Path) -> 'NegativeIds':
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        try:
+            return cls.loads(path.read_bytes())
+        except Exception as e:
+            logger.error(f"Failed to load negative IDs: {e}")
+            return cls()
+
+    def merge(self, other: 'NegativeIds'):
+        """Add everything other knows to be dead"""
+        with self._lock:
+            for source, theirs in other.bitmaps.items():
+                bitmap = self.bitmaps.setdefault(source, bytearray())
+                if len(theirs) > len(bitmap):
+                    bitmap.extend(bytes(len(theirs) - len(bitmap)))
+                for i, byte in enumerate(theirs):
+                    bitmap[i] |= byte
+            bloom, theirs = self.bloom, other.bloom
+            if (bloom.size, bloom.hashes) == (theirs.size, theirs.hashes):
+                bloom.bits = bytearray(a | b for a, b in zip(bloom.bits, theirs.bits))
+                bloom.count = max(bloom.count, theirs.count)
+
+    def save(self, path: Path):
+        """Write to path, keeping what other runs sharing the file have saved since it was loaded"""
+        try:
+            with locked(path):
+                if Path(path).exists():
+                    self.merge(self.load(path))
+                with atomic_write(path) as f:
+                    f.write(self.dumps())
+        except Exception as e:
+            logger.error(f"Failed to save negative IDs: {e}")
+
+    def summary(self) -> str:
+        parts = [f"{source}: {self.count_ids(source)} IDs" for source in sorted(self.bitmaps)]
+        parts.append(f"other keys: {self.bloom.count}")
+        if self.bloom.count > self.bloom.capacity:
+            parts.append(f"(Bloom filter over its capacity of {self.bloom.capacity}, expect more false positives)")
+        return ", ".join(parts)
@@ -0,0 +1,75 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PINNED = 'pinned'
+CONFIRMED = 'confirmed'
+
+class PinnedMappings:
+    """Settled company -> goldstock mappings that are never fetched or matched again.
+
+    Entries are either pinned by hand (source 'pinned') or recorded from an
+    earlier run's confident matches with --record-confirmed (source
+    'confirmed'). Lookups are by company_id; claimed_ids holds the goldstock
+    IDs those entries take, which a targeted crawl does not fetch.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.by_company: Dict[int, Dict] = {}
+        self.claimed_ids: Set[int] = set()
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for entry in json.load(f).get('mappings', []):
+                        self._add(entry)
+                logger.info(f"Loaded {len(self.by_company)} pinned mappings from {self.path}")
+            except Exception as e:
+                logger.error(f"Failed to load pinned mappings: {e}")
+
+    def _add(self, entry: Dict):
+        self.by_company[int(entry['company_id'])] = entry
+        self.claimed_ids.add(int(entry['goldstock_id']))
+
+    def __contains__(self, company_id: int) -> bool:
+        return company_id in self.by_company
+
+    def __len__(self) -> int:
+        return len(self.by_company)
+
+    def get(self, company_id: int) -> Optional[Dict]:
+        return self.by_company.get(company_id)
+
+    def known_mappings(self) -> Dict[int, Dict]:
+        """The entries in the shape match_company expects for known mappings"""
+        return self.by_company
+
+    def confirm(self, company_id: int, company_name: str, goldstock_id: str, goldstock_name: str,
+                confidence_score: float, match_method: str) -> bool:
+        """Record a match from this run; entries already in the store (pinned or confirmed) win"""
+        if company_id in self.by_company:
+            return False
+        self._add({
+            'company_id': company_id,
+            'company_name': company_name,
+            'goldstock_id': goldstock_id,
+            'goldstock_name': goldstock_name,
+            'confidence_score': confidence_score,
+            'source': CONFIRMED,
+            'match_method': match_method,
+            'confirmed_at': time.strftime('%Y-%m-%d'),
+        })
+        return True
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'mappings': [self.by_company[cid] for cid in sorted(self.by_company)]},
+                          f, indent=2, ensure_ascii=False)
+                f.write('\n')
+        except Exception as e:
+            logger.error(f"Failed to save pinned mappings: {e}")
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import serialization, stage_profiler
+from .match_cache import content_hash
+from .shared_files import locked
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Stage:
+    """One step of a run: the stages/sources it reads, the files it writes, what else its result depends on.
+
+    run is called with the results of its inputs as keyword arguments.
+    A stage with encode keeps its result in the state file so a later run
+    can hand it downstream without running the stage; one without only
+    leaves its output files behind.
+    """
+    name: str
+    run: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[Path, ...] = ()
+    key: Any = None
+    encode: Optional[Callable[[Any], Any]] = None
+    decode: Callable[[Any], Any] = lambda value: value
+
+def file_hash(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+class Pipeline:
+    """Runs stages in dependency order, skipping those whose inputs are unchanged since they last ran.
+
+    A stage's key is the hash of its inputs' digests plus its own key
+    value. When the state file has a finished run of the stage under the
+    same key, and its output files still hash to what that run wrote, the
+    stage is skipped and its recorded result used. Stages whose inputs are
+    all ready at the same time run concurrently on a small thread pool; a
+    stage that is the only thing to do runs on the calling thread. With
+    workers <= 1, or while stage_profiler is active (it tracks a single
+    current stage), every stage runs on the calling thread, one at a time.
+
+    Sources are values produced outside the pipeline (the crawl, the
+    company list) with a digest standing for their contents. With no
+    state file nothing is reused or recorded; with reuse=False every stage
+    runs and the state file is still updated. Runs sharing the state file
+    each write back only the stages they ran, over what is on disk.
+    """
+
+    def __init__(self, state_file: Optional[Path], file_format: str = serialization.JSON, workers: int = 2,
+                 reuse: bool = True, should_stop: Callable[[], bool] = lambda: False):
+        self.state_file = Path(state_file) if state_file else None
+        self.file_format = file_format
+        self.workers = workers
+        self.reuse = reuse and self.state_file is not None
+        self.should_stop = should_stop
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.digests: Dict[str, str] = {}
+        self.ran = []
+        self.skipped = []
+        self.state: Dict[str, Dict] = {}
+        self.recorded = set()
+        if self.state_file:
+            self.state = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        if not self.state_file.exists():
+            return {}
+        try:
+            return serialization.load(self.state_file, {}).get('stages', {})
+        except Exception as e:
+            logger.error(f"Failed to load pipeline state: {e}")
+            return {}
+
+    def source(self, name: str, value: Any, digest: Optional[str] = None):
+        self.results[name] = value
+        self.digests[name] = digest or content_hash(value)
+
+    def add(self, stage: Stage):
+        missing = [name for name in stage.inputs if name not in self.stages and name not in self.results]
+        if missing:
+            raise ValueError(f"stage {stage.name} reads {missing}, which are neither stages nor sources")
+        self.stages[stage.name] = stage
+
+    def previous(self, name: str) -> Any:
+        """The result a stage recorded the last time it ran, None if there is none"""
+        record = self.state.get(name)
+        if not record or 'result' not in record:
+            return None
+        return self.stages[name].decode(record['result'])
+
+    def stage_key(self, stage: Stage) -> str:
+        return content_hash(stage.name, [self.digests[name] for name in stage.inputs], stage.key)
+
+    def reusable(self, stage: Stage, key: str) -> bool:
+        record = self.state.get(stage.name)
+        if not self.reuse or not record or record['key'] != key:
+            return False
+        if stage.encode and 'result' not in record:
+            return False
+        return all(file_hash(path) == record['outputs'].get(str(path)) for path in stage.outputs)
+
+    def _finish(self, stage: Stage, key: str, result: Any):
+        if self.should_stop():
+            logger.info(f"Stage {stage.name} was interrupted; not recording its result")
+            return
+        self.results[stage.name] = result
+        encoded = stage.encode(result) if stage.encode else None
+        self.digests[stage.name] = content_hash(encoded) if stage.encode else key
+        self.ran.append(stage.name)
+        if self.state_file is None:
+            return
+        record = {
+            'key': key,
+            'finished_at': time.time(),
+            'outputs': {str(path): file_hash(path) for path in stage.outputs},
+        }
+        if stage.encode:
+            record['result'] = encoded
+        self.state[stage.name] = record
+        self.recorded.add(stage.name)
+        self.save()
+
+    def _skip(self, stage: Stage):
+        record = self.state[stage.name]
+        self.results[stage.name] = stage.decode(record['result']) if stage.encode else None
+        self.digests[stage.name] = content_hash(record['result']) if stage.encode else record['key']
+        self.skipped.append(stage.name)
+        finished = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['finished_at']))
+        logger.info(f"Stage {stage.name}: inputs unchanged since {finished}, reusing its result")
+
+    def save(self):
+        # Stages other runs recorded since this one started are kept
+        with locked(self.state_file):
+            state = self._load()
+            state.update({name: self.state[name] for name in self.recorded})
+            self.state = state
+            serialization.save(self.state_file, {'stages': self.state}, self.file_format)
+
+    def run(self) -> Dict[str, Any]:
+        """Run (or skip) every stage; returns the results by name.
+
+        Stops starting stages once should_stop() is true; a stage that
+        finishes after that is not recorded, so a half-done result is never
+        reused. Stages left out of the returned results did not complete.
+        """
+        pending = dict(self.stages)
+        running = {}
+        serial = self.workers <= 1 or stage_profiler.profiling()
+        with ThreadPoolExecutor(max(self.workers, 1), thread_name_prefix='stage') as executor:
+            while pending or running:
+                ready = [] if self.should_stop() else [
+                    stage for stage in pending.values() if all(name in self.digests for name in stage.inputs)]
+                if serial:
+                    ready = ready[:1]
+                for stage in ready:
+                    del pending[stage.name]
+                    key = self.stage_key(stage)
+                    if self.reusable(stage, key):
+                        self._skip(stage)
+                        continue
+                    kwargs = {name: self.results[name] for name in stage.inputs}
+                    if len(ready) == 1 and not running:
+                        self._finish(stage, key, stage.run(**kwargs))
+                    else:
+                        running[executor.submit(stage.run, **kwargs)] = (stage, key)
+                if not running:
+                    if self.should_stop() or not ready:
+                        break
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key = running.pop(future)
+                    self._finish(stage, key, future.result())
+        return {name: self.results[name] for name in self.ran + self.skipped}
@@ -0,0 +1,238 @@
+import argparse
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# Responses worth another attempt; everything else (including 404) is an answer
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Longest a backoff or breaker wait goes without checking should_stop
+STOP_CHECK_INTERVAL = 0.25
+
+def int_at_least(minimum: int) -> Callable[[str], int]:
+    """argparse type for an int no smaller than minimum (--max-retries, --max-attempts)"""
+    def parse(value: str) -> int:
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    parse.__name__ = 'int'
+    return parse
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {self.max_attempts}")
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class CircuitBreaker:
+    """Opens when a host's recent error rate spikes and holds every caller until a cool-down passes.
+
+    After the cool-down one probe request is let through (half-open); the
+    breaker closes if it succeeds and re-opens if it fails. Because all fetch
+    threads share the breaker, an outage pauses the whole pool instead of
+    every worker paying the timeout on every ID.
+    """
+
+    def __init__(self, host: str, window: int = 20, failure_ratio: float = 0.5,
+                 min_requests: int = 10, cooldown: float = 60):
+        self.host = host
+        self.failure_ratio = failure_ratio
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.trips = 0
+        # Summed over threads, i.e. worker-seconds spent waiting on the open breaker
+        self.wait_seconds = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._cond = threading.Condition()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_request(self, should_stop: Callable[[], bool] = lambda: False) -> bool:
+        """Block while the breaker is open (or until should_stop()); returns True if this call is the half-open probe"""
+        with self._cond:
+            if self._opened_at is None:
+                return False
+            started = time.monotonic()
+            try:
+                while self._opened_at is not None and not should_stop():
+                    remaining = self._opened_at + self.cooldown - time.monotonic()
+                    if remaining <= 0 and not self._probe_in_flight:
+                        self._probe_in_flight = True
+                        return True
+                    self._cond.wait(timeout=min(max(remaining, 0.1), STOP_CHECK_INTERVAL))
+                return False
+            finally:
+                self.wait_seconds += time.monotonic() - started
+
+    def record(self, success: bool, probe: bool = False):
+        with self._cond:
+            if probe:
+                self._probe_in_flight = False
+                if success:
+                    logger.info(f"Circuit closed for {self.host}: probe request succeeded")
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                self._cond.notify_all()
+                return
+            if self._opened_at is not None:
+                # Stragglers that were already in flight when the breaker opened
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_ratio:
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                logger.warning(f"Circuit open for {self.host}: {failures}/{len(self._outcomes)} recent "
+                               f"requests failed, pausing all workers for {self.cooldown:.0f}s")
+
+class FailureStats:
+    """Thread-safe request/failure counters for the fetch phase"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.successes = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.failures = Counter()
+
+    def record(self, success: bool, kind: Optional[str] = None):
+        with self._lock:
+            self.requests += 1
+            if success:
+                self.successes += 1
+            else:
+                self.failures[kind] += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_give_up(self):
+        with self._lock:
+            self.gave_up += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'successes': self.successes,
+                'retries': self.retries,
+                'gave_up': self.gave_up,
+                'failures': dict(self.failures),
+            }
+
+def retry_after_seconds(response: 'requests.Response') -> float:
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.isdigit() else 0.0
+
+class RetryingFetcher:
+    """GET with retries, jittered exponential backoff and a circuit breaker per host"""
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, breaker_cooldown: float = 60):
+        self.policy = policy or RetryPolicy()
+        self.breaker_cooldown = breaker_cooldown
+        self.stats = FailureStats()
+        # Optional shared request budget with an acquire() method (e.g. LeaseQueue)
+        self.rate_limiter = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(host, cooldown=self.breaker_cooldown)
+            return self._breakers[host]
+
+    def get(self, session: 'requests.Session', url: str, should_stop: Callable[[], bool] = lambda: False,
+            **kwargs) -> Optional['requests.Response']:
+        """Returns the last response (possibly a 429/5xx) or raises the last RequestException.
+
+        Backoff and breaker waits end early once should_stop() is true; the
+        last attempt's outcome is then handed back as if it were the final
+        one, and None if no request was made yet.
+        """
+        import requests
+
+        breaker = self.breaker(urlparse(url).netloc)
+        response = None
+        error = None
+        for attempt in range(1, self.policy.max_attempts + 1):
+            probe = breaker.before_request(should_stop)
+            if should_stop():
+                break
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                response = session.get(url, **kwargs)
+            except requests.RequestException as e:
+                breaker.record(False, probe)
+                self.stats.record(False, type(e).__name__)
+                if attempt == self.policy.max_attempts:
+                    self.stats.record_give_up()
+                    raise
+                error = e
+                delay = self.policy.backoff(attempt)
+                logger.debug(f"{url}: {type(e).__name__}, retry {attempt} in {delay:.1f}s")
+            else:
+                error = None
+                if response.status_code not in RETRYABLE_STATUS:
+                    breaker.record(True, probe)
+                    self.stats.record(True)
+                    return response
+                breaker.record(False, probe)
+                self.stats.record(False, str(response.status_code))
+                if attempt == self.policy.max_attempts:
+                    self.stats.record_give_up()
+                    return response
+                delay = max(self.policy.backoff(attempt),
+                            min(retry_after_seconds(response), self.policy.max_delay))
+                logger.debug(f"{url}: HTTP {response.status_code}, retry {attempt} in {delay:.1f}s")
+            if not self._sleep(delay, should_stop):
+                break
+            self.stats.record_retry()
+        if error:
+            raise error
+        return response
+
+    @staticmethod
+    def _sleep(delay: float, should_stop: Callable[[], bool]) -> bool:
+        """Sleep in short slices; False when should_stop() cut the sleep short"""
+        deadline = time.monotonic() + delay
+        while not should_stop():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, STOP_CHECK_INTERVAL))
+        return False
+
+    def summary(self) -> Dict:
+        snapshot = self.stats.snapshot()
+        snapshot['breaker_trips'] = sum(b.trips for b in self._breakers.values())
+        snapshot['breaker_wait_seconds'] = round(sum(b.wait_seconds for b in self._breakers.values()), 1)
+        return snapshot
@@ -0,0 +1,79 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+def lock_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + '.lock')
+
+@contextmanager
+def locked(path: Path):
+    """Hold an exclusive lock on path against other processes and threads.
+
+    The lock is taken on a <path>.lock file next to it, not on path
+    itself: path is replaced by atomic_write(), and a lock on the old
+    inode would not be seen by whoever opens the new one. Every opener
+    gets its own file description, so threads of one process exclude
+    each other too.
+    """
+    with open(lock_path(path), 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt gives up after ten seconds; keep waiting like flock does
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def atomic_write(path: Path, mode: str = 'wb'):
+    """A file that replaces path in one rename once it has been written completely.
+
+    Readers see the old file or the new one, never a mix or a truncated
+    file, and an exception while writing leaves path untouched. The
+    temporary file sits next to path (os.replace can't cross file
+    systems) and is named after the writing process and thread.
+    """
+    path = Path(path)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp, mode) as f:
+            yield f
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except FileNotFoundError:
+            pass
+        raise
+
+def signature(path: Path):
+    """Identity of path's current contents, None when it doesn't exist: changes whenever a process replaces it"""
+    try:
+        st = Path(path).stat()
+        return st.st_ino, st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
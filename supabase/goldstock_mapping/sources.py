@@ -0,0 +1,164 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+GOLDSTOCK_URL = "https://www.goldstockdata.com"
+INVESTING_URL = "https://www.investing.com"
+
+class SourceAdapter(ABC):
+    """One site the fetch engine can crawl.
+
+    A source defines its key space (keys()), where each key's page lives
+    (url()) and what a page yields (parse(), a JSON-able dict or None).
+    Records are cached under cache_key(), so sources share one cache
+    without colliding. The engine handles fetching, retries, caching and
+    politeness; min_interval spaces requests to the host and request_delay
+    is a random pause (seconds) before each request. An adapter missing
+    keys(), url() or parse() fails when it is created, not mid-crawl.
+    """
+    name = 'source'
+    base_url = ''
+    min_interval = 0.0
+    request_delay: Tuple[float, float] = (0, 0)
+    workers = 5
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.base_url).netloc
+
+    @abstractmethod
+    def keys(self) -> Iterable:
+        ...
+
+    @abstractmethod
+    def url(self, key) -> str:
+        ...
+
+    @abstractmethod
+    def parse(self, key, html: str) -> Optional[Dict]:
+        ...
+
+    def cache_key(self, key) -> str:
+        return f"{self.name}_{key}"
+
+    def describe(self, record: Dict) -> str:
+        """Short description of a record for the log"""
+        return str(record)
+
+class GoldstockSource(SourceAdapter):
+    """goldstockdata.com company pages, keyed by numeric goldstock ID.
+
+    parse_page is the scraper's page parser (returning a GoldstockCompany
+    or None), so each mapping script keeps its own extraction rules.
+    """
+    name = 'goldstock'
+    request_delay = (1, 2)
+    workers = 10
+
+    def __init__(self, parse_page: Callable, base_url: str = GOLDSTOCK_URL, start_id: int = 1, max_id: int = 1000):
+        self.parse_page = parse_page
+        self.base_url = base_url
+        self.start_id = start_id
+        self.max_id = max_id
+
+    def keys(self) -> Iterable[int]:
+        return range(self.start_id, self.max_id + 1)
+
+    def url(self, key: int) -> str:
+        return f"{self.base_url}/company/{key}-"
+
+    def parse(self, key: int, html: str) -> Optional[Dict]:
+        company = self.parse_page(key, html)
+        return asdict(company) if company is not None else None
+
+    def describe(self, record: Dict) -> str:
+        description = f"{record['company_name']} (Ticker: {record.get('ticker') or 'None'}"
+        if 'exchange' in record:
+            description += f", Exchange: {record['exchange'] or 'None'}"
+        return description + ")"
+
+# Corporate designators dropped for the second candidate slug, longest first
+CORPORATE_SUFFIXES = [
+    ' corporation', ' incorporated', ' limited partnership', ' limited liability company',
+    ' ltd liability co', ' limited', ' corp', ' inc', ' ltd', ' lp', ' llc', ' plc', ' co'
+]
+
+def slugify(name: str) -> str:
+    """investing.com-style slug (same rules as mapleaurum_importer/discover_investing_urls.cjs)"""
+    if not name:
+        return ''
+    slug = name.lower().replace('&amp;', 'and').replace('&', 'and')
+    slug = re.sub(r"[.,()']", '', slug)
+    slug = re.sub(r'[^a-z0-9\s-]', '', slug).strip()
+    slug = re.sub(r'\s+', '-', slug)
+    return re.sub(r'-+', '-', slug).strip('-')
+
+def slug_without_suffix(name: str) -> str:
+    lowered = (name or '').lower()
+    for suffix in CORPORATE_SUFFIXES:
+        if lowered.endswith(suffix):
+            lowered = lowered[:-len(suffix)]
+            break
+    return slugify(lowered)
+
+class InvestingSource(SourceAdapter):
+    """investing.com equity pages, keyed by candidate slugs built from company names.
+
+    Each company contributes the slug of its full name and, when it
+    differs, the slug without the corporate suffix. A page that exists
+    yields the instrument name shown on it; candidates() then scores it
+    against the companies that proposed the slug.
+    """
+    name = 'investing'
+    # The site blocks bursts; the importer scripts waited 1-5 s between requests
+    min_interval = 2.0
+    workers = 2
+
+    def __init__(self, companies: Iterable, base_url: str = INVESTING_URL):
+        self.base_url = base_url
+        self.proposed_by: Dict[str, List] = {}
+        for company in companies:
+            for slug in (slugify(company.company_name), slug_without_suffix(company.company_name)):
+                if slug and company not in self.proposed_by.setdefault(slug, []):
+                    self.proposed_by[slug].append(company)
+
+    def keys(self) -> Iterable[str]:
+        return iter(self.proposed_by)
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/equities/{key}"
+
+    def parse(self, key: str, html: str) -> Optional[Dict]:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        for selector in ['h1[data-test="instrument-header-title"]', 'h1', 'title']:
+            elem = soup.select_one(selector)
+            if elem and elem.get_text(strip=True):
+                page_name = re.sub(r'\s*\|.*$', '', elem.get_text(strip=True))
+                # Titles read "Company Name (TICK)"; the ticker is not part of the name
+                page_name = re.sub(r'\s*\([A-Z0-9.]+\)\s*$', '', page_name)
+                return {'slug': key, 'url': self.url(key), 'page_name': page_name}
+        return None
+
+    def describe(self, record: Dict) -> str:
+        return f"{record['page_name']} at {record['url']}"
+
+    def candidates(self, found: Iterable[Tuple[str, Dict]]) -> List[Dict]:
+        """One row per (company, existing page) pair, best name similarity first"""
+        rows = []
+        for slug, record in found:
+            for company in self.proposed_by.get(slug, []):
+                similarity = SequenceMatcher(None, company.company_name.lower(), record['page_name'].lower()).ratio()
+                rows.append({
+                    'company_id': company.company_id,
+                    'company_name': company.company_name,
+                    'url': record['url'],
+                    'page_name': record['page_name'],
+                    'similarity': round(similarity, 3),
+                })
+        rows.sort(key=lambda r: (r['company_id'], -r['similarity']))
+        return rows
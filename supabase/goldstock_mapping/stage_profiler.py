@@ -0,0 +1,239 @@
+import atexit
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Profiler used by the module-level stage()/section()/thread_initializer() hooks
+_active: Optional['StageProfiler'] = None
+# Callbacks run with the stage name after every stage, profiled or not
+_stage_hooks: List[Callable[[str], None]] = []
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == '~':
+        return name.replace(';', ',')
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(';', ',')
+
+def collapse_stats(stats: pstats.Stats, min_share: float = 0.0005) -> Dict[str, float]:
+    """Rebuild approximate stacks from cProfile's caller graph, in seconds per stack.
+
+    cProfile only keeps caller->callee edges, so each function's cumulative
+    time along a path is split between its own time and its callees in
+    proportion to the edge times (the approach flameprof uses).
+    """
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    total = sum(tt for _, _, tt, _, _ in stats.stats.values()) or 1.0
+    stacks = defaultdict(float)
+
+    def walk(func, path, on_path, weight):
+        _, _, tt, ct, _ = stats.stats[func]
+        if ct <= 0:
+            return
+        path = path + [_label(func)]
+        own = weight * min(tt / ct, 1.0)
+        if own > 0:
+            stacks[';'.join(path)] += own
+        for callee, edge_ct in callees[func].items():
+            child = weight * edge_ct / ct
+            if callee not in on_path and child / total >= min_share:
+                walk(callee, path, on_path | {callee}, child)
+
+    for func, (_, _, _, ct, callers) in stats.stats.items():
+        if not callers:
+            walk(func, [], {func}, ct)
+    return stacks
+
+def write_collapsed(path: Path, stacks: Dict[str, float]):
+    # flamegraph.pl / speedscope want integer sample counts; use microseconds
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, seconds in sorted(stacks.items()):
+            count = int(seconds * 1e6)
+            if count:
+                f.write(f"{stack} {count}\n")
+
+class StageProfiler:
+    """Profiles each pipeline stage on its own and writes the results to out_dir.
+
+    Deterministic mode (default) runs cProfile per stage, including the
+    threads of any pool started inside the stage, and writes
+    <stage>.pstats plus <stage>.collapsed for flame graphs. Sections
+    (e.g. 'parse' inside 'fetch') get their own files. With
+    sample_interval set, a background thread samples every thread's stack
+    instead; that costs far less but only produces .collapsed files.
+    """
+
+    def __init__(self, out_dir: Path, sample_interval: Optional[float] = None):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_interval = sample_interval
+        self.current_stage: Optional[str] = None
+        self.order: List[str] = []
+        self.wall: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._profiles: Dict[str, List[cProfile.Profile]] = defaultdict(list)
+        self._samples: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._thread_section: Dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._sampler = None
+        if sample_interval:
+            self._stop_sampling = threading.Event()
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+
+    def _record(self, name: str, seconds: float):
+        with self._lock:
+            if name not in self.wall:
+                self.order.append(name)
+            self.wall[name] += seconds
+            self.calls[name] += 1
+
+    def _enable(self, name: str) -> Optional[cProfile.Profile]:
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per process; it already sees this thread
+            return None
+        with self._lock:
+            self._profiles[name].append(profile)
+        return profile
+
+    @contextmanager
+    def stage(self, name: str):
+        """Top-level stage, entered from the main thread"""
+        self.current_stage = name
+        profile = None if self.sample_interval else self._enable(name)
+        self._local.profile = profile
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            self._local.profile = None
+            self._record(name, time.perf_counter() - started)
+            self.current_stage = None
+
+    def start_thread(self):
+        """ThreadPoolExecutor initializer: profile pool threads as part of the current stage"""
+        if not self.sample_interval and self.current_stage:
+            self._local.profile = self._enable(self.current_stage)
+
+    @contextmanager
+    def section(self, name: str):
+        """Sub-stage inside a stage, from any thread; its time is moved out of the stage profile"""
+        thread_id = threading.get_ident()
+        self._thread_section[thread_id] = name
+        outer = getattr(self._local, 'profile', None)
+        profile = None
+        if not self.sample_interval and outer:
+            outer.disable()
+            sections = self._local.__dict__.setdefault('sections', {})
+            profile = sections.get(name)
+            if profile is None:
+                profile = sections[name] = cProfile.Profile()
+                with self._lock:
+                    self._profiles[name].append(profile)
+        started = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+                outer.enable()
+            self._record(name, time.perf_counter() - started)
+            self._thread_section.pop(thread_id, None)
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while not self._stop_sampling.wait(self.sample_interval):
+            stage = self.current_stage
+            if not stage:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_label((code.co_filename, code.co_firstlineno, code.co_name)))
+                    frame = frame.f_back
+                label = self._thread_section.get(thread_id, stage)
+                self._samples[label][';'.join(reversed(stack))] += 1
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._sampler:
+            self._stop_sampling.set()
+            self._sampler.join()
+            for name, samples in self._samples.items():
+                stacks = {stack: count * self.sample_interval for stack, count in samples.items()}
+                write_collapsed(self.out_dir / f"{name}.collapsed", stacks)
+        for name, profiles in self._profiles.items():
+            stats = None
+            for profile in profiles:
+                profile.disable()
+                profile.create_stats()
+                if not profile.stats:
+                    continue
+                if stats is None:
+                    stats = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+            if stats is None:
+                continue
+            stats.dump_stats(str(self.out_dir / f"{name}.pstats"))
+            write_collapsed(self.out_dir / f"{name}.collapsed", collapse_stats(stats))
+
+        lines = [f"{'stage':<12} {'seconds':>10} {'calls':>8}"]
+        for name in self.order:
+            lines.append(f"{name:<12} {self.wall[name]:>10.2f} {self.calls[name]:>8}")
+        with open(self.out_dir / 'stages.txt', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        logger.info("Stage timings (sections are summed over threads):\n" + '\n'.join(lines))
+        logger.info(f"Profiles written to {self.out_dir}")
+
+def activate(profiler: StageProfiler):
+    global _active
+    _active = profiler
+    atexit.register(profiler.close)
+
+def profiling() -> bool:
+    return _active is not None
+
+def add_stage_hook(callback: Callable[[str], None]):
+    _stage_hooks.append(callback)
+
+@contextmanager
+def stage(name: str):
+    with _active.stage(name) if _active else nullcontext():
+        yield
+    for callback in _stage_hooks:
+        callback(name)
+
+def section(name: str):
+    return _active.section(name) if _active else nullcontext()
+
+def thread_initializer():
+    if _active:
+        _active.start_thread()
@@ -0,0 +1,76 @@
+import pytest
+import requests
+
+from goldstock_mapping.cassette import RECORD, RECORDED_LATENCY, REPLAY, ZERO_LATENCY, Cassette, CassetteMiss
+from goldstock_mapping.fixture_server import NOT_FOUND, FixtureProfile, FixtureServer
+
+PROFILE = FixtureProfile(latency='fixed', latency_ms=20, not_found_ratio=0.3, page_kb=2)
+COMPANY_ID = next(gid for gid in range(1, 100) if PROFILE.outcome(gid) != NOT_FOUND)
+MISSING_ID = next(gid for gid in range(1, 100) if PROFILE.outcome(gid) == NOT_FOUND)
+
+def fetch(session, url):
+    response = session.get(url, timeout=5)
+    return response.status_code, response.text
+
+@pytest.fixture
+def recording(tmp_path):
+    """A cassette of a company page that first failed with a 503, and a 404 page; the server is gone after"""
+    path = tmp_path / 'cassette.db'
+    server = FixtureServer(FixtureProfile(**dict(vars(PROFILE), error_ratio=1.0))).start()
+    try:
+        cassette = Cassette(path, RECORD)
+        session = requests.Session()
+        cassette.attach(session)
+        company_url, missing_url = f"{server.url}/company/{COMPANY_ID}", f"{server.url}/company/{MISSING_ID}"
+        recorded = [fetch(session, company_url)]
+        server.profile.error_ratio = 0.0
+        recorded += [fetch(session, company_url), fetch(session, missing_url)]
+        cassette.close()
+    finally:
+        server.stop()
+    assert [status for status, _ in recorded] == [503, 200, 404]
+    assert cassette.summary() == {'recorded': 3}
+    return path, company_url, missing_url, recorded
+
+def replay_session(path, latency=ZERO_LATENCY):
+    cassette = Cassette(path, REPLAY, latency)
+    session = requests.Session()
+    cassette.attach(session)
+    return cassette, session
+
+def test_replay_serves_the_recording_in_order_with_the_server_stopped(recording):
+    path, company_url, missing_url, recorded = recording
+    with pytest.raises(requests.ConnectionError):
+        requests.get(company_url, timeout=1)
+    cassette, session = replay_session(path)
+    # The 5xx replays before the page, as the retry saw it; the last exchange then repeats
+    assert [fetch(session, company_url) for _ in range(3)] == [recorded[0], recorded[1], recorded[1]]
+    assert fetch(session, missing_url) == recorded[2]
+    assert fetch(session, missing_url) == recorded[2]
+    assert f"FX{COMPANY_ID}" in recorded[1][1]
+    assert cassette.summary() == {'replayed': 5}
+
+def test_replayed_responses_look_like_live_ones(recording):
+    path, company_url, _, _ = recording
+    _, session = replay_session(path)
+    session.get(company_url, timeout=5)
+    response = session.get(company_url, timeout=5)
+    assert response.ok and response.reason == 'OK' and response.url == company_url
+    assert 'Content-Length' not in response.headers
+    assert response.headers['Content-Type'].startswith('text/html')
+
+def test_recorded_latency_is_replayed(recording):
+    path, company_url, _, _ = recording
+    _, session = replay_session(path, RECORDED_LATENCY)
+    assert session.get(company_url, timeout=5).elapsed.total_seconds() >= 0.02
+
+def test_unrecorded_request_fails_fast(recording):
+    path, company_url, _, _ = recording
+    cassette, session = replay_session(path)
+    with pytest.raises(CassetteMiss):
+        session.get(company_url + '0', timeout=5)
+    assert cassette.summary() == {'missed': 1}
+
+def test_replay_needs_a_cassette(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Cassette(tmp_path / 'missing.db', REPLAY)
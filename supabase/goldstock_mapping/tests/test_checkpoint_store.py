@@ -0,0 +1,53 @@
+import json
+
+from goldstock_mapping.checkpoint_store import CheckpointStore
+
+def rows(*company_ids, status='matched'):
+    return [{'company_id': company_id, 'match_status': status} for company_id in company_ids]
+
+def test_runs_keep_each_others_rows(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    one, other = CheckpointStore(path, owner='one'), CheckpointStore(path, owner='other')
+    one.save(rows(1, 2))
+    other.save(rows(10))
+    one.save(rows(1, 2, 3))
+    assert CheckpointStore(path, owner='one').load()['processed_ids'] == [1, 2, 3]
+    assert CheckpointStore(path, owner='other').load()['processed_ids'] == [10]
+
+def test_resume_loads_only_its_own_rows(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    script, script2 = CheckpointStore(path, owner='mapping_script'), CheckpointStore(path, owner='mapping_script2')
+    # Both scripts reach the same companies with different matches
+    script.save(rows(1, 2))
+    script2.save(rows(2, 3, status='manual'))
+    script.save(rows(1, 2, 4))
+    resumed = CheckpointStore(path, owner='mapping_script').load()
+    assert resumed == {'processed_ids': [1, 2, 4], 'mappings': rows(1, 2, 4)}
+    resumed = CheckpointStore(path, owner='mapping_script2').load()
+    assert resumed == {'processed_ids': [2, 3], 'mappings': rows(2, 3, status='manual')}
+    assert CheckpointStore(path, owner='mapping_script --limit 50').load()['mappings'] == []
+
+def test_clear_removes_only_the_finished_runs_rows(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    one, other = CheckpointStore(path, owner='one'), CheckpointStore(path, owner='other')
+    one.save(rows(1, 2))
+    other.save(rows(2, 10))
+    one.clear([1, 2])
+    assert CheckpointStore(path, owner='other').load()['processed_ids'] == [2, 10]
+    other.clear([2, 10])
+    assert not path.exists()
+
+def test_untagged_rows_are_not_resumed_and_go_on_clear(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    path.write_text(json.dumps({'processed_ids': [7], 'mappings': rows(7)}))
+    store = CheckpointStore(path, owner='one')
+    assert store.load()['mappings'] == []
+    store.save(rows(1))
+    store.clear([1])
+    assert not path.exists()
+
+def test_missing_or_broken_checkpoint_loads_empty(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    assert CheckpointStore(path).load() == {'processed_ids': [], 'mappings': []}
+    path.write_text('{not json')
+    assert CheckpointStore(path).load() == {'processed_ids': [], 'mappings': []}
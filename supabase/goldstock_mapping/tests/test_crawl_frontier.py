@@ -0,0 +1,88 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from goldstock_mapping.crawl_frontier import DONE, FAILED, IN_FLIGHT, PENDING, STALE_SECONDS, CrawlFrontier, owner_alive
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def set_row(frontier, goldstock_id, state, owner, updated_at=None):
+    frontier._connection().execute('UPDATE frontier SET state = ?, owner = ?, updated_at = ? WHERE goldstock_id = ?',
+                                   (state, owner, time.time() if updated_at is None else updated_at, goldstock_id))
+
+def state_of(frontier, goldstock_id):
+    return frontier._connection().execute('SELECT state FROM frontier WHERE goldstock_id = ?',
+                                          (goldstock_id,)).fetchone()[0]
+
+@pytest.fixture
+def frontier(tmp_path):
+    frontier = CrawlFrontier(tmp_path / 'frontier.db', max_attempts=2)
+    frontier.seed(1, 10)
+    return frontier
+
+def test_resumes_where_it_stopped(frontier):
+    frontier.mark_done_many([1, 2])
+    assert frontier.claim(3)
+    frontier.mark_failed(3, 'timeout')
+    assert frontier.done_ids(1, 10) == [1, 2]
+    assert frontier.next_ids(1, 10) == list(range(3, 11))
+    assert frontier.claim(3)
+    frontier.mark_failed(3, 'timeout')
+    # Out of attempts
+    assert 3 not in frontier.next_ids(1, 10)
+    assert frontier.counts()[FAILED] == 1 and frontier.counts()['gave_up'] == 1
+
+def test_claim_is_exclusive_between_runs(tmp_path, frontier):
+    other = CrawlFrontier(tmp_path / 'frontier.db')
+    other.owner = f"{socket.gethostname()}:{os.getppid()}"
+    assert other.claim(5)
+    assert not frontier.claim(5)
+    assert frontier.held_elsewhere(5)
+    other.mark_done(5)
+    # Done by a live run that may not have saved the page yet
+    assert not frontier.claim(5)
+    assert frontier.claimed_elsewhere([4, 5, 6]) == [5]
+
+def test_rows_of_a_dead_run_can_be_taken_over(frontier):
+    set_row(frontier, 5, IN_FLIGHT, f"{socket.gethostname()}:{dead_pid()}")
+    assert not frontier.held_elsewhere(5)
+    assert frontier.claim(5)
+    assert state_of(frontier, 5) == IN_FLIGHT
+
+def test_startup_requeues_only_the_in_flight_rows_of_stopped_runs(tmp_path, frontier):
+    host = socket.gethostname()
+    set_row(frontier, 1, IN_FLIGHT, f"{host}:{dead_pid()}")
+    set_row(frontier, 2, IN_FLIGHT, f"{host}:{os.getppid()}")
+    set_row(frontier, 3, IN_FLIGHT, None)
+    set_row(frontier, 4, IN_FLIGHT, 'elsewhere:1', time.time() - STALE_SECONDS - 1)
+    set_row(frontier, 5, IN_FLIGHT, 'elsewhere:1')
+    restarted = CrawlFrontier(tmp_path / 'frontier.db')
+    assert [state_of(restarted, gid) for gid in range(1, 6)] == [PENDING, IN_FLIGHT, PENDING, PENDING, IN_FLIGHT]
+
+def test_owner_alive():
+    host = socket.gethostname()
+    assert not owner_alive(None, time.time())
+    assert owner_alive(f"{host}:{os.getpid()}", None)
+    assert not owner_alive(f"{host}:{dead_pid()}", time.time())
+    assert owner_alive('elsewhere:1', time.time())
+    assert not owner_alive('elsewhere:1', time.time() - STALE_SECONDS - 1)
+
+def test_frontier_without_owner_column_is_upgraded(tmp_path):
+    import sqlite3
+    path = tmp_path / 'old.db'
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE frontier (goldstock_id INTEGER PRIMARY KEY, state TEXT NOT NULL DEFAULT 'pending', "
+                 "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, updated_at REAL)")
+    conn.execute("INSERT INTO frontier (goldstock_id, state) VALUES (1, 'in_flight'), (2, 'done')")
+    conn.commit()
+    conn.close()
+    frontier = CrawlFrontier(path)
+    assert state_of(frontier, 1) == PENDING and state_of(frontier, 2) == DONE
+    assert frontier.claim(1)
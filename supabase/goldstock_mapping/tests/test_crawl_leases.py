@@ -0,0 +1,72 @@
+import pytest
+
+from goldstock_mapping.crawl_leases import LeaseQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = LeaseQueue(tmp_path / 'leases.db', lease_seconds=60, max_attempts=2)
+    queue.seed(1, 250, chunk_size=100)
+    return queue
+
+def expire(queue, lease):
+    queue._connection().execute('UPDATE chunks SET lease_expires = 0 WHERE chunk_id = ?', (lease.chunk_id,))
+
+def test_seed_splits_and_extends(queue):
+    assert queue.progress() == {'pending': 3, 'leased': 0, 'done': 0}
+    assert queue.seed(1, 250, chunk_size=100) == 0
+    assert queue.seed(1, 300, chunk_size=100) == 1
+    ranges = queue._connection().execute('SELECT start_id, end_id FROM chunks ORDER BY chunk_id').fetchall()
+    assert ranges == [(1, 100), (101, 200), (201, 250), (251, 300)]
+
+def test_claims_are_exclusive_until_done(queue):
+    leases = [queue.claim(f"worker-{i}") for i in range(4)]
+    assert [(lease.start_id, lease.end_id) for lease in leases[:3]] == [(1, 100), (101, 200), (201, 250)]
+    assert leases[3] is None
+    assert not queue.is_drained()
+    for lease in leases[:3]:
+        assert queue.complete(lease, {lease.start_id: {'company_name': 'Alpha'}, lease.end_id: None}, [])
+    assert queue.is_drained()
+    assert queue.results_for(1, 100) == {1: {'company_name': 'Alpha'}, 100: None}
+    assert len(queue.all_results()) == 6
+
+def test_expired_lease_is_re_leased(queue):
+    first = queue.claim('worker-a')
+    assert queue.renew(first)
+    expire(queue, first)
+    second = queue.claim('worker-b')
+    assert (second.chunk_id, second.owner, second.attempts) == (first.chunk_id, 'worker-b', 2)
+    assert not queue.renew(first)
+    assert queue.renew(second)
+
+def test_stale_complete_is_rejected(queue):
+    first = queue.claim('worker-a')
+    expire(queue, first)
+    second = queue.claim('worker-b')
+    # worker-a checked its heartbeat before the lease ran out and hands back anyway
+    assert not queue.complete(first, {1: {'company_name': 'Stale'}}, [2])
+    assert queue.results_for(1, 100) == {}
+    row = queue._connection().execute('SELECT status, owner FROM chunks WHERE chunk_id = ?',
+                                      (second.chunk_id,)).fetchone()
+    assert row == ('leased', 'worker-b')
+    queue.release(first)
+    assert queue.renew(second)
+    assert queue.complete(second, {1: {'company_name': 'Fresh'}}, [])
+    assert queue.results_for(1, 1) == {1: {'company_name': 'Fresh'}}
+
+def test_failed_ids_retry_then_give_up(queue):
+    lease = queue.claim('worker-a')
+    assert queue.complete(lease, {1: None}, [2, 3])
+    assert queue.progress()['pending'] == 3
+    retry = queue.claim('worker-b')
+    assert (retry.chunk_id, retry.attempts) == (lease.chunk_id, 2)
+    assert queue.complete(retry, {2: None}, [3])
+    status = queue._connection().execute('SELECT status FROM chunks WHERE chunk_id = ?',
+                                         (lease.chunk_id,)).fetchone()
+    assert status == ('done',)
+
+def test_release_hands_the_chunk_back(queue):
+    lease = queue.claim('worker-a')
+    queue.release(lease)
+    again = queue.claim('worker-b')
+    assert (again.chunk_id, again.owner) == (lease.chunk_id, 'worker-b')
+    assert not queue.complete(lease, {}, [])
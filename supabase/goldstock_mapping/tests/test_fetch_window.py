@@ -0,0 +1,84 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from goldstock_mapping.fetch_window import bounded_map
+
+class Tracker:
+    """fn for bounded_map that records how many calls run at once and how far the input was drawn"""
+
+    def __init__(self, fail_on=None):
+        self.lock = threading.Lock()
+        self.running = self.peak = self.started = self.finished = self.drawn = 0
+        self.fail_on = fail_on
+
+    def items(self, count):
+        for item in range(count):
+            self.drawn += 1
+            yield item
+
+    def __call__(self, item):
+        with self.lock:
+            self.started += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(random.uniform(0, 0.005))
+            if item == self.fail_on:
+                raise RuntimeError(f"item {item} failed")
+            return item * 10
+        finally:
+            with self.lock:
+                self.running -= 1
+                self.finished += 1
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_at_most_window_items_in_flight(ordered):
+    tracker = Tracker()
+    with ThreadPoolExecutor(8) as executor:
+        for item, future in bounded_map(executor, tracker, tracker.items(60), 3, ordered=ordered):
+            # Nothing is drawn from the input beyond the window
+            assert tracker.drawn <= tracker.finished + 3
+            assert future.result() == item * 10
+    assert tracker.peak <= 3
+    assert tracker.started == 60
+
+def test_ordered_results_come_back_in_input_order():
+    tracker = Tracker()
+    with ThreadPoolExecutor(4) as executor:
+        results = [(item, future.result())
+                   for item, future in bounded_map(executor, tracker, tracker.items(40), 8, ordered=True)]
+    assert results == [(item, item * 10) for item in range(40)]
+
+def test_unordered_yields_every_item_once():
+    with ThreadPoolExecutor(4) as executor:
+        items = sorted(item for item, _ in bounded_map(executor, Tracker(), range(40), 8))
+    assert items == list(range(40))
+
+def test_an_item_failing_propagates_and_leaves_no_threads_running():
+    tracker = Tracker(fail_on=5)
+    before = set(threading.enumerate())
+    with pytest.raises(RuntimeError, match='item 5 failed'):
+        with ThreadPoolExecutor(2, thread_name_prefix='window-test') as executor:
+            for _, future in bounded_map(executor, tracker, tracker.items(1000), 4, ordered=True):
+                future.result()
+    # The queued items were cancelled rather than run to the end of the input
+    assert tracker.started < 20 and tracker.drawn < 20
+    assert tracker.running == 0
+    assert not [thread for thread in set(threading.enumerate()) - before if thread.is_alive()]
+
+def test_should_stop_cancels_the_queue():
+    tracker = Tracker()
+    stop = threading.Event()
+    seen = []
+    with ThreadPoolExecutor(2) as executor:
+        for item, future in bounded_map(executor, tracker, tracker.items(1000), 4, ordered=True,
+                                        should_stop=stop.is_set, poll_interval=0.01):
+            seen.append(item)
+            if item == 3:
+                stop.set()
+    assert seen == [0, 1, 2, 3]
+    assert tracker.started < 10
@@ -0,0 +1,17 @@
+import pytest
+
+from goldstock_mapping import mapping_script, mapping_script2
+from goldstock_mapping.fixture_server import FixtureProfile, render_page
+
+@pytest.mark.parametrize('script', [mapping_script, mapping_script2])
+def test_scrapers_read_a_clean_ticker(script):
+    profile = FixtureProfile(page_kb=4)
+    scraper = script.GoldstockScraper(script.CompanyMatcher())
+    company = scraper.parse_company_page(289, render_page(profile, 289).decode('utf-8'))
+    assert company.company_name == profile.company_name(289)
+    assert company.ticker == profile.ticker(289)
+    assert company.listings == [['TSXV', profile.ticker(289)]]
+
+def test_nameless_page_has_no_company():
+    scraper = mapping_script2.GoldstockScraper(mapping_script2.CompanyMatcher())
+    assert scraper.parse_company_page(7, render_page(FixtureProfile(), 7, nameless=True).decode('utf-8')) is None
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from goldstock_mapping import fuzzy_engine
+from goldstock_mapping.fuzzy_engine import FuzzywuzzyEngine, RapidfuzzEngine
+from goldstock_mapping.mapping_script2 import normalize_name
+
+COMPANIES_FILE = Path(__file__).resolve().parents[2] / 'companiesIDsTickers.json'
+
+# Names the matcher sees, misspelt, reordered, accented, abbreviated or blank
+QUERIES = [
+    'Aberdeen International', 'Irving Resources Inc', 'Resources Irving', 'Aberden Internacional',
+    'Agnico Eagle Mines Limited', 'Eagle Agnico', 'Barrick Gold Corporation', 'Kinross', 'B2Gold',
+    'Société Minière Québec', 'Mines d\'Or Wesdome', 'First Quantum', 'Teck', 'Gold', 'Silver Corp',
+    'Osisko Mining Inc.', 'Osisko Gold Royalties', 'New Gold', 'Newgold', 'IAMGOLD', 'Lundin Gold',
+    'Equinox', 'Hudbay', 'Ero Copper', 'Capstone Copper Corp.', 'Alpha Beta Copper', 'ABC', 'X', '', '&',
+]
+
+@pytest.fixture(scope='module')
+def choices():
+    return [normalize_name(company['company_name']) for company in json.loads(COMPANIES_FILE.read_text())]
+
+def queries():
+    return [normalize_name(query) for query in QUERIES]
+
+@pytest.mark.skipif(not fuzzy_engine.available(fuzzy_engine.RAPIDFUZZ), reason='rapidfuzz is not installed')
+@pytest.mark.parametrize('use_numpy', [True, False], ids=['cdist', 'extract'])
+def test_rapidfuzz_compat_matches_fuzzywuzzy(choices, use_numpy):
+    reference = FuzzywuzzyEngine(prune=False)
+    engine = RapidfuzzEngine(fuzzy_engine.COMPAT)
+    engine._numpy = use_numpy and engine._numpy
+    for query in queries():
+        assert engine.top(query, choices, 5) == reference.top(query, choices, 5), query
+
+@pytest.mark.skipif(not fuzzy_engine.available(fuzzy_engine.RAPIDFUZZ), reason='rapidfuzz is not installed')
+def test_differential_reports_no_differences(choices):
+    engines = [FuzzywuzzyEngine(prune=True), RapidfuzzEngine(fuzzy_engine.COMPAT)]
+    for row in fuzzy_engine.differential(queries(), choices, engines, FuzzywuzzyEngine(prune=False), 5):
+        assert (row['top_k_differs'], row['pick_differs'], row['max_score_delta']) == (0, 0, 0), row['engine']
+
+# Very short names, and names that differ only in length or in their spaces
+EDGE_CHOICES = ['a', 'ab', 'abc', 'abcd', 'abcde', 'gold', 'golden', 'goldgold', 'gold gold', 'gold gold gold',
+                'gold corp', 'goldcorp', 'x y', 'xy', 'x', 'aaaa', 'aaaaaaaa', 'aaaaaaaaaaaaaaaa', '']
+EDGE_QUERIES = ['a', 'ab', 'abcd', 'gold', 'gold gold', 'goldcorp', 'gold corp', 'xy', 'x y', 'aaaa', 'aaaaaaaa', '']
+
+def kept(top, score_cutoff):
+    return [item for item in top if item[1] >= score_cutoff]
+
+@pytest.mark.parametrize('score_cutoff', [70, 80])
+@pytest.mark.parametrize('k', [1, 5])
+def test_pruning_is_lossless(choices, score_cutoff, k):
+    reference, pruned = FuzzywuzzyEngine(prune=False), FuzzywuzzyEngine(prune=True)
+    for names, sample in ((choices, queries()), (EDGE_CHOICES, EDGE_QUERIES)):
+        for query in sample:
+            expected = kept(reference.top(query, names, k), score_cutoff)
+            assert kept(pruned.top(query, names, k, score_cutoff), score_cutoff) == expected, query
+    assert pruned.skipped > 0
+
+def test_length_bound_is_never_exceeded():
+    from fuzzywuzzy import fuzz
+    processed = [fuzzy_engine.token_sort_choice(choice) for choice in EDGE_CHOICES]
+    buckets = fuzzy_engine.LengthBuckets(processed)
+    for query in map(fuzzy_engine.token_sort_query, EDGE_QUERIES):
+        for bound, members in buckets.ordered(query):
+            assert all(fuzz.ratio(query, processed[idx]) <= bound for idx in members), query
@@ -0,0 +1,63 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from goldstock_mapping import mapping_script, mapping_script2
+from goldstock_mapping.listings import canonical_exchange, exchange_of, extract_listings
+
+@pytest.mark.parametrize('code, exchange', [
+    ('CVE:ABC', 'TSXV'), ('TSE:ABC', 'TSX'), ('cnsx:abc', 'CSE'), ('OTCQX:ABCDF', 'OTC'),
+    ('ABC.V', 'TSXV'), ('ABC.TO', 'TSX'), ('ABC.CN', 'CSE'), ('ABC.NE', 'NEO'),
+    ('ABC', ''), ('ABC.WT', ''), ('XYZ:ABC', ''), (None, ''), ('', ''),
+])
+def test_exchange_of(code, exchange):
+    assert exchange_of(code) == exchange
+
+def test_canonical_exchange():
+    assert canonical_exchange(' nyse  american ') == 'NYSEAMERICAN'
+    assert canonical_exchange('Pink') == 'OTC'
+    assert canonical_exchange('Moon') == '' and canonical_exchange(None) == ''
+
+def test_extract_listings_in_page_order_each_once():
+    soup = BeautifulSoup(
+        '<table><tr><td>Symbol</td><td>OTCQX: ABCDF</td></tr></table>'
+        '<p>TSXV:ABC</p><p>Also ABC.V and XYZ.TO, Frankfurt FRA:A1B</p>'
+        '<p>Our aim: To grow. TSXV:ABC again.</p>', 'html.parser')
+    assert extract_listings(soup) == [['OTC', 'ABCDF'], ['TSXV', 'ABC'], ['TSX', 'XYZ'], ['FSE', 'A1B']]
+
+def test_extract_listings_without_any():
+    assert extract_listings(BeautifulSoup('<p>No symbols here: none.</p>', 'html.parser')) == []
+
+@pytest.fixture(params=[mapping_script, mapping_script2], ids=lambda script: script.__name__.rsplit('.', 1)[-1])
+def script(request):
+    return request.param
+
+def goldstock(script, goldstock_id, name, ticker, listings):
+    return script.GoldstockCompany(goldstock_id=goldstock_id, company_name=name, ticker=ticker, listings=listings)
+
+def test_foreign_listing_sharing_a_canadian_symbol_is_no_ticker_match(script):
+    # Only an unrelated US company lists ABC; the TSXV issuer isn't in the index
+    index = script.build_match_index([goldstock(script, '7', 'American Bio Corp', 'ABC', [['NYSE', 'ABC']])])
+    for tsx_code in ('ABC.V', 'ABC'):
+        mapping = script.match_company(script.Company(1, 'Alpha Beta Copper Ltd', tsx_code), index, {})
+        assert mapping.match_method != 'exact_ticker'
+        assert mapping.goldstock_id != '7'
+
+def test_foreign_listing_still_matches_on_its_own_exchange(script):
+    index = script.build_match_index([goldstock(script, '7', 'Alpha Beta Copper', None, [['OTC', 'ABCDF']])])
+    mapping = script.match_company(script.Company(1, 'Alpha Beta Copper', 'OTC:ABCDF'), index, {})
+    assert (mapping.goldstock_id, mapping.match_method) == ('7', 'exact_ticker')
+
+def test_canadian_listing_wins_over_a_foreign_one(script):
+    index = script.build_match_index([
+        goldstock(script, '3', 'American Bio Corp', 'ABC', [['NYSE', 'ABC']]),
+        goldstock(script, '9', 'Alpha Beta Copper', 'FRA:X9Y', [['FSE', 'X9Y'], ['TSXV', 'ABC']]),
+    ])
+    for tsx_code in ('ABC.V', 'ABC'):
+        mapping = script.match_company(script.Company(1, 'Alpha Beta Copper Ltd', tsx_code), index, {})
+        assert (mapping.goldstock_id, mapping.match_method, mapping.confidence_score) == ('9', 'exact_ticker', 100)
+
+def test_bare_ticker_of_an_entry_without_listings_still_matches(script):
+    # Entries cached before listings were recorded only have their first ticker
+    index = script.build_match_index([goldstock(script, '7', 'Alpha Beta Copper', 'ABC', None)])
+    mapping = script.match_company(script.Company(1, 'Alpha Beta Copper Ltd', 'ABC.V'), index, {})
+    assert (mapping.goldstock_id, mapping.match_method) == ('7', 'exact_ticker')
@@ -0,0 +1,59 @@
+import csv
+from dataclasses import dataclass
+
+from goldstock_mapping.mapping_delta import DELETE, UPSERT, row_hashes, save_delta
+
+@dataclass
+class Row:
+    company_id: int
+    company_name: str = 'Company'
+    tsx_code: str = 'ABC'
+    goldstock_id: str = '1'
+    goldstock_name: str = 'Company Inc'
+    match_status: str = 'matched'
+    confidence_score: float = 100
+    match_method: str = 'ticker'
+
+def read(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row['company_id']: row for row in csv.DictReader(f)}
+
+def test_first_export_is_all_upserts(tmp_path):
+    path = tmp_path / 'delta.csv'
+    stats = save_delta(path, [Row(1), Row(2)], None)
+    assert stats == {UPSERT: 2}
+    assert {row['change'] for row in read(path).values()} == {UPSERT}
+
+def test_only_changed_rows_and_deletes_are_written(tmp_path):
+    path = tmp_path / 'delta.csv'
+    previous = row_hashes([Row(1), Row(2), Row(3)])
+    stats = save_delta(path, [Row(1), Row(2, goldstock_id='9')], previous)
+    assert stats == {UPSERT: 1, DELETE: 1}
+    rows = read(path)
+    assert rows['2']['change'] == UPSERT and rows['2']['goldstock_id'] == '9'
+    assert rows['3']['change'] == DELETE
+    assert '1' not in rows
+
+def test_partial_export_deletes_nothing(tmp_path):
+    path = tmp_path / 'delta.csv'
+    previous = row_hashes([Row(i) for i in range(1, 101)])
+    stats = save_delta(path, [Row(1, match_method='fuzzy_name'), Row(2)], previous, partial=True)
+    assert stats == {UPSERT: 1}
+    assert list(read(path)) == ['1']
+
+def test_partial_export_keeps_the_rest_for_the_next_diff(tmp_path):
+    previous = row_hashes([Row(1), Row(2), Row(3)])
+    recorded = row_hashes([Row(1, goldstock_id='7')], previous)
+    assert recorded.keys() == previous.keys()
+    assert recorded['1'] != previous['1'] and recorded['2'] == previous['2']
+    # The next full export still sees company 3 go
+    stats = save_delta(tmp_path / 'delta.csv', [Row(1, goldstock_id='7'), Row(2)], recorded)
+    assert stats == {DELETE: 1}
+
+def test_pending_delta_is_merged_newest_change_winning(tmp_path):
+    path = tmp_path / 'delta.csv'
+    save_delta(path, [Row(1), Row(2)], None)
+    save_delta(path, [Row(1, goldstock_id='5')], row_hashes([Row(1), Row(2)]))
+    rows = read(path)
+    assert rows['1']['goldstock_id'] == '5'
+    assert rows['2']['change'] == DELETE
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+from goldstock_mapping.match_cache import MatchCache
+
+def company(company_id=1, name='Alpha Gold', tsx_code='AGX'):
+    return SimpleNamespace(company_id=company_id, company_name=name, tsx_code=tsx_code)
+
+MAPPING = {'company_id': 1, 'goldstock_id': 7, 'match_status': 'matched'}
+
+def saved_cache(path, index_fp='idx-1'):
+    cache = MatchCache(path, index_fp)
+    cache.put(company(), MAPPING)
+    cache.save()
+    return cache
+
+def test_unchanged_company_is_reused(tmp_path):
+    path = tmp_path / 'cache.json'
+    saved_cache(path)
+    cache = MatchCache(path, 'idx-1')
+    assert cache.get(company()) == MAPPING
+    assert cache.reused == 1
+
+def test_edited_company_or_new_index_recomputes(tmp_path):
+    path = tmp_path / 'cache.json'
+    saved_cache(path)
+    assert MatchCache(path, 'idx-1').get(company(name='Alpha Gold Corp')) is None
+    assert MatchCache(path, 'idx-1').get(company(tsx_code='AGY')) is None
+    assert MatchCache(path, 'idx-2').get(company()) is None
+    assert MatchCache(path, 'idx-1').get(company(company_id=2)) is None
+
+def test_save_keeps_other_runs_entries(tmp_path):
+    path = tmp_path / 'cache.json'
+    one, other = MatchCache(path, 'idx-1'), MatchCache(path, 'idx-1')
+    one.put(company(1), MAPPING)
+    other.put(company(2, 'Beta Silver', 'BSX'), {'company_id': 2})
+    one.save()
+    other.save()
+    cache = MatchCache(path, 'idx-1')
+    assert cache.get(company(1)) == MAPPING
+    assert cache.get(company(2, 'Beta Silver', 'BSX')) == {'company_id': 2}
+
+def test_broken_file_loads_empty(tmp_path):
+    path = tmp_path / 'cache.json'
+    path.write_text('{not json')
+    assert MatchCache(path, 'idx-1').entries == {}
+
+def test_carry_over_reuses_unaffected_entries_under_the_new_index(tmp_path):
+    path = tmp_path / 'cache.json'
+    saved_cache(path, 'idx-1')
+    cache = MatchCache(path, 'idx-2')
+    cache.carry_over('idx-1', lambda c, mapping: mapping['goldstock_id'] == 7)
+    assert cache.get(company()) == MAPPING
+    assert cache.carried == 1 and cache.reused == 0
+    cache.save()
+    again = MatchCache(path, 'idx-2')
+    assert again.get(company()) == MAPPING
+    assert again.reused == 1
+
+def test_carry_over_skips_affected_or_older_entries(tmp_path):
+    path = tmp_path / 'cache.json'
+    saved_cache(path, 'idx-1')
+    cache = MatchCache(path, 'idx-2')
+    cache.carry_over('idx-1', lambda c, mapping: False)
+    assert cache.get(company()) is None
+    cache = MatchCache(path, 'idx-3')
+    cache.carry_over('idx-2', lambda c, mapping: True)
+    assert cache.get(company()) is None
+    assert cache.carried == 0
+
+def test_alternating_scripts_keep_their_caches_warm(tmp_path, monkeypatch):
+    from goldstock_mapping import mapping_script, mapping_script2
+    assert mapping_script.MATCH_CACHE_FILE != mapping_script2.MATCH_CACHE_FILE
+    monkeypatch.chdir(tmp_path)
+    runs = [(mapping_script.MATCH_CACHE_FILE, 'idx-script'), (mapping_script2.MATCH_CACHE_FILE, 'idx-script2')]
+    for round_no in range(3):
+        for path, index_fp in runs:
+            cache = MatchCache(path, index_fp)
+            if round_no:
+                assert cache.get(company()) == MAPPING
+            else:
+                cache.put(company(), MAPPING)
+            cache.save()
@@ -0,0 +1,41 @@
+import pytest
+
+from goldstock_mapping import mapping_script, mapping_script2
+
+@pytest.fixture(params=[mapping_script, mapping_script2], ids=lambda script: script.__name__.rsplit('.', 1)[-1])
+def script(request, tmp_path, monkeypatch):
+    # The matching writes its CSV and checkpoint into the working directory
+    monkeypatch.chdir(tmp_path)
+    return request.param
+
+def goldstock(script):
+    names = [('11', 'Alpha Gold Corp', 'AGX'), ('12', 'Beta Silver Inc', 'BSV'), ('13', 'Gamma Copper Ltd', None),
+             ('14', 'Delta Mining Corp', 'DMC'), ('15', 'Alpha Goldfields Ltd', 'AGF')]
+    return [script.GoldstockCompany(goldstock_id=gid, company_name=name, ticker=ticker) for gid, name, ticker in names]
+
+def companies(script):
+    rows = [
+        (1, 'Alpha Gold Corp.', 'AGX.V'), (2, 'Gamma Copper', None), (3, 'ALPHA GOLD CORP', 'AGX.V'),
+        (4, 'Unknown Explorer', 'UNK.CN'), (5, 'Gamma Copper', None), (6, 'Alpha Gold Corp.', 'AGX.TO'),
+        (7, 'Unknown Explorer', 'UNK.CN'), (8, 'Alpha Gold Corp.', 'AGX.V'), (9, 'Delta Minng', None),
+        (10, 'Delta Minng', None), (11, 'Gamma Copper', None),
+    ]
+    return [script.Company(company_id=cid, company_name=name, tsx_code=code) for cid, name, code in rows]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_duplicate_keys_fan_back_out_in_input_order(script, workers):
+    goldstock_companies = goldstock(script)
+    index = script.build_match_index(goldstock_companies)
+    # Company 5 is pinned: it keeps its own row even though 2 and 11 share its key
+    known = {5: {'goldstock_id': '14', 'goldstock_name': 'Delta Mining Corp', 'confidence_score': 100}}
+    rows = companies(script)
+    assert len({script.match_key(company) for company in rows}) < len(rows)
+
+    expected = [script.match_company(company, index, known, top_k=3) for company in rows]
+    matcher = script.CompanyMatcher(cache_file=None)
+    got = script.perform_matching(rows, goldstock_companies, known, matcher, index=index, match_workers=workers,
+                                  top_k=3)
+    assert got == expected
+    assert [mapping.company_id for mapping in got] == [company.company_id for company in rows]
+    assert got[4].match_method == 'known_mapping'
+    assert got[1].goldstock_id == got[10].goldstock_id == '13'
@@ -0,0 +1,91 @@
+import json
+import threading
+import urllib.request
+from urllib.parse import urlencode
+
+import pytest
+
+from goldstock_mapping import mapping_script2
+from goldstock_mapping.match_service import MatchService, WarmIndex
+from goldstock_mapping.pinned_mappings import CONFIRMED
+
+CACHE = {f"goldstock_{gid}": {'goldstock_id': str(gid), 'company_name': name, 'ticker': None}
+         for gid, name in [(11, 'Alpha Gold Corp'), (12, 'Beta Silver Inc'), (13, 'Gamma Copper Ltd')]}
+
+def pins(goldstock_id, goldstock_name):
+    return {'mappings': [{'company_id': 1, 'company_name': 'Alpha Gold', 'goldstock_id': goldstock_id,
+                          'goldstock_name': goldstock_name, 'confidence_score': 96, 'source': CONFIRMED}]}
+
+class PausingScript:
+    """mapping_script2, with match_company held until the test lets it go"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.seen = []
+
+    def __getattr__(self, name):
+        return getattr(mapping_script2, name)
+
+    def match_company(self, company, index, known_mappings, top_k=0):
+        self.seen.append((index, known_mappings))
+        self.entered.set()
+        assert self.proceed.wait(10)
+        return mapping_script2.match_company(company, index, known_mappings, top_k)
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / 'cache.json').write_text(json.dumps(CACHE))
+    (tmp_path / 'pinned.json').write_text(json.dumps(pins('11', 'Alpha Gold Corp')))
+    return tmp_path / 'cache.json', tmp_path / 'pinned.json'
+
+@pytest.fixture
+def serve():
+    services = []
+
+    def start(warm):
+        service = MatchService(warm, port=0)
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+        services.append(service)
+        return service
+    yield start
+    for service in services:
+        service.shutdown()
+
+def get(service, **params):
+    with urllib.request.urlopen(f"{service.url}/match?{urlencode(params)}", timeout=10) as response:
+        return json.loads(response.read())
+
+def test_confirmed_pin_is_served_as_batch_mode_writes_it(files, serve):
+    warm = WarmIndex(mapping_script2, *files)
+    warm.refresh()
+    row = get(serve(warm), company_name='Alpha Gold', company_id=1)
+    assert (row['goldstock_id'], row['match_method']) == ('11', 'confirmed_mapping')
+
+def test_reload_during_a_request_answers_from_one_generation(files, serve):
+    cache_file, pinned_file = files
+    script = PausingScript()
+    warm = WarmIndex(script, cache_file, pinned_file)
+    warm.refresh()
+    old = warm.state
+    service = serve(warm)
+    result = {}
+    request = threading.Thread(target=lambda: result.update(get(service, company_name='Alpha Gold', company_id=1)))
+    request.start()
+    assert script.entered.wait(10)
+
+    # The pin moves and a company disappears while the request is being matched
+    pinned_file.write_text(json.dumps(pins('13', 'Gamma Copper Ltd')))
+    cache_file.write_text(json.dumps({key: CACHE[key] for key in ('goldstock_12', 'goldstock_13')}))
+    assert warm.refresh(force=True)
+    assert warm.state is not old
+    script.proceed.set()
+    request.join(10)
+
+    index, known_mappings = script.seen[0]
+    assert index is old.index and known_mappings is old.known_mappings
+    assert result['goldstock_id'] == '11'
+    row = get(service, company_name='Alpha Gold', company_id=1)
+    index, known_mappings = script.seen[-1]
+    assert index is warm.state.index and known_mappings is warm.state.known_mappings
+    assert row['goldstock_id'] == '13'
@@ -0,0 +1,42 @@
+import io
+import json
+from dataclasses import asdict
+
+import pytest
+
+from goldstock_mapping import mapping_script, mapping_script2
+from goldstock_mapping.match_service import WarmIndex
+from goldstock_mapping.match_stream import stream_matches
+from goldstock_mapping.pinned_mappings import CONFIRMED, PINNED
+
+PINS = [
+    {'company_id': 1, 'company_name': 'Alpha Gold', 'goldstock_id': '11', 'goldstock_name': 'Alpha Gold Corp',
+     'confidence_score': 100, 'source': PINNED},
+    {'company_id': 2, 'company_name': 'Beta Silver', 'goldstock_id': '12', 'goldstock_name': 'Beta Silver Inc',
+     'confidence_score': 97, 'source': CONFIRMED, 'match_method': 'exact_ticker'},
+]
+
+@pytest.fixture(params=[mapping_script, mapping_script2], ids=lambda script: script.__name__.rsplit('.', 1)[-1])
+def script(request):
+    return request.param
+
+@pytest.fixture
+def warm(tmp_path, script):
+    cache = {f"goldstock_{gid}": {'goldstock_id': str(gid), 'company_name': name, 'ticker': None}
+             for gid, name in [(11, 'Alpha Gold Corp'), (12, 'Beta Silver Inc'), (13, 'Gamma Copper Ltd')]}
+    (tmp_path / 'cache.json').write_text(json.dumps(cache))
+    (tmp_path / 'pinned.json').write_text(json.dumps({'mappings': PINS}))
+    warm = WarmIndex(script, tmp_path / 'cache.json', tmp_path / 'pinned.json')
+    warm.refresh()
+    return warm
+
+def test_pinned_rows_match_what_batch_mode_writes(script, warm):
+    lines = ''.join(json.dumps({'company_id': pin['company_id'], 'company_name': pin['company_name']}) + '\n'
+                    for pin in PINS)
+    out = io.StringIO()
+    stream_matches(warm, io.StringIO(lines), out)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    expected = [asdict(script.pinned_mapping(script.Company(pin['company_id'], pin['company_name'], None), pin))
+                for pin in PINS]
+    assert rows == expected
+    assert [row['match_method'] for row in rows] == ['known_mapping', 'confirmed_mapping']
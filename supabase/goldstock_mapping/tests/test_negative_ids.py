@@ -0,0 +1,52 @@
+import pytest
+
+from goldstock_mapping.negative_ids import NegativeIds
+
+def negatives(*keys):
+    result = NegativeIds()
+    for key in keys:
+        result.add(key)
+    return result
+
+def test_ids_and_other_keys_are_remembered():
+    dead = negatives('goldstock_0', 'goldstock_9', 'goldstock_100000', 'investing_alpha-gold')
+    assert dead.has_id('goldstock', 9) and 'goldstock_100000' in dead
+    assert not dead.has_id('goldstock', 8) and not dead.has_id('goldstock', 200000)
+    assert not dead.has_id('other', 9)
+    assert 'investing_alpha-gold' in dead and 'investing_beta-silver' not in dead
+    assert list(dead.filter_ids('goldstock', range(11))) == [1, 2, 3, 4, 5, 6, 7, 8, 10]
+    assert dead.count_ids('goldstock') == 3
+
+def test_dumps_loads_round_trip():
+    dead = negatives('goldstock_3', 'goldstock_4097', 'page_12', 'investing_alpha-gold')
+    loaded = NegativeIds.loads(dead.dumps())
+    assert loaded.bitmaps == dead.bitmaps
+    assert loaded.bloom.bits == dead.bloom.bits and loaded.bloom.count == 1
+    assert 'investing_alpha-gold' in loaded and 'goldstock_4097' in loaded
+
+def test_loads_rejects_other_data():
+    with pytest.raises(ValueError):
+        NegativeIds.loads(b'{}')
+
+def test_save_load_round_trip_and_merge(tmp_path):
+    path = tmp_path / 'negative.bin'
+    assert NegativeIds.load(path).count_ids('goldstock') == 0
+    one, other = negatives('goldstock_1'), negatives('goldstock_2', 'investing_x')
+    one.save(path)
+    other.save(path)
+    one.save(path)
+    loaded = NegativeIds.load(path)
+    assert list(loaded.filter_ids('goldstock', [1, 2, 3])) == [3]
+    assert 'investing_x' in loaded
+
+def test_broken_file_loads_empty(tmp_path):
+    path = tmp_path / 'negative.bin'
+    path.write_bytes(b'garbage')
+    assert NegativeIds.load(path).bitmaps == {}
+
+def test_absorb_moves_null_cache_entries():
+    cache = {'goldstock_5': None, 'goldstock_6': {'name': 'Alpha'}, 'investing_x': None}
+    dead = NegativeIds()
+    assert dead.absorb(cache) == 2
+    assert cache == {'goldstock_6': {'name': 'Alpha'}}
+    assert 'goldstock_5' in dead and 'investing_x' in dead and 'goldstock_6' not in dead
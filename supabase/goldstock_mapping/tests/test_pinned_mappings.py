@@ -0,0 +1,59 @@
+import json
+
+from goldstock_mapping import mapping_script2
+from goldstock_mapping.pinned_mappings import CONFIRMED, PINNED, PinnedMappings
+
+ENTRIES = [
+    {'company_id': 1, 'company_name': 'Alpha Gold', 'goldstock_id': '11', 'goldstock_name': 'Alpha Gold Corp',
+     'confidence_score': 100, 'source': PINNED},
+    {'company_id': '2', 'company_name': 'Beta Silver', 'goldstock_id': 12, 'goldstock_name': 'Beta Silver Inc',
+     'confidence_score': 96, 'source': CONFIRMED, 'match_method': 'exact_ticker'},
+]
+
+def store(tmp_path, entries=ENTRIES):
+    path = tmp_path / 'pinned.json'
+    path.write_text(json.dumps({'mappings': entries}))
+    return PinnedMappings(path)
+
+def test_load(tmp_path):
+    pinned = store(tmp_path)
+    assert len(pinned) == 2 and 1 in pinned and 2 in pinned and 3 not in pinned
+    assert pinned.get(2)['goldstock_name'] == 'Beta Silver Inc'
+    assert pinned.get(3) is None
+    assert pinned.claimed_ids == {11, 12}
+    assert pinned.known_mappings() == {1: ENTRIES[0], 2: ENTRIES[1]}
+
+def test_missing_or_broken_file_is_empty(tmp_path):
+    assert len(PinnedMappings(tmp_path / 'missing.json')) == 0
+    (tmp_path / 'broken.json').write_text('{"mappings": [')
+    broken = PinnedMappings(tmp_path / 'broken.json')
+    assert len(broken) == 0 and broken.claimed_ids == set()
+
+def test_confirm_adds_new_companies_and_never_overrides(tmp_path):
+    pinned = store(tmp_path)
+    assert pinned.confirm(3, 'Gamma Copper', '13', 'Gamma Copper Ltd', 91, 'fuzzy_name')
+    # Rejected: a pinned and a confirmed company keep the entries they have
+    assert not pinned.confirm(1, 'Alpha Gold', '99', 'Other Corp', 100, 'exact_ticker')
+    assert not pinned.confirm(2, 'Beta Silver', '99', 'Other Corp', 100, 'exact_ticker')
+    assert pinned.get(1)['goldstock_id'] == '11' and pinned.get(2)['goldstock_id'] == 12
+    assert pinned.get(3)['source'] == CONFIRMED and pinned.get(3)['match_method'] == 'fuzzy_name'
+    assert 13 in pinned.claimed_ids
+
+    pinned.save()
+    reloaded = PinnedMappings(pinned.path)
+    assert reloaded.known_mappings() == pinned.known_mappings()
+    # Saved in company order, entries as they were written
+    assert json.loads(pinned.path.read_text())['mappings'][:2] == ENTRIES
+    assert [int(entry['company_id']) for entry in json.loads(pinned.path.read_text())['mappings']] == [1, 2, 3]
+
+def test_pin_outside_the_index_still_applies(tmp_path):
+    # Goldstock 11 is not in the index (not crawled, or the page is gone): the pin is used as written
+    pinned = store(tmp_path)
+    index = mapping_script2.build_match_index([
+        mapping_script2.GoldstockCompany(goldstock_id='13', company_name='Alpha Gold Corporation', ticker=None)])
+    company = mapping_script2.Company(1, 'Alpha Gold', None)
+    row = mapping_script2.match_company(company, index, pinned.known_mappings())
+    assert row == mapping_script2.pinned_mapping(company, pinned.get(1))
+    assert (row.goldstock_id, row.match_method, row.confidence_score) == ('11', 'known_mapping', 100)
+    confirmed = mapping_script2.pinned_mapping(mapping_script2.Company(2, 'Beta Silver', None), pinned.get(2))
+    assert (confirmed.goldstock_id, confirmed.match_method) == (12, 'confirmed_mapping')
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from goldstock_mapping import stage_profiler
+from goldstock_mapping.pipeline import Pipeline, Stage
+
+def build(state_file, calls, data='a', key=None):
+    """source 'data' -> 'double' (result kept) -> 'write' (writes out.txt)"""
+    out = state_file.parent / 'out.txt'
+
+    def double(data):
+        calls.append('double')
+        return data * 2
+
+    def write(double):
+        calls.append('write')
+        out.write_text(double)
+
+    pipeline = Pipeline(state_file)
+    pipeline.source('data', data)
+    pipeline.add(Stage('double', double, inputs=('data',), key=key, encode=lambda value: value))
+    pipeline.add(Stage('write', write, inputs=('double',), outputs=(out,)))
+    return pipeline, out
+
+def test_unchanged_inputs_skip_every_stage(tmp_path):
+    calls = []
+    first, out = build(tmp_path / 'state.json', calls)
+    assert first.run()['double'] == 'aa'
+    assert calls == ['double', 'write']
+
+    calls.clear()
+    second, _ = build(tmp_path / 'state.json', calls)
+    results = second.run()
+    assert calls == []
+    assert results['double'] == 'aa'
+    assert second.skipped == ['double', 'write']
+    assert out.read_text() == 'aa'
+
+def test_changed_source_or_key_reruns(tmp_path):
+    calls = []
+    build(tmp_path / 'state.json', calls)[0].run()
+    calls.clear()
+    build(tmp_path / 'state.json', calls, data='b')[0].run()
+    assert calls == ['double', 'write']
+    calls.clear()
+    build(tmp_path / 'state.json', calls, data='b', key=3)[0].run()
+    # Same result as before, so what reads it is still skipped
+    assert calls == ['double']
+
+def test_missing_or_edited_output_reruns_only_its_stage(tmp_path):
+    calls = []
+    _, out = build(tmp_path / 'state.json', calls)
+    build(tmp_path / 'state.json', calls)[0].run()
+    calls.clear()
+    out.write_text('edited')
+    pipeline, _ = build(tmp_path / 'state.json', calls)
+    pipeline.run()
+    assert calls == ['write']
+    assert out.read_text() == 'aa'
+
+def test_reuse_false_runs_everything(tmp_path):
+    calls = []
+    build(tmp_path / 'state.json', calls)[0].run()
+    calls.clear()
+    pipeline, _ = build(tmp_path / 'state.json', calls)
+    pipeline.reuse = False
+    pipeline.run()
+    assert calls == ['double', 'write']
+
+def test_stage_finishing_after_stop_is_not_recorded(tmp_path):
+    stop = threading.Event()
+    pipeline = Pipeline(tmp_path / 'state.json', should_stop=stop.is_set)
+    pipeline.source('data', 1)
+
+    def interrupted(data):
+        stop.set()
+        return data
+
+    pipeline.add(Stage('first', interrupted, inputs=('data',), encode=lambda value: value))
+    pipeline.add(Stage('second', lambda first: first, inputs=('first',)))
+    assert pipeline.run() == {}
+    assert 'first' not in Pipeline(tmp_path / 'state.json').state
+
+def test_unknown_input_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        Pipeline(tmp_path / 'state.json').add(Stage('orphan', lambda missing: None, inputs=('missing',)))
+
+def test_stages_run_one_at_a_time_on_the_caller_while_profiling(tmp_path, monkeypatch):
+    threads = []
+    pipeline = Pipeline(None, workers=4)
+    pipeline.source('data', 1)
+    for name in ('left', 'right'):
+        pipeline.add(Stage(name, lambda data: threads.append(threading.current_thread()), inputs=('data',)))
+    monkeypatch.setattr(stage_profiler, '_active', object())
+    pipeline.run()
+    assert threads == [threading.main_thread()] * 2
+
+def test_runs_sharing_the_state_file_keep_each_others_stages(tmp_path):
+    state_file = tmp_path / 'state.json'
+    one, other = Pipeline(state_file), Pipeline(state_file)
+    for pipeline, name in ((one, 'one'), (other, 'other')):
+        pipeline.source('data', 1)
+        pipeline.add(Stage(name, lambda data: data, inputs=('data',), encode=lambda value: value))
+        pipeline.run()
+    assert set(Pipeline(state_file).state) == {'one', 'other'}
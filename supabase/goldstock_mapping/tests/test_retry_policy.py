@@ -0,0 +1,58 @@
+import argparse
+import threading
+import time
+
+import pytest
+
+from goldstock_mapping.retry_policy import RetryPolicy, RetryingFetcher, int_at_least
+
+class Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+
+class Session:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return Response(self.status_code)
+
+def test_retries_until_max_attempts():
+    session = Session(503)
+    fetcher = RetryingFetcher(RetryPolicy(max_attempts=3, base_delay=0, max_delay=0))
+    assert fetcher.get(session, 'http://host/1').status_code == 503
+    assert session.calls == 3
+    assert fetcher.summary()['gave_up'] == 1
+
+def test_backoff_ends_when_stopped():
+    session = Session(503)
+    fetcher = RetryingFetcher(RetryPolicy(max_attempts=5, base_delay=30, max_delay=30))
+    stop = threading.Event()
+    threading.Timer(0.2, stop.set).start()
+    started = time.monotonic()
+    response = fetcher.get(session, 'http://host/1', should_stop=stop.is_set)
+    assert time.monotonic() - started < 5
+    assert response.status_code == 503
+    assert session.calls == 1
+
+def test_open_breaker_wait_ends_when_stopped():
+    fetcher = RetryingFetcher(RetryPolicy(max_attempts=1), breaker_cooldown=60)
+    breaker = fetcher.breaker('host')
+    for _ in range(breaker.min_requests):
+        breaker.record(False)
+    assert breaker.is_open
+    session = Session(200)
+    started = time.monotonic()
+    assert fetcher.get(session, 'http://host/1', should_stop=lambda: time.monotonic() - started > 0.2) is None
+    assert time.monotonic() - started < 5
+    assert session.calls == 0
+
+def test_max_attempts_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
+    with pytest.raises(argparse.ArgumentTypeError):
+        int_at_least(0)('-1')
+    assert int_at_least(1)('2') == 2
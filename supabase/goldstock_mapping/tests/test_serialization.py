@@ -0,0 +1,77 @@
+import json
+import sys
+
+import pytest
+
+from goldstock_mapping import serialization
+from goldstock_mapping.serialization import FORMATS, JSON, MSGPACK, MSGPACK_MAGIC, Members
+
+CACHE = {f"goldstock_{i}": {'goldstock_id': str(i), 'company_name': f"Société Minière {i}", 'ticker': None,
+                            'aliases': ['alpha', 'beta'], 'listings': [['TSXV', f"A{i}"]]} for i in range(1, 2500)}
+
+def formats():
+    return [pytest.param(fmt, marks=pytest.mark.skipif(not serialization.available(fmt), reason=f"{fmt} not installed"))
+            for fmt in FORMATS]
+
+def streamed():
+    """The cache and a checkpoint-shaped value, written one member at a time"""
+    return Members([
+        ('cache', Members(iter(CACHE.items()))),
+        ('processed_ids', (i for i in range(3000))),
+        ('empty', Members([])),
+        ('plain', {'nested': [1, 2.5, None, True]}),
+    ])
+
+EXPECTED = {'cache': CACHE, 'processed_ids': list(range(3000)), 'empty': {}, 'plain': {'nested': [1, 2.5, None, True]}}
+
+@pytest.mark.parametrize('fmt', formats())
+def test_round_trip(tmp_path, fmt):
+    path = tmp_path / 'data'
+    serialization.save(path, CACHE, fmt)
+    assert serialization.load(path) == CACHE
+    serialization.save(path, streamed(), fmt)
+    assert serialization.load(path) == EXPECTED
+
+@pytest.mark.parametrize('fmt', formats())
+def test_any_format_loads_without_orjson(tmp_path, monkeypatch, fmt):
+    path = tmp_path / 'data'
+    serialization.save(path, streamed(), fmt)
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    assert serialization.load(path) == EXPECTED
+
+@pytest.mark.parametrize('fmt', formats())
+def test_format_is_told_apart_by_its_first_bytes(tmp_path, fmt):
+    path = tmp_path / 'data'
+    serialization.save(path, {'a': 1}, fmt)
+    assert path.read_bytes().startswith(MSGPACK_MAGIC) == (fmt == MSGPACK)
+
+def test_streamed_json_keeps_the_indented_layout(tmp_path):
+    path = tmp_path / 'data.json'
+    serialization.save(path, streamed(), JSON)
+    assert path.read_text(encoding='utf-8') == json.dumps(EXPECTED, indent=2, ensure_ascii=False) + '\n'
+
+def test_missing_file_gives_the_default(tmp_path):
+    assert serialization.load(tmp_path / 'missing', {}) == {}
+
+@pytest.mark.parametrize('fmt', formats())
+def test_interrupted_write_leaves_the_previous_file(tmp_path, fmt):
+    path = tmp_path / 'data'
+    serialization.save(path, CACHE, fmt)
+    before = path.read_bytes()
+
+    def failing():
+        yield from list(CACHE.items())[:1500]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        serialization.save(path, Members(failing()), fmt)
+    assert path.read_bytes() == before
+    assert serialization.load(path) == CACHE
+    assert [p.name for p in tmp_path.iterdir()] == ['data']
+
+def test_unknown_format_writes_nothing(tmp_path):
+    path = tmp_path / 'data'
+    serialization.save(path, {'a': 1}, JSON)
+    with pytest.raises(ValueError):
+        serialization.save(path, {'a': 2}, 'yaml')
+    assert serialization.load(path) == {'a': 1}
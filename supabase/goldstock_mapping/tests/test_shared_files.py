@@ -0,0 +1,29 @@
+import pytest
+
+from goldstock_mapping.shared_files import atomic_write, locked, signature
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'old')
+    before = signature(path)
+    with atomic_write(path) as f:
+        f.write(b'new')
+    assert path.read_bytes() == b'new'
+    assert signature(path) != before
+    assert [p.name for p in tmp_path.iterdir()] == ['data.bin']
+
+def test_failed_write_leaves_the_file_alone(tmp_path):
+    path = tmp_path / 'data.bin'
+    path.write_bytes(b'old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write(b'half')
+            raise RuntimeError
+    assert path.read_bytes() == b'old'
+    assert [p.name for p in tmp_path.iterdir()] == ['data.bin']
+
+def test_lock_uses_a_sidecar(tmp_path):
+    path = tmp_path / 'data.bin'
+    with locked(path):
+        assert (tmp_path / 'data.bin.lock').exists()
+    assert signature(path) is None
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+import pytest
+
+from goldstock_mapping.sources import GoldstockSource, InvestingSource, SourceAdapter, slug_without_suffix, slugify
+
+def test_incomplete_adapter_fails_on_creation():
+    class NoParse(SourceAdapter):
+        name = 'partial'
+
+        def keys(self):
+            return [1]
+
+        def url(self, key):
+            return f"https://example.com/{key}"
+
+    with pytest.raises(TypeError, match='parse'):
+        NoParse()
+    with pytest.raises(TypeError):
+        SourceAdapter()
+
+def test_goldstock_source():
+    source = GoldstockSource(lambda key, html: None, base_url='http://127.0.0.1:8791', start_id=5, max_id=7)
+    assert list(source.keys()) == [5, 6, 7]
+    assert source.url(6) == 'http://127.0.0.1:8791/company/6-'
+    assert source.cache_key(6) == 'goldstock_6'
+    assert source.host == '127.0.0.1:8791'
+    assert source.parse(6, '<html></html>') is None
+
+def test_investing_source_slugs():
+    assert slugify('Alpha & Omega Gold Corp.') == 'alpha-and-omega-gold-corp'
+    assert slug_without_suffix('Alpha Gold Corp') == 'alpha-gold'
+    companies = [SimpleNamespace(company_id=1, company_name='Alpha Gold Corp'),
+                 SimpleNamespace(company_id=2, company_name='Alpha Gold')]
+    source = InvestingSource(companies)
+    assert list(source.keys()) == ['alpha-gold-corp', 'alpha-gold']
+    assert source.proposed_by['alpha-gold'] == companies
+    record = source.parse('alpha-gold', '<h1>Alpha Gold Corp (AGC)</h1>')
+    assert record == {'slug': 'alpha-gold', 'url': 'https://www.investing.com/equities/alpha-gold',
+                      'page_name': 'Alpha Gold Corp'}
+    assert [row['company_id'] for row in source.candidates([('alpha-gold', record)])] == [1, 2]
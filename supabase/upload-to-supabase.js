@@ -49,6 +49,100 @@ async function createStorageBucketIfNeeded() {
     }
 }
 
+// Rows the mapping scripts changed since their previous export (change: upsert | delete)
+const DELTA_FILE = path.join(__dirname, 'company_mappings_delta.csv');
+
+function toMapping(record) {
+    return {
+        company_id: parseInt(record.company_id),
+        company_name: record.company_name,
+        tsx_code: record.tsx_code || null,
+        goldstock_id: record.goldstock_id || null,
+        goldstock_name: record.goldstock_name || null,
+        match_status: record.match_status,
+        confidence_score: parseFloat(record.confidence_score) || 0,
+        match_method: record.match_method || null
+    };
+}
+
+// Apply the pending delta instead of replacing the table; returns the company_ids upserted, or null on failure
+async function uploadDeltaToSupabase() {
+    try {
+        let fileContent;
+        try {
+            fileContent = await fs.readFile(DELTA_FILE, 'utf-8');
+        } catch (error) {
+            if (error.code === 'ENOENT') {
+                console.log('No pending changes (company_mappings_delta.csv not found)');
+                return [];
+            }
+            throw error;
+        }
+        
+        const records = csv.parse(fileContent, {
+            columns: true,
+            skip_empty_lines: true
+        });
+        const upserts = records.filter(r => r.change === 'upsert').map(toMapping);
+        const changedIds = records.map(r => parseInt(r.company_id));
+        
+        console.log(`Found ${upserts.length} changed and ${records.length - upserts.length} removed mappings`);
+        
+        // Replace the changed rows: clear every company in the delta, then insert the upserts
+        const batchSize = 100;
+        for (let i = 0; i < changedIds.length; i += batchSize) {
+            const { error } = await supabase
+                .from('company_goldstock_mapping')
+                .delete()
+                .in('company_id', changedIds.slice(i, i + batchSize));
+            
+            if (error) {
+                console.error('Error clearing changed mappings:', error);
+                return null;
+            }
+        }
+        
+        for (let i = 0; i < upserts.length; i += batchSize) {
+            const { error } = await supabase
+                .from('company_goldstock_mapping')
+                .insert(upserts.slice(i, i + batchSize));
+            
+            if (error) {
+                console.error(`Error uploading batch ${i / batchSize + 1}:`, error);
+                return null;
+            }
+        }
+        
+        if (records.length) {
+            const { error: logError } = await supabase
+                .from('update_log')
+                .insert(
+                    records.map(r => ({
+                        company_id: parseInt(r.company_id),
+                        table_name: 'company_goldstock_mapping',
+                        update_time: new Date().toISOString(),
+                        update_description: r.change === 'upsert'
+                            ? `Updated goldstockdata.com mapping - ${r.match_status}`
+                            : 'Removed goldstockdata.com mapping'
+                    }))
+                );
+            
+            if (logError) {
+                console.error('Error updating log:', logError);
+            }
+        }
+        
+        // Consumed: the next export starts a new delta
+        await fs.unlink(DELTA_FILE);
+        console.log(`Applied ${records.length} mapping changes`);
+        return upserts.map(m => m.company_id);
+        
+    } catch (error) {
+        console.error('Error in delta upload process:', error);
+        return null;
+    }
+}
+
 async function uploadMappingsToSupabase() {
     try {
         // Read the CSV file
@@ -64,16 +158,7 @@ async function uploadMappingsToSupabase() {
         console.log(`Found ${records.length} mappings to upload`);
         
         // Prepare data for batch insert
-        const mappings = records.map(record => ({
-            company_id: parseInt(record.company_id),
-            company_name: record.company_name,
-            tsx_code: record.tsx_code || null,
-            goldstock_id: record.goldstock_id || null,
-            goldstock_name: record.goldstock_name || null,
-            match_status: record.match_status,
-            confidence_score: parseFloat(record.confidence_score) || 0,
-            match_method: record.match_method || null
-        }));
+        const mappings = records.map(toMapping);
         
         // Delete existing mappings (optional - remove if you want to keep history)
         const { error: deleteError } = await supabase
@@ -121,6 +206,9 @@ async function uploadMappingsToSupabase() {
         
         console.log('All mappings uploaded successfully!');
         
+        // The full table is loaded, so no pending delta is left to apply
+        await fs.rm(DELTA_FILE, { force: true });
+        
         // Display summary
         const matched = mappings.filter(m => m.match_status === 'matched').length;
         const manual = mappings.filter(m => m.match_status === 'manual').length;
@@ -136,17 +224,35 @@ async function uploadMappingsToSupabase() {
     }
 }
 
-async function uploadLogos() {
+async function uploadLogos(companyIds = null) {
     try {
-        // Fetch only matched mappings
-        const { data: mappings, error } = await supabase
-            .from('company_goldstock_mapping')
-            .select('company_id, goldstock_id, match_status')
-            .eq('match_status', 'matched');
+        // Fetch only matched mappings (with companyIds, only those companies, 100 IDs per
+        // request so a large delta stays under the PostgREST URL length limit)
+        const idBatchSize = 100;
+        const idBatches = [];
+        if (companyIds) {
+            for (let i = 0; i < companyIds.length; i += idBatchSize) {
+                idBatches.push(companyIds.slice(i, i + idBatchSize));
+            }
+        } else {
+            idBatches.push(null);
+        }
+        const mappings = [];
+        for (const ids of idBatches) {
+            let query = supabase
+                .from('company_goldstock_mapping')
+                .select('company_id, goldstock_id, match_status')
+                .eq('match_status', 'matched');
+            if (ids) {
+                query = query.in('company_id', ids);
+            }
+            const { data, error } = await query;
 
-        if (error) {
-            console.error('Error fetching mappings:', error);
-            return;
+            if (error) {
+                console.error('Error fetching mappings:', error);
+                return;
+            }
+            mappings.push(...data);
         }
 
         console.log(`Found ${mappings.length} matched companies for logo upload`);
@@ -316,16 +422,33 @@ async function main() {
         return;
     }
     
+    // --delta: apply only company_mappings_delta.csv and fetch logos for the companies it changed
+    const deltaOnly = process.argv.includes('--delta');
+    
     // Step 1: Upload mappings
-    console.log('\n1. Uploading mappings to Supabase...');
-    await uploadMappingsToSupabase();
+    let changedIds = null;
+    if (deltaOnly) {
+        console.log('\n1. Uploading mapping changes to Supabase...');
+        changedIds = await uploadDeltaToSupabase();
+        if (changedIds === null) {
+            console.error('\nDelta upload failed; company_mappings_delta.csv is kept for the next attempt.');
+            return;
+        }
+    } else {
+        console.log('\n1. Uploading mappings to Supabase...');
+        await uploadMappingsToSupabase();
+    }
     
     // Wait a bit to ensure data is committed
     await new Promise(resolve => setTimeout(resolve, 2000));
     
     // Step 2: Upload logos
     console.log('\n2. Uploading logos...');
-    await uploadLogos();
+    if (changedIds && !changedIds.length) {
+        console.log('No changed mappings; skipping logos');
+    } else {
+        await uploadLogos(changedIds);
+    }
     
     console.log('\n✓ All done!');
 }